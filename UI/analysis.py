@@ -1,72 +1,136 @@
 import streamlit as st # type: ignore
 import pandas as pd # type: ignore
+import html
+import json
 from io import BytesIO
 from datetime import datetime
+from analysis_cache import cached_analysis, get_cache
+from corpus_store import CorpusStore, store_exists, touch_store
+from profiler import profiled, profile_run, stage
+from reports import write_report, report_file, MIME_TYPES
+from charts import label_counts_chart, compound_histogram, compound_trend
 from metrics import (
     word_count, sentence_count, sentiment_analysis,
-    sentiment_distribution, sentiment_to_emoji,
-    top_tokens, simple_summary, extract_topics, readability_score,
-    comprehensive_summary
+    sentiment_distribution, sentiment_distribution_chart, sentiment_to_emoji,
+    top_tokens, extractive_summary, extract_topics, readability_score,
+    comprehensive_summary, text_stats, analyze_dataframe, topic_fit_report
 )
 
-def generate_text_report(text, sentiment_scores, tokens, summary):
-    """Generate report content for text data"""
-    wc = word_count(text)
-    sc = sentence_count(text)
-    compound_score = sentiment_scores["compound"]
-    
-    if compound_score > 0.2:
-        sentiment_text = "POSITIVE"
-    elif compound_score < -0.2:
-        sentiment_text = "NEGATIVE"
-    else:
-        sentiment_text = "NEUTRAL"
-    
-    distribution = sentiment_distribution(sentiment_scores)
-    
-    report = f"""
-═══════════════════════════════════════════════════════════════
-                    NARRATIVE NEXUS - TEXT ANALYSIS REPORT
-═══════════════════════════════════════════════════════════════
-
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-─────────────────────────────────────────────────────────────────
-📊 KEY METRICS
-─────────────────────────────────────────────────────────────────
-• Total Words:              {wc}
-• Total Sentences:          {sc}
-• Average Word Length:      {round(len(text) / max(wc, 1), 2)}
-• Character Count:          {len(text):,}
-
-─────────────────────────────────────────────────────────────────
-💭 SENTIMENT ANALYSIS
-─────────────────────────────────────────────────────────────────
-• Overall Sentiment:        {sentiment_text}
-• Compound Score:           {compound_score:.4f}
-• Positive Sentences:       {distribution.get('Positive', 0) * 100:.1f}%
-• Neutral Sentences:        {distribution.get('Neutral', 0) * 100:.1f}%
-• Negative Sentences:       {distribution.get('Negative', 0) * 100:.1f}%
-
-─────────────────────────────────────────────────────────────────
-🔑 TOP KEYWORDS
-─────────────────────────────────────────────────────────────────
-"""
-    
-    for i, (token, count) in enumerate(tokens, 1):
-        report += f"{i:2d}. {token.upper():<20} (frequency: {count})\n"
-    
-    report += f"""
-─────────────────────────────────────────────────────────────────
-📝 SUMMARY
-─────────────────────────────────────────────────────────────────
-{summary}
-
-═══════════════════════════════════════════════════════════════
-                        END OF REPORT
-═══════════════════════════════════════════════════════════════
-"""
-    return report
+@profiled()
+def compute_text_analysis(text, n_tokens=12, n_topics=3):
+    """Run every text metric once; results are cached by content hash across reruns"""
+    def compute():
+        # One pass over the text feeds every count
+        stats = text_stats(text)
+        sentiment_scores = sentiment_analysis(text)
+        tokens = top_tokens(stats, n=n_tokens)
+        return {
+            "stats": stats,
+            "sentiment_scores": sentiment_scores,
+            "tokens": tokens,
+            "summary": comprehensive_summary(stats, sentiment_scores, tokens),
+            "extractive_summary": extractive_summary(text),
+            "topics": extract_topics(text, n_topics=n_topics),
+            "topic_fit": topic_fit_report("text"),
+            "readability": readability_score(stats),
+        }
+
+    return cached_analysis(text, compute, kind="text", n_tokens=n_tokens, n_topics=n_topics)
+
+
+@profiled()
+def compute_csv_analysis(df, n_tokens=12, n_topics=3):
+    """Batch analytics over every CSV row, cached by content hash across reruns"""
+    return cached_analysis(
+        df,
+        lambda: analyze_dataframe(df, n_tokens=n_tokens, n_topics=n_topics),
+        kind="csv", n_tokens=n_tokens, n_topics=n_topics
+    )
+
+
+REPORT_LABELS = {
+    "txt": "📄 Report (TXT)",
+    "json": "📋 Report (JSON)",
+    "html": "🌐 Report (HTML)",
+    "parquet": "🗂️ Per-Row Results (Parquet)",
+}
+
+
+def session_corpus_store(path):
+    """
+    This session's reader of the corpus store at ``path``, opened once and
+    reused across reruns; the reader of a previous upload is closed.
+    """
+    cached = st.session_state.get("corpus_store")
+    if cached is not None and cached.path == path:
+        # Keeps the store from being pruned while this session shows it
+        touch_store(path)
+        return cached
+    if cached is not None:
+        cached.close()
+        del st.session_state["corpus_store"]
+    if not path or not store_exists(path):
+        return None
+    st.session_state.corpus_store = CorpusStore(path)
+    return st.session_state.corpus_store
+
+
+def render_report_downloads(results, formats, key):
+    """One download button per report format; each report is written only when its button is clicked"""
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    for col, fmt in zip(st.columns(len(formats), gap="medium"), formats):
+        with col:
+            st.download_button(
+                label=REPORT_LABELS[fmt],
+                data=lambda fmt=fmt: report_file(results, fmt),
+                file_name=f"narrative_nexus_report_{stamp}.{fmt}",
+                mime=MIME_TYPES[fmt],
+                use_container_width=True,
+                key=f"download_{key}_{fmt}"
+            )
+
+
+def render_diagnostics(analysis_profile, report_profile):
+    """Optional per-stage timing/memory panel with a JSON export"""
+    profiles = [p for p in (analysis_profile, report_profile) if p is not None]
+    if not profiles:
+        return
+
+    with st.expander("🔬 Diagnostics: pipeline stage profile"):
+        records = [r for p in profiles for r in p.to_dict()["records"]]
+        summary = pd.DataFrame([t for p in profiles for t in p.summary()])
+        if summary.empty:
+            st.caption("Every stage was served from cache; nothing was recomputed.")
+            return
+
+        summary = summary.groupby("stage", as_index=False).agg(
+            calls=("calls", "sum"), wall_seconds=("wall_seconds", "sum"),
+            cpu_seconds=("cpu_seconds", "sum"), peak_bytes=("peak_bytes", "max"),
+        ).sort_values("wall_seconds", ascending=False)
+        summary["peak_mb"] = (summary.pop("peak_bytes") / (1024 * 1024)).round(2)
+
+        st.markdown("**Time per stage** (nested stages are included in their parents)")
+        st.bar_chart(summary.set_index("stage")[["wall_seconds", "cpu_seconds"]])
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+
+        with st.expander("All stage calls, in start order"):
+            calls = pd.DataFrame(records)
+            calls["stage"] = ["· " * d + name for d, name in zip(calls["depth"], calls["stage"])]
+            st.dataframe(calls.drop(columns=["depth"]), use_container_width=True, hide_index=True)
+
+        if not any(p.trace_memory for p in profiles):
+            st.caption("Peak memory is recorded when memory tracing is enabled on the Upload page "
+                       "(or with NARRATIVE_NEXUS_PROFILE_MEMORY=1).")
+
+        export = json.dumps({p.label or "analysis": p.to_dict() for p in profiles}, indent=2)
+        st.download_button(
+            label="🧾 Download profile (JSON)",
+            data=export,
+            file_name=f"narrative_nexus_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json",
+            key="download_profile"
+        )
+
 
 def render_analysis():
     # Check for data in session state
@@ -84,17 +148,22 @@ def render_analysis():
     
     text = st.session_state.processed_data
     source_type = st.session_state.data_type
+    report_profile = None
 
     # ==================== TEXT ANALYSIS ====================
     if source_type == "text":
-        # Calculate metrics
-        wc = word_count(text)
-        sc = sentence_count(text)
-        sentiment_scores = sentiment_analysis(text)
+        # Calculate metrics (reused across reruns while the data is unchanged)
+        results = compute_text_analysis(text)
+        stats = results["stats"]
+        wc = word_count(stats)
+        sc = sentence_count(stats)
+        sentiment_scores = results["sentiment_scores"]
         sentiment = sentiment_to_emoji(sentiment_scores["compound"])
         distribution = sentiment_distribution(sentiment_scores)
-        tokens = top_tokens(text, n=12)
-        summary = comprehensive_summary(text, sentiment_scores, tokens)
+        tokens = results["tokens"]
+        summary = results["summary"]
+        # Absent from results cached before the extractive summarizer existed
+        key_sentences = results.get("extractive_summary", {}).get("sentences", [])
 
         # ==================== KEY METRICS ====================
         metric_cols = st.columns(3, gap="large")
@@ -102,7 +171,7 @@ def render_analysis():
         metrics_data = [
             ("📝", "Words", wc, "#6366f1"),
             ("📚", "Sentences", sc, "#8b5cf6"),
-            ("⏱️", "Avg Length", f"{round(len(text) / max(wc, 1), 1)}", "#d946ef")
+            ("⏱️", "Avg Length", f"{round(stats.avg_word_length, 1)}", "#d946ef")
         ]
         
         for col, (icon, label, value, color) in zip(metric_cols, metrics_data):
@@ -182,33 +251,8 @@ def render_analysis():
                 </div>
             """, unsafe_allow_html=True)
             
-            sentiment_data = {
-                "Positive": distribution.get("Positive", 0) * 100,
-                "Neutral": distribution.get("Neutral", 0) * 100,
-                "Negative": distribution.get("Negative", 0) * 100
-            }
-            
-            for label, value in sentiment_data.items():
-                if label == "Positive":
-                    color = "#10b981"
-                elif label == "Negative":
-                    color = "#ef4444"
-                else:
-                    color = "#f59e0b"
-                
-                st.markdown(f"""
-                    <div style='margin-bottom: 1.5rem;'>
-                        <div style='display: flex; justify-content: space-between; margin-bottom: 0.8rem;'>
-                            <span style='font-weight: 700; color: #1e293b;'>{label}</span>
-                            <span style='font-weight: 800; color: {color}; font-size: 1.1rem;'>{value:.1f}%</span>
-                        </div>
-                        <div style='width: 100%; height: 12px; background: linear-gradient(90deg, rgba(0,0,0,0.05), rgba(0,0,0,0.1)); 
-                        border-radius: 8px; overflow: hidden; box-shadow: inset 0 2px 4px rgba(0,0,0,0.1);'>
-                            <div style='width: {value}%; height: 100%; background: linear-gradient(90deg, {color}, {color}dd); 
-                            border-radius: 8px; transition: width 0.6s cubic-bezier(0.23, 1, 0.320, 1);'></div>
-                        </div>
-                    </div>
-                """, unsafe_allow_html=True)
+            # Rendered once per distinct distribution, then served from the chart cache
+            st.image(sentiment_distribution_chart(distribution), use_container_width=True)
 
         # ==================== TOPIC MODELING ====================
         st.markdown("<div style='margin: 3rem 0;'></div>", unsafe_allow_html=True)
@@ -218,7 +262,7 @@ def render_analysis():
         """, unsafe_allow_html=True)
         
         try:
-            topics = extract_topics(text, n_topics=3)
+            topics = results["topics"]
             
             topic_cols = st.columns(3, gap="large")
             
@@ -240,6 +284,13 @@ def render_analysis():
                             </div>
                         </div>
                     """, unsafe_allow_html=True)
+
+            topic_fit = results.get("topic_fit")
+            if topic_fit and topic_fit["n_iter"]:
+                st.caption(
+                    f"Topic model: {topic_fit['backend'].upper()} · fitted in {topic_fit['fit_seconds']:.2f}s "
+                    f"over {topic_fit['n_iter']} iterations"
+                )
         except Exception as e:
             st.warning("⚠️ Topics could not be extracted. Text may be too short.")
 
@@ -251,7 +302,7 @@ def render_analysis():
         """, unsafe_allow_html=True)
         
         try:
-            readability = readability_score(text)
+            readability = results["readability"]
             
             # Interpret readability score
             if readability < 6:
@@ -314,7 +365,19 @@ def render_analysis():
 
         # ==================== SUMMARY ====================
         st.markdown("<div style='margin: 3rem 0;'></div>", unsafe_allow_html=True)
-        
+
+        highlights = "".join(
+            f"<li style='margin-bottom: 0.6rem;'>{html.escape(s)}.</li>" for s in key_sentences
+        )
+        if highlights:
+            # Kept on one line: a blank line would end the surrounding HTML block
+            highlights = (
+                "<h4 style='color: #475569; margin: 0 0 0.75rem 0; font-size: 1.1rem; font-weight: 700;'>"
+                "Key sentences</h4>"
+                "<ol style='color: #475569; line-height: 1.7; margin: 0 0 1.5rem 1.25rem; font-size: 1.05rem;'>"
+                f"{highlights}</ol>"
+            )
+
         st.markdown(f"""
             <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95), rgba(248, 250, 252, 0.8));
             backdrop-filter: blur(20px); padding: 2.5rem; border-radius: 24px;
@@ -322,7 +385,7 @@ def render_analysis():
             margin-bottom: 2rem;'>
                 <h3 style='color: #10b981; margin: 0 0 1.5rem 0; font-size: 1.5rem; font-weight: 800;'>
                     📝 Summary
-                </h3>
+                </h3>{highlights}
                 <p style='color: #475569; line-height: 1.9; margin: 0; font-size: 1.05rem;'>
                     {summary}
                 </p>
@@ -343,8 +406,9 @@ def render_analysis():
             </div>
         """, unsafe_allow_html=True)
         
-        # Generate report content
-        report_text = generate_text_report(text, sentiment_scores, tokens, summary)
+        # The TXT report is small and built up front; the others when clicked
+        with profile_run("reports") as report_profile:
+            report_text = write_report(results, BytesIO(), "txt").getvalue()
         
         st.download_button(
             label="📄 Download Full Report (TXT)",
@@ -354,6 +418,86 @@ def render_analysis():
             use_container_width=True,
             key="download_txt"
         )
+        render_report_downloads(results, ["json", "html"], "text")
+
+        cache_stats = get_cache().stats()
+        st.caption(
+            f"Analysis cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · "
+            f"{cache_stats['entries']}/{cache_stats['max_entries']} entries ({cache_stats['backend']})"
+        )
+
+    # ==================== STREAMED CSV ====================
+    elif source_type == "csv_stream":
+        corpus = text
+        stats = corpus.text
+
+        stat_cols = st.columns(3, gap="large")
+
+        stats_data = [
+            ("📋", "Rows", f"{corpus.rows:,}", "#6366f1"),
+            ("📝", "Words", f"{stats.words:,}", "#8b5cf6"),
+            ("📚", "Sentences", f"{stats.sentences:,}", "#d946ef")
+        ]
+
+        for col, (icon, label, value, color) in zip(stat_cols, stats_data):
+            with col:
+                st.markdown(f"""
+                    <div class='metric-card' style='border-left: 4px solid {color};'>
+                        <div class='metric-label'>{icon} {label}</div>
+                        <div class='metric-value'>{value}</div>
+                    </div>
+                """, unsafe_allow_html=True)
+
+        st.markdown("<div style='margin: 2rem 0;'></div>", unsafe_allow_html=True)
+
+        st.markdown("""
+            <h3 style='color: #8b5cf6; margin-bottom: 1.5rem; font-size: 1.5rem; font-weight: 800;'>🔑 Key Terms</h3>
+        """, unsafe_allow_html=True)
+
+        st.dataframe(
+            pd.DataFrame(
+                [{"Term": tok.upper(), "Frequency": cnt} for tok, cnt in top_tokens(stats, n=12)]
+            ),
+            use_container_width=True,
+            hide_index=True,
+            height=300
+        )
+
+        readability = readability_score(stats)
+        st.caption(
+            f"Processed in {corpus.chunks} chunks across columns: {', '.join(map(str, corpus.text_columns))} · "
+            f"readability grade {readability:.1f}"
+        )
+
+        # Only aggregates are kept for streamed CSVs, so there are no per-row results to report
+        render_report_downloads({
+            "stats": stats,
+            "text_columns": corpus.text_columns,
+            "row_count": corpus.rows,
+            "tokens": top_tokens(stats, n=12),
+            "readability": readability,
+        }, ["txt", "json", "html"], "csv_stream")
+
+        store = session_corpus_store(getattr(corpus, "store_path", None))
+        if store is not None:
+            # The processed rows live in the memory-mapped corpus store: only the
+            # previewed rows are read, and the CSV is exported only when clicked
+            st.markdown("""
+                <h3 style='color: #6366f1; margin: 2rem 0 1.5rem 0; font-size: 1.5rem; font-weight: 800;'>🧾 Processed Rows</h3>
+            """, unsafe_allow_html=True)
+            st.dataframe(
+                pd.concat([store.frame(store.text_columns, stop=100), store.metrics(stop=100)], axis=1),
+                use_container_width=True,
+                height=300
+            )
+            st.download_button(
+                label="📊 Download Processed CSV",
+                data=lambda: store.write_csv(BytesIO()).getvalue(),
+                file_name=f"narrative_nexus_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                use_container_width=True,
+                key="download_csv_stream"
+            )
 
     # ==================== CSV DATA ====================
     else:
@@ -386,7 +530,85 @@ def render_analysis():
                         <div class='metric-value'>{value}</div>
                     </div>
                 """, unsafe_allow_html=True)
-        
+
+        # ==================== CSV ANALYTICS ====================
+        st.markdown("<div style='margin: 3rem 0;'></div>", unsafe_allow_html=True)
+
+        try:
+            csv_results = compute_csv_analysis(text)
+        except ValueError as e:
+            csv_results = None
+            st.warning(f"⚠️ {e}")
+
+        if csv_results is not None:
+            row_metrics = csv_results["rows"]
+            sentiment_counts = csv_results["sentiment_counts"]
+
+            analytics_cols = st.columns(4, gap="large")
+            analytics_data = [
+                ("😊", "Positive Rows", f"{sentiment_counts.get('Positive', 0):,}", "#10b981"),
+                ("😐", "Neutral Rows", f"{sentiment_counts.get('Neutral', 0):,}", "#f59e0b"),
+                ("😟", "Negative Rows", f"{sentiment_counts.get('Negative', 0):,}", "#ef4444"),
+                ("📚", "Avg Readability", f"{row_metrics['readability'].mean():.1f}", "#0ea5e9")
+            ]
+
+            for col, (icon, label, value, color) in zip(analytics_cols, analytics_data):
+                with col:
+                    st.markdown(f"""
+                        <div class='metric-card' style='border-left: 4px solid {color};'>
+                            <div class='metric-label'>{icon} {label}</div>
+                            <div class='metric-value'>{value}</div>
+                        </div>
+                    """, unsafe_allow_html=True)
+
+            st.markdown("<div style='margin: 2rem 0;'></div>", unsafe_allow_html=True)
+
+            # Charts are binned server-side: a few hundred points whatever the row count
+            chart_cols = st.columns(3, gap="large")
+            with chart_cols[0]:
+                st.image(label_counts_chart(sentiment_counts), use_container_width=True)
+            with chart_cols[1]:
+                st.image(compound_histogram(row_metrics["compound"].to_numpy()), use_container_width=True)
+            with chart_cols[2]:
+                st.image(compound_trend(row_metrics["compound"].to_numpy()), use_container_width=True)
+
+            st.markdown("<div style='margin: 2rem 0;'></div>", unsafe_allow_html=True)
+
+            terms_col, topics_col = st.columns(2, gap="large")
+
+            with terms_col:
+                st.markdown("""
+                    <h3 style='color: #8b5cf6; margin-bottom: 1.5rem; font-size: 1.5rem; font-weight: 800;'>🔑 Key Terms</h3>
+                """, unsafe_allow_html=True)
+                st.dataframe(
+                    pd.DataFrame([{"Term": tok.upper(), "Frequency": cnt} for tok, cnt in csv_results["tokens"]]),
+                    use_container_width=True,
+                    hide_index=True,
+                    height=300
+                )
+
+            with topics_col:
+                st.markdown("""
+                    <h3 style='color: #8b5cf6; margin-bottom: 1.5rem; font-size: 1.5rem; font-weight: 800;'>🎯 Main Topics</h3>
+                """, unsafe_allow_html=True)
+                for topic_name, keywords in csv_results["topics"].items():
+                    st.markdown(f"**{topic_name}:** {', '.join(keywords)}")
+
+            st.markdown("""
+                <h3 style='color: #6366f1; margin: 2rem 0 1.5rem 0; font-size: 1.5rem; font-weight: 800;'>🧾 Per-Row Metrics</h3>
+            """, unsafe_allow_html=True)
+            st.dataframe(row_metrics.head(100), use_container_width=True, height=300)
+
+            duplicates = csv_results.get("duplicates")
+            if duplicates and duplicates["duplicates"]:
+                st.caption(
+                    f"Near-duplicates: {duplicates['duplicates']:,} of {duplicates['rows']:,} rows folded into "
+                    f"{duplicates['clusters']:,} clusters (similarity ≥ {duplicates['threshold']:.0%}, "
+                    f"{duplicates['seconds']:.2f}s); each cluster was analyzed once and weighted by its size"
+                )
+
+            render_report_downloads(csv_results, ["txt", "json", "html", "parquet"], "csv")
+
         # ==================== CSV DOWNLOAD ====================
         st.markdown("<div style='margin: 3rem 0;'></div>", unsafe_allow_html=True)
         
@@ -405,7 +627,8 @@ def render_analysis():
         
         with col1:
             csv_buffer = BytesIO()
-            text.to_csv(csv_buffer, index=False)
+            with profile_run("reports") as report_profile, stage("csv_export", len(text), "rows"):
+                text.to_csv(csv_buffer, index=False)
             csv_buffer.seek(0)
             
             st.download_button(
@@ -419,7 +642,9 @@ def render_analysis():
         
         with col2:
             # Generate JSON from CSV
-            json_str = text.to_json(orient='records', indent=2)
+            with profile_run("reports") as json_profile, stage("json_export", len(text), "rows"):
+                json_str = text.to_json(orient='records', indent=2)
+            report_profile.records.extend(json_profile.records)
             
             st.download_button(
                 label="📋 Download as JSON",
@@ -429,3 +654,5 @@ def render_analysis():
                 use_container_width=True,
                 key="download_json_data"
             )
+
+    render_diagnostics(st.session_state.get("profile"), report_profile)
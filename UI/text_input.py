@@ -1,8 +1,144 @@
 import streamlit as st # type: ignore
-from data_extractor import extract_text_from_file
-from data_preprocessing import preprocess_text
+from io import BytesIO
+from data_extractor import extract_text_from_file, summarize_page_stats
+from data_preprocessing import preprocess_text, PARALLEL_WORKERS
+from data_extractor import CSV_CHUNK_ROWS
+from csv_pipeline import should_stream_csv, process_csv_chunks
+from jobs import get_job_manager
+from profiler import profile_run, TRACE_MEMORY
+from UI.analysis import compute_text_analysis, compute_csv_analysis
 import pandas as pd # type: ignore
 
+JOB_STAGES = ("extract", "preprocess", "analyze")
+STAGE_LABELS = {"extract": "📥 Extract", "preprocess": "🧹 Preprocess", "analyze": "🧠 Analyze"}
+
+
+# ==================== BACKGROUND JOB ====================
+
+def _copy_upload(uploaded_file):
+    """Detach the upload from the session so a worker thread can read it."""
+    if uploaded_file is None:
+        return None
+    upload = BytesIO(uploaded_file.getvalue())
+    upload.name = uploaded_file.name
+    upload.size = uploaded_file.size
+    return upload
+
+
+def _track_pages(job, pages, page_stats):
+    """Pass PDF pages through, reporting how many have been extracted."""
+    for page in pages:
+        yield page
+        job.progress(detail=f"{len(page_stats)} pages extracted")
+
+
+def run_analysis_job(job, upload, pasted_text, stream_csv, trace_memory=False):
+    """Extract, preprocess and pre-compute analytics for one upload, stage by stage."""
+    with profile_run("analysis", trace_memory=trace_memory) as profile:
+        result = _analyze_upload(job, upload, pasted_text, stream_csv)
+    result["profile"] = profile
+    return result
+
+
+def _analyze_upload(job, upload, pasted_text, stream_csv):
+    job.start_stage("extract")
+    page_stats = []
+    raw_text, file_type, df_data, error = extract_text_from_file(
+        uploaded_file=upload,
+        pasted_text=pasted_text,
+        stream=True,
+        page_stats=page_stats,
+        workers=PARALLEL_WORKERS,
+        csv_chunksize=CSV_CHUNK_ROWS if stream_csv else None
+    )
+    if error:
+        raise ValueError(error)
+    result = {"file_type": file_type, "page_stats": page_stats}
+
+    # PDF pages are extracted lazily, while they are being cleaned
+    job.start_stage("preprocess")
+    if file_type in ["txt", "pdf"]:
+        if file_type == "pdf":
+            raw_text = _track_pages(job, raw_text, page_stats)
+        processed, err = preprocess_text(raw_text, file_type)
+        if err:
+            raise ValueError(err)
+        result.update(data_type="text", processed=processed)
+
+        job.start_stage("analyze")
+        stats = compute_text_analysis(processed)["stats"]
+        # Shown on every rerun of the upload page, so counted here once
+        result.update(words=stats.words, sentences=stats.sentences)
+
+    elif file_type == "csv" and not isinstance(df_data, pd.DataFrame):
+        # Large CSV: stream chunks through cleaning, keep only aggregates in memory
+        corpus, err = process_csv_chunks(
+            df_data,
+            on_chunk=lambda c: job.progress(detail=f"{c.rows:,} rows processed ({c.chunks} chunks)")
+        )
+        if err:
+            raise ValueError(err)
+        result.update(data_type="csv_stream", processed=corpus)
+
+    else:
+        processed_df, err = preprocess_text(text=None, file_type="csv", df=df_data)
+        if err:
+            raise ValueError(err)
+        result.update(data_type="csv", processed=processed_df)
+
+        job.start_stage("analyze")
+        compute_csv_analysis(processed_df)
+
+    return result
+
+
+def restore_job_results():
+    """
+    Load the results of the job named in the URL (?job=...) into this session,
+    so a rerun, refresh or reconnect picks up finished work until the job
+    is evicted. Returns the job, or None.
+    """
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    if not job_id:
+        return None
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return None
+
+    st.session_state.job_id = job_id
+    if job.status == "done" and st.session_state.get("job_loaded") != job_id:
+        st.session_state.processed_data = job.result["processed"]
+        st.session_state.data_type = job.result["data_type"]
+        st.session_state.profile = job.result.get("profile")
+        st.session_state.job_loaded = job_id
+    return job
+
+
+def _render_stages(snapshot):
+    for name, stage in snapshot["stages"].items():
+        icon = {"pending": "⏸️", "running": "⏳", "done": "✅", "error": "❌", "skipped": "➖"}[stage["status"]]
+        timing = f" · {stage['seconds']:.2f}s" if stage["seconds"] is not None else ""
+        detail = f" · {stage['detail']}" if stage["detail"] else ""
+        st.markdown(f"{icon} **{STAGE_LABELS.get(name, name)}**{timing}{detail}")
+        if stage["status"] == "running" and stage["progress"]:
+            st.progress(stage["progress"])
+
+
+@st.fragment(run_every=1)
+def _poll_job(job_id):
+    """Refresh the job's stage list every second; rerun the page once it finishes."""
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+
+    snapshot = job.snapshot()
+    position = manager.queue_position(job_id)
+    status = f"queued (position {position})" if position else snapshot["status"]
+    st.caption(f"Job `{job_id[:8]}` · {status} · {snapshot['elapsed']}s")
+    _render_stages(snapshot)
+
+
 def render_text_input():
     """Clean, single upload and text input interface with session state"""
     
@@ -83,93 +219,126 @@ def render_text_input():
             key="analyze_button"
         )
     
+    with col2:
+        trace_memory = st.checkbox(
+            "Trace peak memory for diagnostics (slower)",
+            value=TRACE_MEMORY,
+            key="trace_memory"
+        )
+
+    manager = get_job_manager()
     if analyze_button:
-        with st.spinner("✨ Processing your content..."):
-            # Extract text
-            raw_text, file_type, df_data, error = extract_text_from_file(
-                uploaded_file=uploaded_file,
-                pasted_text=pasted_text
+        if uploaded_file is None and not (pasted_text and pasted_text.strip()):
+            st.error("❌ No file uploaded or text pasted.")
+            return
+        job = manager.submit(
+            run_analysis_job,
+            _copy_upload(uploaded_file),
+            pasted_text,
+            uploaded_file is not None and should_stream_csv(uploaded_file),
+            trace_memory=trace_memory,
+            stages=JOB_STAGES
+        )
+        st.session_state.job_id = job.id
+        st.session_state.job_loaded = None
+        st.query_params["job"] = job.id
+
+    job = restore_job_results()
+    if job is None:
+        if st.query_params.get("job"):
+            st.warning("⚠️ That analysis job has expired. Please analyze again.")
+        return
+
+    if not job.done:
+        _poll_job(job.id)
+        return
+
+    if job.status == "error":
+        _render_stages(job.snapshot())
+        st.error(f"❌ {job.error}")
+        return
+
+    result = job.result
+    file_type = result["file_type"]
+    with st.expander(f"Job `{job.id[:8]}` · finished in {job.snapshot()['elapsed']}s"):
+        _render_stages(job.snapshot())
+
+    # Show success
+    st.success(f"✅ {file_type.upper()} content loaded successfully!")
+    
+    # Process based on file type
+    if file_type in ["txt", "pdf"]:
+        processed = result["processed"]
+        page_stats = result["page_stats"]
+
+        if page_stats:
+            pdf_summary = summarize_page_stats(page_stats)
+            st.caption(
+                f"📄 {pdf_summary['pages']} pages · {pdf_summary['chars']:,} characters · "
+                f"extracted in {pdf_summary['seconds']:.2f}s (slowest: page {pdf_summary['slowest_page']})"
             )
-            
-            if error:
-                st.error(f"❌ {error}")
-                return
-            
-            # Show success
-            st.success(f"✅ {file_type.upper()} content loaded successfully!")
-            
-            # Process based on file type
-            if file_type in ["txt", "pdf"]:
-                # Preprocess
-                processed, err = preprocess_text(raw_text, file_type)
-                if err:
-                    st.error(f"❌ {err}")
-                    return
-                
-                # Store in session state
-                st.session_state.processed_data = processed
-                st.session_state.data_type = "text"
-                
-                # Show preview
-                preview_text = processed[:1500] + "..." if len(processed) > 1500 else processed
+            with st.expander("Per-page extraction details"):
+                st.dataframe(pd.DataFrame(page_stats), use_container_width=True, hide_index=True)
+        
+        # Show preview
+        preview_text = processed[:1500] + "..." if len(processed) > 1500 else processed
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95), rgba(248, 250, 252, 0.8));
+            backdrop-filter: blur(20px); padding: 2.5rem; border-radius: 24px;
+            border: 1.5px solid rgba(99, 102, 241, 0.2); box-shadow: 0 8px 32px rgba(99, 102, 241, 0.12);
+            margin-top: 2rem;'>
+                <h3 style='color: #6366f1; margin: 0 0 1.5rem 0; font-weight: 800;'>📋 Preview</h3>
+                <p style='color: #475569; line-height: 1.8; margin: 0; font-size: 0.95rem;'>
+                    {preview_text}
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+        
+        # Stats
+        col1, col2, col3 = st.columns(3, gap="large")
+        stats = [
+            ("📝", "Words", result["words"], "#6366f1"),
+            ("🔤", "Characters", len(processed), "#8b5cf6"),
+            ("📚", "Sentences", result["sentences"], "#d946ef")
+        ]
+        
+        for col, (icon, label, value, color) in zip([col1, col2, col3], stats):
+            with col:
                 st.markdown(f"""
-                    <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95), rgba(248, 250, 252, 0.8));
-                    backdrop-filter: blur(20px); padding: 2.5rem; border-radius: 24px;
-                    border: 1.5px solid rgba(99, 102, 241, 0.2); box-shadow: 0 8px 32px rgba(99, 102, 241, 0.12);
-                    margin-top: 2rem;'>
-                        <h3 style='color: #6366f1; margin: 0 0 1.5rem 0; font-weight: 800;'>📋 Preview</h3>
-                        <p style='color: #475569; line-height: 1.8; margin: 0; font-size: 0.95rem;'>
-                            {preview_text}
-                        </p>
-                    </div>
-                """, unsafe_allow_html=True)
-                
-                # Stats
-                col1, col2, col3 = st.columns(3, gap="large")
-                stats = [
-                    ("📝", "Words", len(processed.split()), "#6366f1"),
-                    ("🔤", "Characters", len(processed), "#8b5cf6"),
-                    ("📚", "Sentences", len([s for s in processed.split('.') if s.strip()]), "#d946ef")
-                ]
-                
-                for col, (icon, label, value, color) in zip([col1, col2, col3], stats):
-                    with col:
-                        st.markdown(f"""
-                            <div class='metric-card' style='border-left: 4px solid {color}; margin-top: 2rem;'>
-                                <div class='metric-label'>{icon} {label}</div>
-                                <div class='metric-value'>{value}</div>
-                            </div>
-                        """, unsafe_allow_html=True)
-            
-            elif file_type == "csv":
-                # Preprocess
-                processed_df, err = preprocess_text(text=None, file_type="csv", df=df_data)
-                if err:
-                    st.error(f"❌ {err}")
-                    return
-                
-                # Store in session state
-                st.session_state.processed_data = processed_df
-                st.session_state.data_type = "csv"
-                
-                st.markdown("""
-                    <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95), rgba(248, 250, 252, 0.8));
-                    backdrop-filter: blur(20px); padding: 2.5rem; border-radius: 24px;
-                    border: 1.5px solid rgba(99, 102, 241, 0.2); box-shadow: 0 8px 32px rgba(99, 102, 241, 0.12);
-                    margin-top: 2rem;'>
-                        <h3 style='color: #6366f1; margin: 0 0 1.5rem 0; font-weight: 800;'>📊 Preview</h3>
+                    <div class='metric-card' style='border-left: 4px solid {color}; margin-top: 2rem;'>
+                        <div class='metric-label'>{icon} {label}</div>
+                        <div class='metric-value'>{value}</div>
                     </div>
                 """, unsafe_allow_html=True)
-                
-                st.dataframe(processed_df.head(), use_container_width=True)
+    
+    elif result["data_type"] == "csv_stream":
+        corpus = result["processed"]
+        st.caption(
+            f"📊 {corpus.rows:,} rows in {corpus.chunks} chunks · "
+            f"{corpus.text.words:,} words across {len(corpus.text_columns)} text columns"
+        )
+
+    elif file_type == "csv":
+        processed_df = result["processed"]
         
-        # Success message
         st.markdown("""
-            <div style='background: linear-gradient(135deg, rgba(3, 102, 214, 0.1), rgba(12, 74, 110, 0.1));
-            backdrop-filter: blur(10px); border-left: 4px solid #0284c7; padding: 1.8rem; 
-            border-radius: 16px; margin-top: 2rem;'>
-                <p style='color: #0c4a6e; margin: 0; font-weight: 700; font-size: 1.05rem;'>
-                    ✨ Ready! Head to <strong>Analytics</strong> to explore insights & download reports.
-                </p>
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95), rgba(248, 250, 252, 0.8));
+            backdrop-filter: blur(20px); padding: 2.5rem; border-radius: 24px;
+            border: 1.5px solid rgba(99, 102, 241, 0.2); box-shadow: 0 8px 32px rgba(99, 102, 241, 0.12);
+            margin-top: 2rem;'>
+                <h3 style='color: #6366f1; margin: 0 0 1.5rem 0; font-weight: 800;'>📊 Preview</h3>
             </div>
         """, unsafe_allow_html=True)
+        
+        st.dataframe(processed_df.head(), use_container_width=True)
+
+    # Success message
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(3, 102, 214, 0.1), rgba(12, 74, 110, 0.1));
+        backdrop-filter: blur(10px); border-left: 4px solid #0284c7; padding: 1.8rem; 
+        border-radius: 16px; margin-top: 2rem;'>
+            <p style='color: #0c4a6e; margin: 0; font-weight: 700; font-size: 1.05rem;'>
+                ✨ Ready! Head to <strong>Analytics</strong> to explore insights & download reports.
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
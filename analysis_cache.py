@@ -0,0 +1,184 @@
+import os
+import json
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Configuration (overridable through the environment)
+CACHE_BACKEND = os.environ.get("NARRATIVE_NEXUS_CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.environ.get("NARRATIVE_NEXUS_CACHE_SIZE", "32"))
+CACHE_DIR = os.environ.get("NARRATIVE_NEXUS_CACHE_DIR", os.path.join(".cache", "analysis"))
+
+
+def content_key(data, **params):
+    """Hash processed data together with the analysis parameters."""
+    digest = hashlib.blake2b(digest_size=20)
+
+    if isinstance(data, str):
+        digest.update(b"text:")
+        digest.update(data.encode("utf-8", "surrogatepass"))
+    else:
+        # DataFrame: hash every row plus the column layout
+        import pandas as pd # type: ignore
+        digest.update(b"frame:")
+        digest.update(json.dumps([str(c) for c in data.columns]).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# ------------ BACKENDS ------------- #
+
+class MemoryBackend:
+    """In-process LRU store."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        if key not in self._entries:
+            raise KeyError(key)
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend:
+    """Pickle-per-entry store; file modification time tracks recency."""
+
+    def __init__(self, max_entries, directory):
+        self.max_entries = max_entries
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _entries(self):
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".pkl")
+        ]
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            raise KeyError(key)
+        os.utime(path)
+        return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        entries = self._entries()
+        evicted = 0
+        if len(entries) > self.max_entries:
+            entries.sort(key=os.path.getmtime)
+            for stale in entries[:len(entries) - self.max_entries]:
+                try:
+                    os.remove(stale)
+                    evicted += 1
+                except OSError:
+                    pass
+        return evicted
+
+    def clear(self):
+        for path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._entries())
+
+
+# ------------ CACHE ------------- #
+
+class AnalysisCache:
+    """Bounded LRU cache of analysis results with hit/miss counters."""
+
+    def __init__(self, backend="memory", max_entries=32, directory=CACHE_DIR):
+        if backend == "memory":
+            self.backend = MemoryBackend(max_entries)
+        elif backend == "disk":
+            self.backend = DiskBackend(max_entries, directory)
+        else:
+            raise ValueError(f"Unknown cache backend: {backend}")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            try:
+                value = self.backend.get(key)
+                self.hits += 1
+                return value
+            except KeyError:
+                self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self.evictions += self.backend.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "max_entries": self.backend.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache shared by every Streamlit session."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache(CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_DIR)
+    return _cache
+
+
+def cached_analysis(data, compute, **params):
+    """Return ``compute()`` for ``data``/``params``, reusing earlier results."""
+    return get_cache().get_or_compute(content_key(data, **params), compute)
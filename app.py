@@ -1,7 +1,7 @@
 import streamlit as st # type: ignore
 from UI.layout import render_header, render_menu
 from UI.about import render_about
-from UI.text_input import render_text_input
+from UI.text_input import render_text_input, restore_job_results
 from UI.analysis import render_analysis
 import os
 
@@ -19,6 +19,9 @@ render_header()
 # ==================== NAVIGATION ====================
 selected = render_menu()
 
+# Results of a background analysis job survive reruns and reconnects (?job=...)
+restore_job_results()
+
 # ==================== ROUTE HANDLER ====================
 if selected == "Home":
     # Hero Section
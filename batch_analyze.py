@@ -0,0 +1,285 @@
+"""
+Headless batch analysis: extract -> preprocess -> metrics for every TXT, PDF
+and CSV file under a directory or matching a glob, spread over a process
+pool, with one result record per file written as JSONL or Parquet.
+
+    python batch_analyze.py corpus/ --output results.jsonl --workers 8
+    python batch_analyze.py "corpus/**/*.pdf" --output results.parquet --resume
+
+With --resume, files that already have a successful record for the same
+size and modification time are skipped; failed or changed files are rerun.
+When a file has several records (JSONL after a rerun), the last one wins.
+"""
+import io
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import as_completed
+
+SUPPORTED_TYPES = ("txt", "pdf", "csv")
+
+
+class LocalFile(io.BytesIO):
+    """A file on disk behind the interface of a Streamlit upload (name, size, getvalue)."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            super().__init__(f.read())
+        self.name = os.path.basename(path)
+        self.size = len(self.getbuffer())
+
+
+def iter_input_files(source):
+    """Supported files under a directory (recursively) or matching a glob, sorted."""
+    if os.path.isdir(source):
+        paths = (os.path.join(root, name)
+                 for root, _, names in os.walk(source) for name in names)
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(
+        os.path.abspath(p) for p in paths
+        if os.path.isfile(p) and p.rsplit(".", 1)[-1].lower() in SUPPORTED_TYPES
+    )
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+# ------------ PER-FILE ANALYSIS ------------- #
+
+def text_record(text, n_tokens, n_topics):
+    """Metrics of one text; its topics come from a model fitted on this text alone and not saved."""
+    from metrics import analyze_texts, topics_from_documents
+    from tokenizer import sentences
+
+    record = analyze_texts([text], n_tokens=n_tokens)[0]
+    if n_topics:
+        record["topics"] = topics_from_documents(sentences(text), n_topics, model_name=None)
+    return record
+
+
+def csv_record(df, n_tokens, n_topics):
+    from metrics import analyze_dataframe
+
+    results = analyze_dataframe(df, n_tokens=n_tokens, n_topics=n_topics, topic_model=None)
+    stats = results["stats"]
+    record = {
+        "rows": len(df),
+        "text_columns": results["text_columns"],
+        "words": stats.words,
+        "sentences": stats.sentences,
+        "characters": stats.characters,
+        "avg_word_length": round(stats.avg_word_length, 4),
+        "readability": results["readability"],
+        "sentiment": results["sentiment_scores"],
+        "sentiment_counts": results["sentiment_counts"],
+        "tokens": results["tokens"],
+        "duplicates": results["duplicates"],
+    }
+    if n_topics:
+        record["topics"] = results["topics"]
+    return record
+
+
+def analyze_file(path, n_tokens=12, n_topics=3):
+    """
+    Run the Upload -> Analytics pipeline on one file.
+    Returns a JSON-serializable record; failures are recorded, never raised.
+    """
+    from data_extractor import extract_text_from_file
+    from data_preprocessing import preprocess_text
+
+    size, mtime_ns = _fingerprint(path)
+    record = {"path": path, "size": size, "mtime_ns": mtime_ns, "file_type": None}
+    began = time.perf_counter()
+    try:
+        text, file_type, df, error = extract_text_from_file(uploaded_file=LocalFile(path), stream=True)
+        record["file_type"] = file_type
+        if error:
+            raise ValueError(error)
+
+        # Files are the unit of parallelism, so each one is cleaned serially
+        processed, error = preprocess_text(text=text, file_type=file_type, df=df, workers=1)
+        if error:
+            raise ValueError(error)
+
+        if file_type == "csv":
+            record.update(csv_record(processed, n_tokens, n_topics))
+        else:
+            record.update(text_record(processed, n_tokens, n_topics))
+        record.update(status="ok", error=None)
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["seconds"] = round(time.perf_counter() - began, 4)
+    return record
+
+
+# ------------ RESULT SINKS ------------- #
+
+def _read_jsonl(path):
+    records = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass  # a line cut short by an interrupted run
+    return records
+
+
+class JsonlSink:
+    """Appends one line per record as it completes, so any prefix of a run is kept."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def existing(self):
+        return _read_jsonl(self.path)
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+class ParquetSink:
+    """
+    Checkpoints records to ``<output>.partial.jsonl`` while the run is going
+    and rewrites the Parquet file (previous results + new ones) at the end.
+    Nested fields (sentiment, tokens, topics, ...) are stored as JSON strings.
+    """
+
+    NESTED = ("sentiment", "sentiment_counts", "tokens", "topics", "text_columns")
+
+    def __init__(self, path):
+        self.path = path
+        self.checkpoint = f"{path}.partial.jsonl"
+
+    def existing(self):
+        records = []
+        if os.path.exists(self.path):
+            import pandas as pd # type: ignore
+
+            for record in pd.read_parquet(self.path).to_dict("records"):
+                for key in self.NESTED:
+                    if isinstance(record.get(key), str):
+                        record[key] = json.loads(record[key])
+                records.append(record)
+        return records + _read_jsonl(self.checkpoint)
+
+    def __enter__(self):
+        self._previous = self.existing()
+        self._sink = JsonlSink(self.checkpoint).__enter__()
+        return self
+
+    def write(self, record):
+        self._sink.write(record)
+
+    def __exit__(self, *exc):
+        import pandas as pd # type: ignore
+
+        self._sink.__exit__(*exc)
+        latest = {}
+        for record in self._previous + _read_jsonl(self.checkpoint):
+            latest[record["path"]] = record
+        rows = []
+        for record in latest.values():
+            row = dict(record)
+            for key in self.NESTED:
+                if key in row:
+                    row[key] = json.dumps(row[key])
+            rows.append(row)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        pd.DataFrame(rows).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        os.remove(self.checkpoint)
+
+
+def open_sink(path):
+    return ParquetSink(path) if path.lower().endswith(".parquet") else JsonlSink(path)
+
+
+# ------------ RUNNER ------------- #
+
+def completed_files(records):
+    """path -> (size, mtime_ns) for files whose latest record succeeded."""
+    latest = {}
+    for record in records:
+        latest[record["path"]] = record
+    return {path: (r["size"], r["mtime_ns"]) for path, r in latest.items() if r.get("status") == "ok"}
+
+
+def run_batch(source, output, workers=None, resume=False, n_tokens=12, n_topics=3, log=None):
+    """
+    Analyze every file matched by ``source`` into ``output`` (.jsonl or .parquet).
+    Returns: {"total", "skipped", "ok", "error", "seconds"}
+    """
+    from data_preprocessing import get_process_pool, PARALLEL_WORKERS
+
+    workers = workers or max(PARALLEL_WORKERS, os.cpu_count() or 1)
+    paths = iter_input_files(source)
+    sink = open_sink(output)
+
+    done = completed_files(sink.existing()) if resume else {}
+    pending = [p for p in paths if done.get(p) != _fingerprint(p)]
+    summary = {"total": len(paths), "skipped": len(paths) - len(pending), "ok": 0, "error": 0}
+    began = time.perf_counter()
+
+    with sink:
+        if workers <= 1:
+            results = (analyze_file(p, n_tokens, n_topics) for p in pending)
+        else:
+            pool = get_process_pool(workers)
+            futures = [pool.submit(analyze_file, p, n_tokens, n_topics) for p in pending]
+            results = (future.result() for future in as_completed(futures))
+
+        for index, record in enumerate(results, 1):
+            sink.write(record)
+            summary[record["status"]] += 1
+            if log is not None:
+                detail = record["error"] or f"{record.get('words', 0):,} words"
+                log(f"[{index}/{len(pending)}] {record['status']:<5} {record['seconds']:7.2f}s  "
+                    f"{record['path']}  ({detail})")
+
+    summary["seconds"] = round(time.perf_counter() - began, 4)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory or glob of TXT/PDF/CSV files.")
+    parser.add_argument("source", help="directory (searched recursively) or glob pattern")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="result file (.jsonl or .parquet)")
+    parser.add_argument("-w", "--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--resume", action="store_true", help="skip files that already have results")
+    parser.add_argument("--tokens", type=int, default=12, help="top tokens per file")
+    parser.add_argument("--topics", type=int, default=3, help="topics per file (0 to skip topic modeling)")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(
+        args.source, args.output, workers=args.workers, resume=args.resume,
+        n_tokens=args.tokens, n_topics=args.topics,
+        log=lambda line: print(line, file=sys.stderr),
+    )
+    print(
+        f"{summary['ok']} ok, {summary['error']} failed, {summary['skipped']} skipped "
+        f"of {summary['total']} files in {summary['seconds']:.1f}s -> {args.output}"
+    )
+    return 1 if summary["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
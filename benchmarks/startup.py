@@ -0,0 +1,132 @@
+"""
+Cold-start benchmark: import time of the app's modules and time to first
+render of app.py, each measured in a fresh interpreter.
+
+    python benchmarks/startup.py --runs 5 --json startup.json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "data_preprocessing",
+    "metrics",
+    "UI.text_input",
+    "UI.analysis",
+]
+
+HEAVY_MODULES = ["nltk", "sklearn", "matplotlib"]
+
+_IMPORT_PROBE = """
+import sys, time, json
+began = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "seconds": time.perf_counter() - began,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+_RENDER_PROBE = """
+import sys, time, json
+began = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness = time.perf_counter()
+app = AppTest.from_file("app.py", default_timeout=600).run()
+done = time.perf_counter()
+print(json.dumps({
+    "seconds": done - began,
+    "render_seconds": done - harness,
+    "exceptions": len(app.exception),
+}))
+"""
+
+_FIRST_USE_PROBE = """
+import time, json
+from data_preprocessing import clean_text
+from metrics import sentiment_analysis, extract_topics
+text = "The service was great. The food was terrible. We will come back."
+timings = {}
+for name, call in [
+    ("clean_text", lambda: clean_text(text)),
+    ("sentiment_analysis", lambda: sentiment_analysis(text)),
+    ("extract_topics", lambda: extract_topics(text)),
+]:
+    began = time.perf_counter()
+    try:
+        call()
+        timings[name] = time.perf_counter() - began
+    except LookupError:
+        timings[name] = None  # NLTK resource missing and not downloadable
+print(json.dumps(timings))
+"""
+
+
+def _probe(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _median(samples, key):
+    values = [s[key] for s in samples if s[key] is not None]
+    return round(statistics.median(values), 4) if values else None
+
+
+def run(runs=3):
+    results = {"runs": runs, "imports": {}, "first_render": {}, "first_use": {}}
+
+    for module in MODULES:
+        samples = [_probe(_IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)) for _ in range(runs)]
+        results["imports"][module] = {
+            "seconds": _median(samples, "seconds"),
+            "heavy_loaded": samples[-1]["loaded"],
+        }
+
+    samples = [_probe(_RENDER_PROBE) for _ in range(runs)]
+    results["first_render"] = {
+        "seconds": _median(samples, "seconds"),
+        "render_seconds": _median(samples, "render_seconds"),
+        "exceptions": max(s["exceptions"] for s in samples),
+    }
+
+    samples = [_probe(_FIRST_USE_PROBE) for _ in range(runs)]
+    results["first_use"] = {name: _median(samples, name) for name in samples[0]}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per measurement")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs)
+
+    print(f"Startup benchmark (median of {args.runs} fresh interpreters)")
+    for module, info in results["imports"].items():
+        heavy = ", ".join(info["heavy_loaded"]) or "none"
+        print(f"  import {module:<22} {info['seconds']:7.3f}s   heavy deps loaded: {heavy}")
+    render = results["first_render"]
+    print(f"  first render of app.py        {render['seconds']:7.3f}s   "
+          f"(app run {render['render_seconds']:.3f}s, {render['exceptions']} exceptions)")
+    for name, seconds in results["first_use"].items():
+        timing = f"{seconds:7.3f}s" if seconds is not None else "   n/a (missing NLTK data)"
+        print(f"  first {name:<23} {timing}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
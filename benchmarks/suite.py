@@ -0,0 +1,533 @@
+"""
+Throughput / peak-memory benchmark of the public functions in
+data_preprocessing.py, data_extractor.py and metrics.py over corpora from
+1 KB to 1 GB, with a baseline file and a comparison mode for regressions.
+
+    python benchmarks/suite.py run --sizes 1KB,1MB,10MB --output baseline.json
+    python benchmarks/suite.py run --sizes 1KB,1MB,10MB --baseline baseline.json --threshold 0.2
+    python benchmarks/suite.py compare current.json baseline.json --threshold 0.2
+    python benchmarks/suite.py run --sizes 1GB --only clean_text,text_stats --no-limits
+
+Corpora are "synthetic" (seeded Zipf-distributed vocabulary, so the number
+of distinct tokens keeps growing with size), a bundled file name from
+benchmarks/corpora/ (its sentences shuffled and repeated up to the size) or
+a path to any .txt file. Each corpus is generated once per size as a TXT and
+a CSV (id, rating, review) under .cache/benchmarks/ and reused.
+
+Every (function, size) case runs in a fresh interpreter: inputs are loaded
+and the function is warmed up on a small sample (NLTK data, models) before
+the measured call. Peak RSS is the process high-water mark during the call
+(reset through /proc/self/clear_refs where Linux allows it, otherwise the
+lifetime maximum); worker processes of the parallel functions are not
+included. PDF extraction is not covered, as there is no PDF corpus.
+"""
+import os
+import re
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPORA_DIR = os.path.join(ROOT, "benchmarks", "corpora")
+CACHE_DIR = os.path.join(ROOT, ".cache", "benchmarks")
+
+FORMAT = "narrative-nexus-bench/1"
+DEFAULT_SIZES = "1KB,100KB,1MB,10MB"
+MB = 1024 * 1024
+_UNITS = {"B": 1, "KB": 1024, "MB": MB, "GB": 1024 * MB}
+
+
+def parse_size(label):
+    """'10MB' -> 10485760"""
+    label = label.strip().upper()
+    for unit in ("GB", "MB", "KB", "B"):
+        if label.endswith(unit):
+            return int(float(label[:-len(unit)]) * _UNITS[unit])
+    return int(label)
+
+
+# ------------ CORPORA ------------- #
+
+_SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "vo", "su", "del", "an", "ber", "gu", "shi",
+              "pra", "ne", "tor", "qui", "ze", "mon", "la", "cre", "dis", "ul", "fa", "wen"]
+
+
+def _bundled_sentences(name):
+    path = name if os.path.isfile(name) else os.path.join(CORPORA_DIR, f"{name}.txt")
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _synthetic_blocks(seed=7):
+    """Endless ~1 MB blocks of Zipf-distributed words with sentence breaks."""
+    import numpy as np # type: ignore
+
+    rng = np.random.default_rng(seed)
+    words = sorted({w.strip(".,!?").lower() for s in _bundled_sentences("reviews") for w in s.split()})
+    words += ["".join(rng.choice(_SYLLABLES, size=rng.integers(2, 5))) for _ in range(50000)]
+    vocabulary = np.array(words, dtype=object)
+    ends = np.array([w + "." for w in words], dtype=object)
+
+    while True:
+        ids = np.minimum(rng.zipf(1.3, size=170000), len(words)) - 1
+        is_end = rng.random(len(ids)) < 1 / 14
+        block = np.where(is_end, ends[ids], vocabulary[ids])
+        yield " ".join(block.tolist()) + " "
+
+
+def _bundled_blocks(name, seed=7):
+    rng = random.Random(seed)
+    sentences = _bundled_sentences(name)
+    while True:
+        rng.shuffle(sentences)
+        yield " ".join(sentences) + " "
+
+
+def build_corpus(name, size):
+    """Write (once) and return the TXT and CSV paths of ``name`` at ``size`` bytes."""
+    key = os.path.splitext(os.path.basename(name))[0]
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    txt_path = os.path.join(CACHE_DIR, f"{key}_{size}.txt")
+    csv_path = os.path.join(CACHE_DIR, f"{key}_{size}.csv")
+    blocks = _synthetic_blocks if name == "synthetic" else (lambda: _bundled_blocks(name))
+
+    if not os.path.exists(txt_path):
+        tmp_path = f"{txt_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            written = 0
+            for block in blocks():
+                block = block[:size - written]
+                if written + len(block) >= size:
+                    block = block[:block.rfind(" ") + 1] or block
+                    f.write(block)
+                    break
+                f.write(block)
+                written += len(block)
+        os.replace(tmp_path, txt_path)
+
+    if not os.path.exists(csv_path):
+        rng = random.Random(size)
+        tmp_path = f"{csv_path}.{os.getpid()}.tmp"
+        with open(txt_path, "r", encoding="utf-8") as src, \
+                open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "rating", "review"])
+            row_id, written = 0, 0
+            for line in _iter_rows(src, rng):
+                row_id += 1
+                writer.writerow([row_id, rng.randint(1, 5), line])
+                written += len(line) + 12
+                if written >= size:
+                    break
+        os.replace(tmp_path, csv_path)
+    return txt_path, csv_path
+
+
+def _iter_rows(src, rng):
+    """One to three sentences per CSV row, read from the TXT corpus in blocks."""
+    carry = ""
+    while True:
+        block = src.read(MB)
+        if not block:
+            if carry.strip():
+                yield carry.strip()
+            return
+        parts = (carry + block).split(". ")
+        carry = parts.pop()
+        while parts:
+            take = min(rng.randint(1, 3), len(parts))
+            yield ". ".join(parts[:take]) + "."
+            del parts[:take]
+
+
+# ------------ CASES ------------- #
+
+class Inputs:
+    """Corpus views for one case, loaded on first access and not timed."""
+
+    def __init__(self, txt_path, csv_path):
+        self.txt_path = txt_path
+        self.csv_path = csv_path
+
+    def __getattr__(self, kind):
+        if kind.startswith("_") or kind not in _INPUTS:
+            raise AttributeError(kind)
+        value = _INPUTS[kind](self)
+        setattr(self, kind, value)
+        return value
+
+    def nbytes(self, kind):
+        return os.path.getsize(self.csv_path if kind in _CSV_INPUTS else self.txt_path)
+
+
+def _read_text(i):
+    with open(i.txt_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _local_file(path):
+    sys.path.insert(0, ROOT)
+    from batch_analyze import LocalFile
+
+    return LocalFile(path)
+
+
+def _frame(i):
+    import pandas as pd # type: ignore
+
+    return pd.read_csv(i.csv_path, keep_default_na=False, dtype={"review": str})
+
+
+_INPUTS = {
+    "text": _read_text,
+    "pages": lambda i: [i.text[p:p + 3000] for p in range(0, len(i.text), 3000)],
+    "sentences": lambda i: [s.strip() for s in i.text.split(".") if s.strip()],
+    "txt_upload": lambda i: _local_file(i.txt_path),
+    "csv_upload": lambda i: _local_file(i.csv_path),
+    "csv_handle": lambda i: open(i.csv_path, "rb"),
+    "frame": _frame,
+    "series": lambda i: i.frame["review"],
+    "documents": lambda i: i.frame["review"].tolist(),
+    "counts": lambda i: (i.series.str.count(r"\S+").to_numpy(), i.series.str.count(r"[^\s.][^.]*").to_numpy(),
+                         (i.series.str.len() - i.series.str.count(r"\s")).to_numpy()),
+}
+_CSV_INPUTS = {"csv_upload", "csv_handle", "frame", "series", "documents", "counts"}
+
+
+def _consume(result):
+    """
+    Drain lazy results (chunk readers, generators) so their work is timed,
+    and surface the error of ``(value, ..., error)`` tuples.
+    """
+    if isinstance(result, tuple) and len(result) > 1 and isinstance(result[-1], str):
+        raise RuntimeError(result[-1])
+    if isinstance(result, tuple) and result and hasattr(result[0], "__next__"):
+        result = result[0]
+    if hasattr(result, "__next__"):
+        for _ in result:
+            pass
+    return result
+
+
+def _summary_args(i):
+    from metrics import sentiment_analysis, top_tokens
+
+    return i.text, sentiment_analysis(i.text), top_tokens(i.text)
+
+
+def _case(function, input_kind, args=None, kwargs=None, limit=None):
+    return {
+        "function": function,
+        "input": input_kind,
+        "args": args or (lambda i: (getattr(i, input_kind),)),
+        "kwargs": kwargs or {},
+        "limit": limit,
+    }
+
+
+# name -> case; ``limit`` is the largest corpus run by default (slow, superlinear or quadratic-memory paths)
+CASES = {
+    "data_preprocessing.clean_text": _case("data_preprocessing.clean_text", "text"),
+    "data_preprocessing.clean_pages": _case("data_preprocessing.clean_pages", "pages"),
+    "data_preprocessing.clean_text_series": _case("data_preprocessing.clean_text_series", "series"),
+    "data_preprocessing.split_text_chunks": _case("data_preprocessing.split_text_chunks", "text"),
+    "data_preprocessing.parallel_clean_text": _case("data_preprocessing.parallel_clean_text", "text"),
+    "data_preprocessing.parallel_clean_frame": _case(
+        "data_preprocessing.parallel_clean_frame", "frame", args=lambda i: (i.frame, ["review"])),
+    "data_preprocessing.preprocess_text[txt]": _case(
+        "data_preprocessing.preprocess_text", "text", args=lambda i: (i.text, "txt")),
+    "data_preprocessing.preprocess_text[csv]": _case(
+        "data_preprocessing.preprocess_text", "frame", args=lambda i: (None, "csv", i.frame)),
+    "data_extractor.extract_text_from_file[txt]": _case("data_extractor.extract_text_from_file", "txt_upload"),
+    "data_extractor.extract_text_from_file[csv]": _case("data_extractor.extract_text_from_file", "csv_upload"),
+    "data_extractor.detect_text_columns": _case("data_extractor.detect_text_columns", "csv_handle"),
+    "data_extractor.iter_csv_chunks": _case("data_extractor.iter_csv_chunks", "csv_handle"),
+    "dedup.find_duplicates": _case("dedup.find_duplicates", "documents"),
+    "metrics.text_stats": _case("metrics.text_stats", "text"),
+    "metrics.word_count": _case("metrics.word_count", "text"),
+    "metrics.sentence_count": _case("metrics.sentence_count", "text"),
+    "metrics.sentiment_analysis": _case("metrics.sentiment_analysis", "text", limit=100 * MB),
+    "metrics.sentence_sentiments": _case("metrics.sentence_sentiments", "text", limit=100 * MB),
+    "metrics.top_tokens": _case("metrics.top_tokens", "text"),
+    "metrics.simple_summary": _case("metrics.simple_summary", "text"),
+    "metrics.extractive_summary": _case("metrics.extractive_summary", "text"),
+    "metrics.comprehensive_summary": _case("metrics.comprehensive_summary", "text", args=_summary_args,
+                                           limit=100 * MB),
+    "metrics.readability_score": _case("metrics.readability_score", "text"),
+    "metrics.extract_topics": _case("metrics.extract_topics", "text", limit=10 * MB),
+    "metrics.topics_from_documents": _case("metrics.topics_from_documents", "sentences", limit=10 * MB),
+    "metrics.combine_text_columns": _case(
+        "metrics.combine_text_columns", "frame", args=lambda i: (i.frame, ["review"])),
+    "metrics.sentiment_batch": _case("metrics.sentiment_batch", "series", limit=100 * MB),
+    "metrics.readability_scores": _case("metrics.readability_scores", "counts", args=lambda i: i.counts),
+    "metrics.analyze_texts": _case("metrics.analyze_texts", "documents", limit=100 * MB),
+    "metrics.analyze_dataframe": _case("metrics.analyze_dataframe", "frame", limit=10 * MB),
+}
+
+# Scalar-input functions (sentiment_distribution, sentiment_to_emoji, the chart,
+# load_processed_text) do not scale with the corpus and are left out.
+
+
+# ------------ MEASUREMENT (runs in a fresh interpreter) ------------- #
+
+def _rss_now():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _resolve(function):
+    import importlib
+
+    module, name = function.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
+
+
+def measure_case(name, txt_path, csv_path, warmup_txt, warmup_csv):
+    """Warm up on the small corpus, then time one call on the real one."""
+    case = CASES[name]
+    fn = _resolve(case["function"])
+
+    warm = Inputs(warmup_txt, warmup_csv)
+    _consume(fn(*case["args"](warm), **case["kwargs"]))
+
+    inputs = Inputs(txt_path, csv_path)
+    args = case["args"](inputs)
+    rss_before = _rss_now()
+    exact_peak = _reset_peak_rss()
+
+    began_wall, began_cpu = time.perf_counter(), time.process_time()
+    _consume(fn(*args, **case["kwargs"]))
+    seconds = time.perf_counter() - began_wall
+    cpu_seconds = time.process_time() - began_cpu
+
+    peak = _peak_rss()
+    return {
+        "seconds": seconds,
+        "cpu_seconds": cpu_seconds,
+        "peak_rss_mb": round(peak / MB, 2),
+        "rss_growth_mb": round(max(peak - rss_before, 0) / MB, 2) if rss_before is not None else None,
+        "exact_peak": exact_peak,
+    }
+
+
+def _run_case(name, txt_path, csv_path, warmup, timeout):
+    path = os.pathsep.join(p for p in (os.environ.get("PYTHONPATH"), ROOT) if p)
+    env = {**os.environ, "PYTHONPATH": path,
+           # Cold, throwaway topic models and no lemma cache file: every run starts equal
+           "NARRATIVE_NEXUS_MODEL_DIR": tempfile.mkdtemp(prefix="nn-bench-models-")}
+    env.pop("NARRATIVE_NEXUS_LEMMA_CACHE", None)
+    command = [sys.executable, os.path.abspath(__file__), "_measure", name, txt_path, csv_path, *warmup]
+    try:
+        result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"status": "timeout", "error": f"exceeded {timeout}s"}
+    if result.returncode != 0:
+        # The exception line of the traceback (NLTK pads its messages with rules of '*')
+        lines = [line for line in result.stderr.splitlines() if line.strip(" *")]
+        errors = [line for line in lines if re.match(r"[\w.]+(Error|Exception)\b", line)]
+        detail = (errors or lines or [f"exit code {result.returncode}"])[-1]
+        return {"status": "error", "error": detail.strip()}
+    return {"status": "ok", **json.loads(result.stdout.strip().splitlines()[-1])}
+
+
+# ------------ SUITE ------------- #
+
+def _size_label(size):
+    for unit in ("GB", "MB", "KB"):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def select_cases(only=None):
+    if not only:
+        return list(CASES)
+    wanted = [w.strip() for w in only.split(",") if w.strip()]
+    return [name for name in CASES
+            if any(w == name or w == name.split(".", 1)[1] or w == name.split(".", 1)[1].split("[")[0]
+                   or name.startswith(w + ".") for w in wanted)]
+
+
+def run_suite(sizes, corpus="synthetic", runs=3, only=None, limits=True, timeout=900, log=None):
+    """
+    Run every selected case at every size. Returns the results document
+    (see ``FORMAT``): per "function@size" key the median wall and CPU seconds,
+    throughput in MB/s, the largest peak RSS and RSS growth, and a status.
+    """
+    warmup = build_corpus(corpus, 2 * 1024)
+    document = {
+        "format": FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": corpus,
+        "runs": runs,
+        "results": {},
+    }
+
+    for size in sizes:
+        txt_path, csv_path = build_corpus(corpus, size)
+        for name in select_cases(only):
+            case = CASES[name]
+            key = f"{name}@{_size_label(size)}"
+            nbytes = Inputs(txt_path, csv_path).nbytes(case["input"])
+            entry = {"function": name, "size": _size_label(size), "bytes": nbytes}
+
+            if limits and case["limit"] and size > case["limit"]:
+                entry.update(status="skipped", error=f"above the {_size_label(case['limit'])} default limit")
+            else:
+                samples = [_run_case(name, txt_path, csv_path, warmup, timeout) for _ in range(runs)]
+                failed = next((s for s in samples if s["status"] != "ok"), None)
+                if failed:
+                    entry.update(status=failed["status"], error=failed["error"])
+                else:
+                    seconds = statistics.median(s["seconds"] for s in samples)
+                    entry.update(
+                        status="ok",
+                        seconds=round(seconds, 6),
+                        cpu_seconds=round(statistics.median(s["cpu_seconds"] for s in samples), 6),
+                        mb_per_s=round(nbytes / MB / seconds, 3) if seconds > 0 else None,
+                        peak_rss_mb=max(s["peak_rss_mb"] for s in samples),
+                        rss_growth_mb=max((s["rss_growth_mb"] or 0) for s in samples),
+                        exact_peak=all(s["exact_peak"] for s in samples),
+                    )
+            document["results"][key] = entry
+            if log is not None:
+                log(_format_entry(key, entry))
+    return document
+
+
+def _format_entry(key, entry):
+    if entry["status"] != "ok":
+        return f"  {key:<56} {entry['status']:>8}  {entry['error']}"
+    return (f"  {key:<56} {entry['seconds']:9.4f}s {entry['mb_per_s'] or 0:9.2f} MB/s  "
+            f"peak {entry['peak_rss_mb']:8.1f} MB  (+{entry['rss_growth_mb']:.1f} MB)")
+
+
+def compare(current, baseline, threshold=0.2, min_seconds=0.005, min_growth_mb=1.0):
+    """
+    Cases that got slower than ``1 + threshold`` times the baseline (ignoring
+    baseline timings under ``min_seconds``, which are mostly noise), or whose
+    RSS growth rose by that factor and at least ``min_growth_mb``.
+    Returns a list of {"case", "metric", "baseline", "current", "ratio"}.
+    """
+    regressions = []
+    for key, now in current["results"].items():
+        before = baseline["results"].get(key)
+        if not before or before.get("status") != "ok" or now.get("status") != "ok":
+            continue
+        if before["seconds"] >= min_seconds and now["seconds"] > before["seconds"] * (1 + threshold):
+            regressions.append({"case": key, "metric": "seconds", "baseline": before["seconds"],
+                                "current": now["seconds"], "ratio": round(now["seconds"] / before["seconds"], 3)})
+        grown = now["rss_growth_mb"] - before["rss_growth_mb"]
+        if grown >= min_growth_mb and now["rss_growth_mb"] > before["rss_growth_mb"] * (1 + threshold):
+            regressions.append({"case": key, "metric": "rss_growth_mb", "baseline": before["rss_growth_mb"],
+                                "current": now["rss_growth_mb"],
+                                "ratio": round(now["rss_growth_mb"] / max(before["rss_growth_mb"], 0.01), 3)})
+    return regressions
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    if document.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a {FORMAT} results file")
+    return document
+
+
+def _report_regressions(current, baseline, threshold, min_seconds):
+    regressions = compare(current, baseline, threshold, min_seconds)
+    shared = len(set(current["results"]) & set(baseline["results"]))
+    if not regressions:
+        print(f"No regressions above {threshold:.0%} across {shared} shared cases.")
+        return 0
+    print(f"{len(regressions)} regression(s) above {threshold:.0%} across {shared} shared cases:")
+    for r in regressions:
+        print(f"  {r['case']:<56} {r['metric']:<14} {r['baseline']:>10} -> {r['current']:<10} x{r['ratio']}")
+    return 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["_measure"]:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(measure_case(*argv[1:])))
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite (and optionally compare with a baseline)")
+    run.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma-separated corpus sizes (default {DEFAULT_SIZES})")
+    run.add_argument("--corpus", default="synthetic",
+                     help="'synthetic', a file name in benchmarks/corpora/ or a path to a .txt file")
+    run.add_argument("--runs", type=int, default=3, help="fresh interpreters per case (median is kept)")
+    run.add_argument("--only", help="comma-separated functions, e.g. clean_text,metrics.extract_topics")
+    run.add_argument("--no-limits", action="store_true", help="also run slow functions on the largest corpora")
+    run.add_argument("--timeout", type=float, default=900, help="seconds per case run")
+    run.add_argument("--output", help="write the results (baseline format) to this file")
+    run.add_argument("--baseline", help="compare with this results file; exit 1 on regressions")
+    run.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    run.add_argument("--min-seconds", type=float, default=0.005, help="ignore baseline timings below this")
+
+    cmp = commands.add_parser("compare", help="compare two results files")
+    cmp.add_argument("current")
+    cmp.add_argument("baseline")
+    cmp.add_argument("--threshold", type=float, default=0.2)
+    cmp.add_argument("--min-seconds", type=float, default=0.005)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        return _report_regressions(load_results(args.current), load_results(args.baseline),
+                                   args.threshold, args.min_seconds)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    print(f"Benchmark suite: corpus {args.corpus}, sizes {args.sizes}, median of {args.runs} run(s)")
+    results = run_suite(sizes, args.corpus, args.runs, args.only, not args.no_limits, args.timeout, log=print)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+    if args.baseline:
+        return _report_regressions(results, load_results(args.baseline), args.threshold, args.min_seconds)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Dashboard charts. Figures are drawn with matplotlib's object-oriented API
+(never registered with pyplot), rendered once to PNG and cleared, and the
+bytes are cached by a hash of the plotted data, so reruns and long-running
+servers reuse them instead of piling up figures. Per-row inputs are reduced
+here first (histograms, binned series), so a chart of a million rows plots
+at most a few hundred points.
+"""
+import io
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np # type: ignore
+
+# Chart configuration (overridable through the environment)
+CHART_CACHE_SIZE = int(os.environ.get("NARRATIVE_NEXUS_CHART_CACHE_SIZE", "64"))
+MAX_POINTS = int(os.environ.get("NARRATIVE_NEXUS_CHART_MAX_POINTS", "500"))
+HISTOGRAM_BINS = 40
+DPI = 110
+
+SENTIMENT_COLORS = {"Positive": "#10b981", "Neutral": "#f59e0b", "Negative": "#ef4444"}
+LINE_COLOR = "#6366f1"
+
+
+class ChartCache:
+    """Bounded LRU of rendered PNG bytes keyed by chart and data hash."""
+
+    def __init__(self, max_size=CHART_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._charts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            png = self._charts.get(key)
+            if png is not None:
+                self.hits += 1
+                self._charts.move_to_end(key)
+                return png
+
+        png = render()
+        with self._lock:
+            self.misses += 1
+            self._charts[key] = png
+            if len(self._charts) > self.max_size:
+                self._charts.popitem(last=False)
+        return png
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._charts),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._charts.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_chart_cache():
+    """Process-wide chart cache shared by every Streamlit session."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ChartCache()
+    return _cache
+
+
+def chart_key(name, *parts):
+    """Hash of a chart name and the (already reduced) data it plots."""
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render_png(draw, size=(6, 3)):
+    """Draw on a fresh, pyplot-free figure and return it as PNG bytes; the figure is always cleared."""
+    from matplotlib.figure import Figure # type: ignore
+    from matplotlib.backends.backend_agg import FigureCanvasAgg # type: ignore
+
+    fig = Figure(figsize=size, dpi=DPI)
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        draw(ax)
+        for side in ("top", "right"):
+            ax.spines[side].set_visible(False)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def cached_chart(name, data, draw, size=(6, 3)):
+    return get_chart_cache().get_or_render(chart_key(name, *data, size), lambda: render_png(draw, size))
+
+
+# ------------ SERVER-SIDE REDUCTION ------------- #
+
+def histogram(values, bins=HISTOGRAM_BINS, value_range=None):
+    """(counts, edges) of the finite ``values``."""
+    values = np.asarray(values, dtype=float)
+    return np.histogram(values[np.isfinite(values)], bins=bins, range=value_range)
+
+
+def binned_series(values, max_points=MAX_POINTS):
+    """
+    ``values`` in row order reduced to at most ``max_points`` bins of
+    consecutive rows: (bin centers, mean, min, max) per bin.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n, dtype=float), values, values, values
+    edges = np.linspace(0, n, max_points + 1).astype(np.int64)
+    starts = edges[:-1]
+    mean = np.add.reduceat(values, starts) / np.diff(edges)
+    low = np.minimum.reduceat(values, starts)
+    high = np.maximum.reduceat(values, starts)
+    return (starts + edges[1:] - 1) / 2, mean, low, high
+
+
+# ------------ CHARTS ------------- #
+
+def sentiment_chart(distribution):
+    """Horizontal bars of the Positive/Neutral/Negative shares (0..1), as PNG bytes."""
+    labels = list(SENTIMENT_COLORS)[::-1]
+    values = [round(float(distribution.get(label, 0)) * 100, 1) for label in labels]
+
+    def draw(ax):
+        bars = ax.barh(labels, values, color=[SENTIMENT_COLORS[label] for label in labels], height=0.55)
+        ax.bar_label(bars, fmt="%.1f%%", padding=4, fontsize=9)
+        ax.set_xlim(0, max(100, *values))
+        ax.set_xlabel("Share (%)")
+
+    return cached_chart("sentiment", [labels, values], draw, size=(5, 2.4))
+
+
+def label_counts_chart(counts, title="Rows per sentiment"):
+    """Bars of per-label row counts (e.g. ``sentiment_counts``), as PNG bytes."""
+    labels = [label for label in SENTIMENT_COLORS if label in counts]
+    values = [int(counts[label]) for label in labels]
+
+    def draw(ax):
+        bars = ax.bar(labels, values, color=[SENTIMENT_COLORS[label] for label in labels], width=0.6)
+        ax.bar_label(bars, labels=[f"{v:,}" for v in values], padding=3, fontsize=9)
+        ax.set_title(title, fontsize=11)
+        ax.set_ylabel("Rows")
+
+    return cached_chart("label_counts", [labels, values, title], draw, size=(5, 3))
+
+
+def compound_histogram(compound, bins=HISTOGRAM_BINS):
+    """Histogram of per-row compound scores over [-1, 1], binned before plotting."""
+    counts, edges = histogram(compound, bins, (-1.0, 1.0))
+    centers = (edges[:-1] + edges[1:]) / 2
+    colors = [SENTIMENT_COLORS["Positive"] if c > 0.2 else SENTIMENT_COLORS["Negative"] if c < -0.2
+              else SENTIMENT_COLORS["Neutral"] for c in centers]
+
+    def draw(ax):
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color=colors, edgecolor="white", linewidth=0.4)
+        ax.set_title("Compound score distribution", fontsize=11)
+        ax.set_xlabel("Compound score")
+        ax.set_ylabel("Rows")
+
+    return cached_chart("compound_histogram", [counts, edges], draw)
+
+
+def compound_trend(compound, max_points=MAX_POINTS):
+    """Compound score across rows: per-bin mean with its min-max band, at most ``max_points`` bins."""
+    x, mean, low, high = binned_series(compound, max_points)
+
+    def draw(ax):
+        if len(x) and (low != high).any():
+            ax.fill_between(x, low, high, color=LINE_COLOR, alpha=0.15, linewidth=0)
+        ax.plot(x, mean, color=LINE_COLOR, linewidth=1.2)
+        ax.axhline(0, color="#94a3b8", linewidth=0.8, linestyle="--")
+        ax.set_ylim(-1.05, 1.05)
+        ax.set_title("Compound score across rows", fontsize=11)
+        ax.set_xlabel("Row")
+        ax.set_ylabel("Compound")
+
+    return cached_chart("compound_trend", [x, mean, low, high], draw)
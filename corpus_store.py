@@ -0,0 +1,326 @@
+"""
+Processed-corpus store. Cleaned documents are persisted with their token ids
+and per-document metrics as an uncompressed Arrow IPC file, one record batch
+per written chunk, next to the vocabulary the ids refer to:
+
+    <store>/CURRENT                       name of the live version
+    <store>/<version>/documents.arrow     data columns + _token_ids, _word_count, ...
+    <store>/<version>/vocabulary.arrow    one "term" per token id
+
+Every upload gets its own store under CORPUS_STORE_PATH (``new_store_path``),
+so sessions never see each other's data; stores unused for CORPUS_STORE_TTL
+are pruned. A version directory is written whole and then published by
+replacing CURRENT, so readers always see a matching pair of files.
+
+Reads memory-map the file, so selecting columns or a range of rows touches
+only those buffers and nothing is parsed or copied until it is converted
+(e.g. ``frame``). Corpus statistics come from the stored metrics and ids
+without reading the text at all.
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+import pyarrow as pa # type: ignore
+from vocabulary import Vocabulary, TokenCounts
+
+# Directory holding the per-upload stores, and how long an unused store is kept (overridable through the environment)
+CORPUS_STORE_PATH = os.environ.get("NARRATIVE_NEXUS_CORPUS_STORE", os.path.join("Final_data", "corpus"))
+CORPUS_STORE_TTL = float(os.environ.get("NARRATIVE_NEXUS_CORPUS_STORE_TTL", "3600"))
+FORMAT = "narrative-nexus-corpus/1"
+
+CURRENT_FILE = "CURRENT"
+DOCUMENTS_FILE = "documents.arrow"
+VOCABULARY_FILE = "vocabulary.arrow"
+# Derived per-document columns, stored after the data columns
+TOKEN_IDS = "_token_ids"
+METRIC_COLUMNS = ["_word_count", "_sentence_count", "_letters", "_characters"]
+
+
+def _row_metrics(texts, vocabulary):
+    """(token id offsets, token ids, [words, sentences, letters, characters]) of a list of cleaned documents."""
+    from metrics import row_counts
+
+    ids, indptr = vocabulary.encode_documents(map(str.split, texts))
+    words, sentences, letters = row_counts(pd.Series(texts, dtype=object))
+    characters = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    return indptr, ids, [words, sentences, letters, characters]
+
+
+def new_store_path(root=CORPUS_STORE_PATH):
+    """A fresh store directory under ``root`` for one upload."""
+    return os.path.join(root, uuid.uuid4().hex)
+
+
+def touch_store(path):
+    """Mark the store at ``path`` as in use, so ``prune_stores`` keeps it."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_stores(root=CORPUS_STORE_PATH, ttl=CORPUS_STORE_TTL):
+    """
+    Remove the stores under ``root`` not written or touched for ``ttl``
+    seconds. Readers touch their store when opened and sessions on every
+    rerun, so only stores no live session uses are old enough.
+    """
+    cutoff = time.time() - ttl
+    try:
+        entries = [e for e in os.scandir(root) if e.is_dir()]
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            stale = entry.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if stale:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _current_version(path):
+    try:
+        with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class CorpusWriter:
+    """
+    Write a store chunk by chunk (``write_frame`` / ``write_text``), then
+    ``close``. The files go to a new version directory that only becomes the
+    store's current one on close, so readers never see a half-written or
+    mismatched pair. ``path`` defaults to a new store (``new_store_path``).
+    """
+
+    def __init__(self, path=None, kind="csv", text_columns=None):
+        self.path = new_store_path() if path is None else path
+        self.kind = kind
+        self.text_columns = list(text_columns or [])
+        self.rows = 0
+        self.vocabulary = Vocabulary()
+        self._writer = None
+        self._schema = None
+        self._columns = None
+        self.version = uuid.uuid4().hex
+        self._dir = os.path.join(self.path, self.version)
+        os.makedirs(self._dir)
+
+    def _open(self, data_schema):
+        self._columns = list(data_schema.names)
+        fields = list(data_schema) + [pa.field(TOKEN_IDS, pa.large_list(pa.int32()))]
+        fields += [pa.field(name, pa.int64()) for name in METRIC_COLUMNS]
+        self._schema = pa.schema(fields, metadata={
+            b"narrative_nexus.format": FORMAT.encode(),
+            b"narrative_nexus.corpus": json.dumps({
+                "kind": self.kind,
+                "columns": self._columns,
+                "text_columns": self.text_columns,
+            }).encode("utf-8"),
+        })
+        self._writer = pa.ipc.new_file(os.path.join(self._dir, DOCUMENTS_FILE), self._schema)
+
+    def write_frame(self, df):
+        """Append a cleaned DataFrame chunk; its text columns are joined per row for tokens and metrics."""
+        if not self.text_columns:
+            self.text_columns = df.select_dtypes(include=["object", "string"]).columns.tolist()
+        data = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._open(data.schema.remove_metadata())
+        texts = df[self.text_columns[0]].astype(str)
+        if len(self.text_columns) > 1:
+            texts = texts.str.cat([df[c].astype(str) for c in self.text_columns[1:]], sep=" ")
+        return self._write(data.cast(pa.schema([self._schema.field(c) for c in self._columns])), texts.tolist())
+
+    def write_text(self, text, chunk_chars=1 << 20):
+        """Store one cleaned text as consecutive segments cut on whitespace (their concatenation is ``text``)."""
+        from data_preprocessing import split_text_chunks
+
+        self.kind = "txt"
+        self.text_columns = ["text"]
+        for segment in split_text_chunks(text, chunk_chars):
+            if self._writer is None:
+                self._open(pa.schema([pa.field("text", pa.large_string())]))
+            self._write(pa.table({"text": pa.array([segment], pa.large_string())}), [segment])
+        return self
+
+    def _write(self, data, texts):
+        indptr, ids, metrics = _row_metrics(texts, self.vocabulary)
+        columns = list(data.columns)
+        columns.append(pa.LargeListArray.from_arrays(pa.array(indptr, pa.int64()), pa.array(ids, pa.int32())))
+        columns += [pa.array(values, pa.int64()) for values in metrics]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(
+            [c.combine_chunks() if isinstance(c, pa.ChunkedArray) else c for c in columns], schema=self._schema
+        ))
+        self.rows += len(texts)
+        return self
+
+    def close(self):
+        """Finish the files and publish their version in place of the previous one."""
+        if self._writer is None:
+            self._open(pa.schema([pa.field(c, pa.large_string()) for c in self.text_columns]))
+        self._writer.close()
+        with pa.ipc.new_file(os.path.join(self._dir, VOCABULARY_FILE),
+                             pa.schema([pa.field("term", pa.large_string())])) as writer:
+            writer.write_table(pa.table({"term": pa.array(self.vocabulary.terms, pa.large_string())}))
+
+        previous = _current_version(self.path)
+        pointer = os.path.join(self.path, f"{CURRENT_FILE}.{self.version}.tmp")
+        with open(pointer, "w", encoding="utf-8") as f:
+            f.write(self.version)
+        os.replace(pointer, os.path.join(self.path, CURRENT_FILE))
+        if previous and previous != self.version:
+            # Open readers keep their memory maps of the old files
+            shutil.rmtree(os.path.join(self.path, previous), ignore_errors=True)
+        return self
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+def store_exists(path):
+    version = _current_version(path) if path else None
+    return version is not None and all(
+        os.path.exists(os.path.join(path, version, name)) for name in (DOCUMENTS_FILE, VOCABULARY_FILE)
+    )
+
+
+def remove_store(path):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+class CorpusStore:
+    """A store written by ``CorpusWriter``, memory-mapped read-only."""
+
+    def __init__(self, path):
+        self.path = path
+        self.version = _current_version(path)
+        if self.version is None:
+            raise FileNotFoundError(f"No corpus store at {path}")
+        self._dir = os.path.join(path, self.version)
+        touch_store(path)
+        # Both files are mapped now, so a later version replacing them cannot split the pair
+        self._source = pa.memory_map(os.path.join(self._dir, DOCUMENTS_FILE), "r")
+        self._vocabulary_source = pa.memory_map(os.path.join(self._dir, VOCABULARY_FILE), "r")
+        self._reader = pa.ipc.open_file(self._source)
+        metadata = self._reader.schema.metadata or {}
+        if metadata.get(b"narrative_nexus.format") != FORMAT.encode():
+            raise ValueError(f"Not a corpus store: {path}")
+        info = json.loads(metadata[b"narrative_nexus.corpus"].decode("utf-8"))
+        self.kind = info["kind"]
+        self.columns = info["columns"]
+        self.text_columns = info["text_columns"]
+        sizes = [self._reader.get_batch(i).num_rows for i in range(self._reader.num_record_batches)]
+        self._offsets = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64)))
+        self._vocabulary = None
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    @property
+    def num_rows(self):
+        return len(self)
+
+    def iter_batches(self, columns=None, start=0, stop=None):
+        """Record batches of rows ``start:stop`` holding only ``columns`` (default: all), zero-copy."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        first = int(np.searchsorted(self._offsets, start, side="right")) - 1
+        for i in range(max(first, 0), self._reader.num_record_batches):
+            offset = int(self._offsets[i])
+            if offset >= stop:
+                break
+            batch = self._reader.get_batch(i)
+            if columns is not None:
+                batch = batch.select(columns)
+            lo, hi = max(start - offset, 0), min(stop - offset, batch.num_rows)
+            if hi > lo:
+                yield batch.slice(lo, hi - lo)
+
+    def _schema(self, columns):
+        schema = self._reader.schema
+        return pa.schema([schema.field(c) for c in (schema.names if columns is None else columns)])
+
+    def table(self, columns=None, start=0, stop=None):
+        return pa.Table.from_batches(list(self.iter_batches(columns, start, stop)), schema=self._schema(columns))
+
+    def frame(self, columns=None, start=0, stop=None):
+        """Rows ``start:stop`` of ``columns`` (default: the data columns) as a DataFrame."""
+        return self.table(self.columns if columns is None else columns, start, stop).to_pandas()
+
+    def text(self):
+        """The stored text of a "txt" store, rebuilt from its segments."""
+        return "".join(
+            segment for batch in self.iter_batches(["text"]) for segment in batch.column(0).to_pylist()
+        )
+
+    def vocabulary(self):
+        if self._vocabulary is None:
+            terms = pa.ipc.open_file(self._vocabulary_source).read_all().column("term").to_pylist()
+            self._vocabulary = Vocabulary()
+            self._vocabulary.terms = terms
+            self._vocabulary.index = dict(zip(terms, range(len(terms))))
+        return self._vocabulary
+
+    def token_ids(self, start=0, stop=None):
+        """(ids, indptr) of the tokens of rows ``start:stop``, as in ``Vocabulary.encode_documents``."""
+        parts, lengths = [], []
+        for batch in self.iter_batches([TOKEN_IDS], start, stop):
+            lists = batch.column(0)
+            offsets = lists.offsets.to_numpy()
+            parts.append(lists.values.to_numpy()[offsets[0]:offsets[-1]])
+            lengths.append(np.diff(offsets))
+        lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        return (np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)), indptr
+
+    def token_counts(self, start=0, stop=None):
+        """``TokenCounts`` of rows ``start:stop`` from the stored ids; no text is read."""
+        counts = TokenCounts(self.vocabulary())
+        for batch in self.iter_batches([TOKEN_IDS], start, stop):
+            lists = batch.column(0)
+            offsets = lists.offsets.to_numpy()
+            counts.add_ids(lists.values.to_numpy()[offsets[0]:offsets[-1]])
+        return counts
+
+    def metrics(self, start=0, stop=None):
+        """Per-row word, sentence, letter and character counts of rows ``start:stop``."""
+        return self.frame(METRIC_COLUMNS, start, stop).rename(columns=lambda c: c.lstrip("_"))
+
+    def text_stats(self, start=0, stop=None):
+        """
+        ``TextStats`` of rows ``start:stop`` summed from the stored per-row
+        metrics and token ids. Sentences are counted per row, so one running
+        across a row boundary counts in both rows.
+        """
+        from metrics import TextStats
+
+        stats = TextStats()
+        totals = self.table(METRIC_COLUMNS, start, stop)
+        stats.words, stats.sentences, stats.letters, stats.characters = (
+            int(totals.column(name).to_numpy().sum()) for name in METRIC_COLUMNS
+        )
+        stats.tokens = self.token_counts(start, stop)
+        return stats
+
+    def write_csv(self, sink, columns=None):
+        """The data columns (default: all of them) as CSV, written a record batch at a time."""
+        import pyarrow.csv as pcsv # type: ignore
+
+        columns = self.columns if columns is None else columns
+        with pcsv.CSVWriter(sink, self._schema(columns)) as writer:
+            for batch in self.iter_batches(columns):
+                writer.write_batch(batch)
+        return sink
+
+    def close(self):
+        self._source.close()
+        self._vocabulary_source.close()
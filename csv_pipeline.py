@@ -0,0 +1,66 @@
+import os
+from data_extractor import CSV_CHUNK_ROWS, iter_csv_chunks
+from data_preprocessing import parallel_clean_frame, PARALLEL_WORKERS, PARALLEL_CHUNK_ROWS
+from metrics import CorpusStats
+from corpus_store import CorpusWriter, new_store_path, prune_stores
+from profiler import profiled
+
+# Uploads above this size go through the chunked pipeline instead of one DataFrame
+CSV_STREAM_THRESHOLD_MB = float(os.environ.get("NARRATIVE_NEXUS_CSV_STREAM_MB", "100"))
+
+
+def should_stream_csv(uploaded_file):
+    size = getattr(uploaded_file, "size", None)
+    return size is not None and size > CSV_STREAM_THRESHOLD_MB * 1024 * 1024
+
+
+@profiled()
+def process_csv_chunks(chunks, store_path=None, workers=PARALLEL_WORKERS,
+                       on_chunk=None):
+    """
+    Clean CSV chunks one at a time, append them to a corpus store and merge
+    their metrics into a ``CorpusStats``; peak memory is bounded by chunk size.
+    The store is written to ``store_path`` (default: a new one for this
+    upload, ``new_store_path``) and its path kept as ``corpus_stats.store_path``.
+    ``on_chunk(corpus_stats)`` is called after every chunk for progress display.
+    Returns: (corpus_stats, error_message)
+    """
+    corpus = None
+    writer = None
+    try:
+        for chunk in chunks:
+            if corpus is None:
+                corpus = CorpusStats(chunk.select_dtypes(include=["object", "string"]).columns.tolist())
+                if store_path is None:
+                    prune_stores()
+                    store_path = new_store_path()
+                writer = CorpusWriter(store_path, "csv", corpus.text_columns)
+
+            parallel_clean_frame(chunk, corpus.text_columns, workers, PARALLEL_CHUNK_ROWS)
+            corpus.update(chunk)
+
+            writer.write_frame(chunk)
+            if on_chunk is not None:
+                on_chunk(corpus)
+
+        if corpus is None:
+            return None, "CSV file has no rows."
+        writer.close()
+        corpus.store_path = writer.path
+        writer = None
+        return corpus.finish(), None
+
+    except Exception as e:
+        return None, f"Preprocessing error: {str(e)}"
+    finally:
+        if writer is not None:
+            writer.abort()
+
+
+def stream_csv_file(uploaded_file, chunksize=CSV_CHUNK_ROWS, text_columns=None, **kwargs):
+    """Read, clean and aggregate a CSV without loading it whole."""
+    try:
+        chunks, _ = iter_csv_chunks(uploaded_file, chunksize=chunksize, text_columns=text_columns)
+    except Exception as e:
+        return None, f"Error reading file: {str(e)}"
+    return process_csv_chunks(chunks, **kwargs)
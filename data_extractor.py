@@ -1,9 +1,145 @@
+import os
+import time
+import tempfile
 import pandas as pd # type: ignore
 from PyPDF2 import PdfReader # type: ignore
 from io import StringIO
+from profiler import profiled
 
+# Pages handed to each worker when PDFs are extracted in parallel
+PDF_PAGES_PER_TASK = int(os.environ.get("NARRATIVE_NEXUS_PDF_PAGES_PER_TASK", "25"))
 
-def extract_text_from_file(uploaded_file=None, pasted_text=None):
+# Rows per chunk for streamed CSV ingestion, and rows sampled to detect text columns
+CSV_CHUNK_ROWS = int(os.environ.get("NARRATIVE_NEXUS_CSV_CHUNK_ROWS", "100000"))
+CSV_SAMPLE_ROWS = 1000
+
+
+# ------------ PDF EXTRACTION ------------- #
+
+def _page_stat(number, text, seconds):
+    return {"page": number, "chars": len(text), "seconds": round(seconds, 6)}
+
+
+def _extract_page_range(path, start, stop):
+    """Worker task: extract pages [start, stop) from the PDF at ``path``."""
+    reader = PdfReader(path)
+    pages = []
+    for number in range(start, stop):
+        began = time.perf_counter()
+        text = reader.pages[number].extract_text() or ""
+        pages.append((text, time.perf_counter() - began))
+    return pages
+
+
+def _iter_pages_serial(reader, start, stop, page_stats):
+    for number in range(start, stop):
+        began = time.perf_counter()
+        text = reader.pages[number].extract_text() or ""
+        if page_stats is not None:
+            page_stats.append(_page_stat(number + 1, text, time.perf_counter() - began))
+        yield text
+
+
+def _iter_pages_parallel(data, start, stop, page_stats, workers, pages_per_task):
+    from data_preprocessing import get_process_pool
+
+    # Workers reopen the document from disk rather than receiving its bytes per task
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        bounds = [(s, min(s + pages_per_task, stop)) for s in range(start, stop, pages_per_task)]
+        pool = get_process_pool(workers)
+        results = pool.map(
+            _extract_page_range,
+            [tmp.name] * len(bounds),
+            [s for s, _ in bounds],
+            [e for _, e in bounds],
+        )
+        for (first, _), pages in zip(bounds, results):
+            for offset, (text, seconds) in enumerate(pages):
+                if page_stats is not None:
+                    page_stats.append(_page_stat(first + offset + 1, text, seconds))
+                yield text
+    finally:
+        os.remove(tmp.name)
+
+
+def iter_pdf_pages(source, page_range=None, page_stats=None, workers=1,
+                   pages_per_task=PDF_PAGES_PER_TASK):
+    """
+    Lazily yield the text of each PDF page in order.
+    ``page_range`` is a (start, stop) pair of zero-based page indices.
+    With ``workers`` > 1, page ranges are extracted in the shared process pool.
+    Per-page character counts and timings are appended to ``page_stats``.
+    """
+    # The document is opened eagerly so unreadable files fail here, not mid-iteration
+    reader = PdfReader(source)
+    start, stop = page_range or (0, len(reader.pages))
+    stop = min(stop, len(reader.pages))
+
+    if workers <= 1 or stop - start <= pages_per_task:
+        return _iter_pages_serial(reader, start, stop, page_stats)
+
+    if hasattr(source, "getvalue"):
+        data = source.getvalue()
+    else:
+        source.seek(0)
+        data = source.read()
+    return _iter_pages_parallel(data, start, stop, page_stats, workers, pages_per_task)
+
+
+def summarize_page_stats(page_stats):
+    """Totals over the per-page records collected by ``iter_pdf_pages``."""
+    if not page_stats:
+        return {"pages": 0, "chars": 0, "seconds": 0.0, "slowest_page": None}
+    slowest = max(page_stats, key=lambda p: p["seconds"])
+    return {
+        "pages": len(page_stats),
+        "chars": sum(p["chars"] for p in page_stats),
+        "seconds": round(sum(p["seconds"] for p in page_stats), 6),
+        "slowest_page": slowest["page"],
+    }
+
+
+# ------------ CSV EXTRACTION ------------- #
+
+def detect_text_columns(source, sample_rows=CSV_SAMPLE_ROWS):
+    """Infer the text columns of a CSV from its first rows, then rewind."""
+    sample = pd.read_csv(source, nrows=sample_rows)
+    source.seek(0)
+    return sample.select_dtypes(include=["object", "string"]).columns.tolist()
+
+
+def iter_csv_chunks(source, chunksize=CSV_CHUNK_ROWS, text_columns=None, usecols=None):
+    """
+    Read a CSV in chunks of ``chunksize`` rows, parsing only ``usecols``
+    (default: the text columns) with text columns typed as plain strings.
+    Empty cells come through as "" so every chunk can be cleaned as-is.
+    Returns: (chunk_iterator, text_columns)
+    """
+    if text_columns is None:
+        text_columns = detect_text_columns(source)
+    if usecols is None:
+        usecols = text_columns
+
+    reader = pd.read_csv(
+        source,
+        chunksize=chunksize,
+        usecols=usecols,
+        dtype={col: str for col in text_columns},
+        keep_default_na=False,
+    )
+    return reader, text_columns
+
+
+@profiled()
+def extract_text_from_file(uploaded_file=None, pasted_text=None, stream=False,
+                           page_stats=None, workers=1, csv_chunksize=None):
+    """
+    Returns: (text, file_type, dataframe, error_message)
+    With ``stream=True`` the PDF text is returned as a lazy iterator of pages.
+    With ``csv_chunksize`` the CSV is returned as an iterator of row chunks.
+    """
 
     if pasted_text and pasted_text.strip():
         return pasted_text, "txt", None, None
@@ -21,13 +157,15 @@ def extract_text_from_file(uploaded_file=None, pasted_text=None):
             return text, "txt", None, None
 
         elif file_type == "pdf":
-            reader = PdfReader(uploaded_file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() or ""
-            return text, "pdf", None, None
+            pages = iter_pdf_pages(uploaded_file, page_stats=page_stats, workers=workers)
+            if stream:
+                return pages, "pdf", None, None
+            return "".join(pages), "pdf", None, None
 
         elif file_type == "csv":
+            if csv_chunksize:
+                chunks, _ = iter_csv_chunks(uploaded_file, chunksize=csv_chunksize)
+                return None, "csv", chunks, None
             df = pd.read_csv(uploaded_file)
             return None, "csv", df, None
 
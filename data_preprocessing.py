@@ -1,41 +1,298 @@
-import re
-import nltk # type: ignore
-from nltk.corpus import stopwords # type: ignore
-from nltk.stem import WordNetLemmatizer # type: ignore
+import os
+import json
+import atexit
+import threading
+import multiprocessing
+import pandas as pd # type: ignore
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from nlp_resources import get_stop_words, get_lemmatizer
+from tokenizer import token_strings, ROW_BREAK
+from profiler import profiled
 
-# Download required NLTK data
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
+# Lemma cache configuration (overridable through the environment)
+LEMMA_CACHE_SIZE = int(os.environ.get("NARRATIVE_NEXUS_LEMMA_CACHE_SIZE", "200000"))
+LEMMA_CACHE_PATH = os.environ.get("NARRATIVE_NEXUS_LEMMA_CACHE")
 
-try:
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('wordnet', quiet=True)
 
-stop_words = set(stopwords.words("english"))
-lemmatizer = WordNetLemmatizer()
+class LemmaCache:
+    """Bounded LRU memo of token -> lemma with hit-rate statistics."""
+
+    def __init__(self, max_size=LEMMA_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lemmas = OrderedDict()
+        # Background analysis jobs clean texts from several threads
+        self._lock = threading.Lock()
+
+    def lemmatize(self, token):
+        with self._lock:
+            lemma = self._lemmas.get(token)
+            if lemma is not None:
+                self.hits += 1
+                self._lemmas.move_to_end(token)
+                return lemma
+
+        lemma = get_lemmatizer().lemmatize(token)
+        with self._lock:
+            self.misses += 1
+            self._lemmas[token] = lemma
+            if len(self._lemmas) > self.max_size:
+                self._lemmas.popitem(last=False)
+        return lemma
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._lemmas),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._lemmas.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def save(self, path):
+        """Write the cached vocabulary as JSON, most recently used last."""
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            entries = list(self._lemmas.items())
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Warm the cache from a file written by ``save``; returns entries loaded."""
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        for token, lemma in entries[-self.max_size:]:
+            self._lemmas[token] = lemma
+        while len(self._lemmas) > self.max_size:
+            self._lemmas.popitem(last=False)
+        return len(entries)
+
+
+lemma_cache = LemmaCache()
+
+if LEMMA_CACHE_PATH:
+    if os.path.exists(LEMMA_CACHE_PATH):
+        try:
+            lemma_cache.load(LEMMA_CACHE_PATH)
+        except (OSError, ValueError):
+            pass
+    atexit.register(lambda: save_lemma_cache(LEMMA_CACHE_PATH))
+
+
+def save_lemma_cache(path=None):
+    """Persist the shared lemma cache so a warm vocabulary survives restarts."""
+    path = path or LEMMA_CACHE_PATH
+    if path:
+        lemma_cache.save(path)
+    return path
 
 
 def clean_text(text):
-    text = text.lower()
-    text = re.sub(r"[^a-zA-Z0-9.\s]", " ", text)  
-    tokens = text.split()
+    tokens = token_strings(text.lower())
+    stop_words = get_stop_words()
     tokens = [t for t in tokens if t not in stop_words]
-    tokens = [lemmatizer.lemmatize(t) for t in tokens]
+    lemmatize = lemma_cache.lemmatize
+    tokens = [lemmatize(t) for t in tokens]
     return " ".join(tokens)
 
 
-def preprocess_text(text=None, file_type=None, df=None, csv_text_columns=None):
+def clean_pages(pages):
+    """
+    Streaming ``clean_text`` over an iterable of page texts, so cleaning can
+    start on the first page. Pages are joined without a separator, exactly
+    like ``"".join(pages)``; a word split across pages is carried over.
+    """
+    cleaned = []
+    carry = ""
+    for page in pages:
+        buffer = carry + page
+        cut = len(buffer)
+        while cut > 0 and not buffer[cut - 1].isspace():
+            cut -= 1
+        carry = buffer[cut:]
+        part = clean_text(buffer[:cut])
+        if part:
+            cleaned.append(part)
+    if carry:
+        part = clean_text(carry)
+        if part:
+            cleaned.append(part)
+    return " ".join(cleaned)
+
+
+def clean_text_series(series):
+    """
+    Batch equivalent of ``series.astype(str).apply(clean_text)``.
+    The column is lowercased and tokenized as one buffer, then stopwords and
+    lemmas are resolved once per unique token and mapped back to the rows.
+    """
+    values = series.astype(str)
+
+    # Rows are joined on ROW_BREAK, which clean_text drops; fall back to the
+    # per-cell path if the data already has one (or holds missing values,
+    # which clean_text rejects as it always has).
+    if values.empty or values.isna().any():
+        return values.apply(clean_text)
+    buffer = ROW_BREAK.join(values.tolist())
+    if buffer.count(ROW_BREAK) != max(len(values) - 1, 0):
+        return values.apply(clean_text)
+
+    tokens = token_strings(buffer.lower(), keep_breaks=True)
+
+    stop_words = get_stop_words()
+    lemmatize = lemma_cache.lemmatize
+    table = {t: None if t in stop_words else lemmatize(t) for t in set(tokens)}
+    table[ROW_BREAK] = ROW_BREAK
+
+    kept = [lemma for lemma in map(table.__getitem__, tokens) if lemma is not None]
+    rows = [row.strip() for row in " ".join(kept).split(ROW_BREAK)]
+    return pd.Series(rows, index=series.index, name=series.name)
+
+
+# ------------ PARALLEL PREPROCESSING ------------- #
+
+# Pool configuration (overridable through the environment); 1 worker = serial
+PARALLEL_WORKERS = int(os.environ.get("NARRATIVE_NEXUS_WORKERS", "1"))
+PARALLEL_CHUNK_CHARS = int(os.environ.get("NARRATIVE_NEXUS_CHUNK_CHARS", str(1 << 20)))
+PARALLEL_CHUNK_ROWS = int(os.environ.get("NARRATIVE_NEXUS_CHUNK_ROWS", "50000"))
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Load stopwords and WordNet once per worker process."""
+    get_stop_words()
+    get_lemmatizer().lemmatize("warmup")
+
+
+def get_process_pool(workers, broken=None):
+    """
+    Shared process pool, recreated when the worker count changes or when
+    ``broken`` (a pool that raised ``BrokenProcessPool``) is still the
+    shared one.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers or (broken is not None and _pool is broken):
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn: forking a multithreaded server process is not safe
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_process_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+        _pool_workers = None
+
+
+def split_text_chunks(text, chunk_size=PARALLEL_CHUNK_CHARS):
+    """
+    Split text into pieces of roughly ``chunk_size`` characters, cutting after
+    a paragraph break, else after a sentence end, else after any whitespace.
+    Cuts always fall on whitespace so no token is split between chunks.
+    """
+    chunks = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = start + chunk_size
+        if end >= length:
+            chunks.append(text[start:])
+            break
+
+        floor = start + chunk_size // 2
+        cut = text.rfind("\n\n", floor, end)
+        if cut != -1:
+            cut += 2
+        else:
+            cut = text.rfind(". ", floor, end)
+            cut = cut + 2 if cut != -1 else -1
+        if cut == -1:
+            # Any whitespace will do; scan forward if the window has none
+            cut = end
+            while cut > floor and not text[cut - 1].isspace():
+                cut -= 1
+            if cut == floor:
+                cut = end
+                while cut < length and not text[cut - 1].isspace():
+                    cut += 1
+
+        chunks.append(text[start:cut])
+        start = cut
+    return chunks
+
+
+def _clean_frame_chunk(frame):
+    return {col: clean_text_series(frame[col]).tolist() for col in frame.columns}
+
+
+def parallel_clean_text(text, workers=PARALLEL_WORKERS, chunk_size=PARALLEL_CHUNK_CHARS):
+    """Multiprocess ``clean_text``; output is identical to the serial call."""
+    chunks = split_text_chunks(text, chunk_size)
+    if workers <= 1 or len(chunks) <= 1:
+        return clean_text(text)
+
+    pool = get_process_pool(workers)
+    return " ".join(part for part in pool.map(clean_text, chunks) if part)
+
+
+def parallel_clean_frame(df, columns, workers=PARALLEL_WORKERS, chunk_rows=PARALLEL_CHUNK_ROWS):
+    """Clean ``columns`` of ``df`` in place, one process-pool task per row chunk."""
+    if workers <= 1 or len(df) <= chunk_rows:
+        for col in columns:
+            df[col] = clean_text_series(df[col])
+        return df
+
+    pool = get_process_pool(workers)
+    frames = (df[columns].iloc[i:i + chunk_rows] for i in range(0, len(df), chunk_rows))
+    cleaned = {col: [] for col in columns}
+    for part in pool.map(_clean_frame_chunk, frames):
+        for col in columns:
+            cleaned[col].extend(part[col])
+    for col in columns:
+        df[col] = pd.Series(cleaned[col], index=df.index, name=col)
+    return df
+
+
+@profiled()
+def preprocess_text(text=None, file_type=None, df=None, csv_text_columns=None,
+                    workers=None, chunk_size=None):
     """
     Preprocess text or CSV data without saving to disk.
+    With ``workers`` > 1, large inputs are cleaned in a process pool in chunks
+    of ``chunk_size`` characters (TXT/PDF) or rows (CSV).
     Returns: (processed_data, error_message)
     """
+    workers = PARALLEL_WORKERS if workers is None else workers
     try:
         # -------- TXT or PDF -------- #
         if file_type in ["txt", "pdf"]:
-            cleaned = clean_text(text)
+            if not isinstance(text, str):
+                # Lazily extracted PDF pages
+                return clean_pages(text), None
+            cleaned = parallel_clean_text(text, workers, chunk_size or PARALLEL_CHUNK_CHARS)
             return cleaned, None
 
         # -------- CSV -------- #
@@ -43,8 +300,7 @@ def preprocess_text(text=None, file_type=None, df=None, csv_text_columns=None):
             if csv_text_columns is None:
                 csv_text_columns = df.select_dtypes(include=["object"]).columns.tolist()
 
-            for col in csv_text_columns:
-                df[col] = df[col].astype(str).apply(clean_text)
+            parallel_clean_frame(df, csv_text_columns, workers, chunk_size or PARALLEL_CHUNK_ROWS)
 
             return df, None
 
@@ -0,0 +1,211 @@
+"""
+Near-duplicate detection. Every distinct document gets a MinHash signature
+over its token shingles; an LSH index (signature bands hashed into buckets)
+proposes candidates, and documents are then visited in order: each joins
+the cluster of a candidate's leader whose signature agrees with its own on
+at least ``threshold`` of the hashes, or leads a new cluster. Every member
+is therefore similar to its leader itself, never only through a chain of
+other members. Only documents sharing a bucket are ever compared, so the
+cost grows with the number of documents, not with its square.
+
+Exact duplicates are folded first and never hashed twice.
+"""
+import os
+import time
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from vocabulary import Vocabulary
+
+# Configuration (overridable through the environment)
+DEDUP_ENABLED = os.environ.get("NARRATIVE_NEXUS_DEDUP", "1") == "1"
+DEDUP_THRESHOLD = float(os.environ.get("NARRATIVE_NEXUS_DEDUP_THRESHOLD", "0.8"))
+NUM_PERM = int(os.environ.get("NARRATIVE_NEXUS_MINHASH_PERM", "64"))
+SHINGLE_SIZE = 3
+# Documents signed at a time
+SIGNATURE_BATCH = 8192
+
+_EMPTY = np.uint32(0xFFFFFFFF)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def lsh_bands(threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM):
+    """
+    (bands, rows per band) splitting ``num_perm`` hashes so that pairs at
+    ``threshold`` similarity are likely to share a bucket, i.e. the LSH
+    curve's midpoint ``(1 / bands) ** (1 / rows)`` sits just below it.
+    """
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    return max(below, key=lambda o: (1 / o[0]) ** (1 / o[1])) if below else options[0]
+
+
+def _mix(values):
+    """Scramble ``uint64`` values (splitmix64 finalizer)."""
+    values = values ^ (values >> np.uint64(30))
+    values *= np.uint64(0xBF58476D1CE4E5B9)
+    values ^= values >> np.uint64(27)
+    values *= np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def shingles(ids, indptr, size=SHINGLE_SIZE):
+    """
+    Hashes of the runs of ``size`` consecutive tokens of every document
+    (``ids``/``indptr`` as from ``Vocabulary.encode_documents``), as
+    (hashes, per-document offsets). A document shorter than ``size`` is a
+    single shingle of all its tokens.
+    """
+    lengths = np.diff(indptr)
+    ends = np.repeat(indptr[1:], lengths)
+    position = np.arange(len(ids))
+    starts_doc = np.zeros(len(ids), dtype=bool)
+    starts_doc[indptr[:-1][lengths > 0]] = True
+    keep = (position + size <= ends) | (starts_doc & (np.repeat(lengths, lengths) < size))
+
+    padded = np.concatenate((ids.astype(np.uint64) + np.uint64(1), np.zeros(size, dtype=np.uint64)))
+    hashes = np.zeros(int(keep.sum()), dtype=np.uint64)
+    kept = position[keep]
+    for j in range(size):
+        # Tokens past the end of their document count as 0
+        part = np.where(kept + j < ends[keep], padded[kept + j], np.uint64(0))
+        hashes = _mix(hashes * _MIX + part)
+    counts = np.bincount(np.repeat(np.arange(len(lengths)), lengths)[keep], minlength=len(lengths))
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return hashes, offsets
+
+
+def minhash(hashes, offsets, num_perm=NUM_PERM, seed=1):
+    """``uint32`` MinHash signatures (documents x ``num_perm``); a document without shingles is all ``0xFFFFFFFF``."""
+    n = len(offsets) - 1
+    signatures = np.full((n, num_perm), _EMPTY, dtype=np.uint32)
+    filled = np.diff(offsets) > 0
+    if not filled.any():
+        return signatures
+    starts = offsets[:-1][filled]
+    rng = np.random.default_rng(seed)
+    salts = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    multipliers = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    for i in range(num_perm):
+        # Multiply-shift hashing: the top 32 bits of a salted odd product
+        permuted = ((hashes ^ salts[i]) * multipliers[i]) >> np.uint64(32)
+        signatures[filled, i] = np.minimum.reduceat(permuted, starts)
+    return signatures
+
+
+def signatures(documents, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, batch_size=SIGNATURE_BATCH):
+    """
+    MinHash signatures of a list of documents (whitespace-separated tokens),
+    computed ``batch_size`` documents at a time to bound the temporaries.
+    """
+    vocabulary = Vocabulary()
+    result = np.empty((len(documents), num_perm), dtype=np.uint32)
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start:start + batch_size]
+        ids, indptr = vocabulary.encode_documents(map(str.split, batch), batch_size)
+        result[start:start + len(batch)] = minhash(*shingles(ids, indptr, shingle_size), num_perm=num_perm)
+    return result
+
+
+def _candidate_pairs(signatures, bands, rows):
+    """(i, j) with i > j for every document and the first document of each band bucket it shares."""
+    n = len(signatures)
+    left, right = [], []
+    for band in range(bands):
+        block = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        key = np.zeros(n, dtype=np.uint64)
+        for column in block.T:
+            key = _mix(key * _MIX + column)
+        codes, _ = pd.factorize(key)
+        # Codes are numbered in order of first appearance
+        running = np.maximum.accumulate(codes)
+        is_first = np.ones(n, dtype=bool)
+        is_first[1:] = codes[1:] > running[:-1]
+        first = np.flatnonzero(is_first)[codes]
+        shared = ~is_first
+        left.append(np.flatnonzero(shared))
+        right.append(first[shared])
+    if not left:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    pairs = np.unique(np.concatenate(left).astype(np.int64) * n + np.concatenate(right))
+    return pairs // n, pairs % n
+
+
+def _leaders(signatures, left, right, threshold):
+    """
+    Leader of every document, from candidate pairs (``left`` > ``right``,
+    sorted by ``left``). Documents are visited in order; each joins the most
+    similar (then earliest) leader of its candidates whose estimated Jaccard
+    similarity reaches ``threshold``, and otherwise leads its own cluster.
+    """
+    leader = np.arange(len(signatures))
+    documents, first = np.unique(left, return_index=True)
+    bounds = np.append(first, len(left))
+    for k, i in enumerate(documents.tolist()):
+        # Candidates precede i, so their leaders are final
+        options = leader[right[bounds[k]:bounds[k + 1]]]
+        if len(options) > 1:
+            options = np.unique(options)
+        similarity = (signatures[options] == signatures[i]).mean(axis=1)
+        best = int(np.argmax(similarity))
+        if similarity[best] >= threshold:
+            leader[i] = options[best]
+    return leader
+
+
+class DuplicateClusters:
+    """
+    Near-duplicate clusters of a sequence of documents. ``representatives``
+    holds the position of each cluster's first document (ascending),
+    ``cluster`` the cluster of every document and ``weights`` the number of
+    documents per cluster.
+    """
+
+    def __init__(self, cluster, representatives, threshold, num_perm, seconds):
+        self.cluster = cluster
+        self.representatives = representatives
+        self.weights = np.bincount(cluster, minlength=len(representatives))
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.seconds = seconds
+
+    def __len__(self):
+        return len(self.representatives)
+
+    def summary(self):
+        return {
+            "rows": int(len(self.cluster)),
+            "clusters": int(len(self.representatives)),
+            "duplicates": int(len(self.cluster) - len(self.representatives)),
+            "largest_cluster": int(self.weights.max()) if len(self.weights) else 0,
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "seconds": round(self.seconds, 4),
+        }
+
+
+def find_duplicates(texts, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE):
+    """
+    Cluster ``texts`` (a sequence of cleaned documents): every document
+    belongs to the cluster of a representative whose token-shingle set has
+    an estimated Jaccard similarity of at least ``threshold`` with its own.
+    Tokens are the whitespace-separated words. Returns ``DuplicateClusters``.
+    """
+    began = time.perf_counter()
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object).fillna("").astype(str), sort=False)
+    signed = signatures(list(uniques), num_perm, shingle_size)
+
+    left, right = _candidate_pairs(signed, *lsh_bands(threshold, num_perm))
+    leader = _leaders(signed, left, right, threshold)
+
+    # Distinct texts are numbered in order of first appearance and a leader
+    # precedes its members, so leaders are each cluster's earliest document
+    leaders = np.flatnonzero(leader == np.arange(len(uniques)))
+    rank = np.empty(len(uniques), dtype=np.int64)
+    rank[leaders] = np.arange(len(leaders))
+    cluster = rank[leader][codes]
+
+    first_row = np.full(len(uniques), len(codes), dtype=np.int64)
+    np.minimum.at(first_row, codes, np.arange(len(codes)))
+    representatives = first_row[leaders]
+    return DuplicateClusters(cluster, representatives, threshold, num_perm, time.perf_counter() - began)
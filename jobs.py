@@ -0,0 +1,157 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Job runner configuration (overridable through the environment)
+JOB_WORKERS = int(os.environ.get("NARRATIVE_NEXUS_JOB_WORKERS", "2"))
+JOB_HISTORY = int(os.environ.get("NARRATIVE_NEXUS_JOB_HISTORY", "16"))
+JOB_TTL_SECONDS = float(os.environ.get("NARRATIVE_NEXUS_JOB_TTL", "600"))
+
+
+class Job:
+    """
+    One background job: an ID, a status (queued, running, done, error),
+    per-stage progress and, once finished, a result or an error message.
+    """
+
+    def __init__(self, stages):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.stages = OrderedDict(
+            (name, {"status": "pending", "progress": None, "detail": "", "seconds": None})
+            for name in stages
+        )
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._stage = None
+        self._stage_began = None
+        self._lock = threading.Lock()
+
+    def start_stage(self, name, detail=""):
+        """Finish the current stage and mark ``name`` as running."""
+        with self._lock:
+            self._close_stage()
+            self._stage = name
+            self._stage_began = time.perf_counter()
+            self.stages[name].update(status="running", progress=0.0, detail=detail)
+
+    def progress(self, fraction=None, detail=None):
+        """Report progress of the running stage; ``fraction`` is 0..1 or None when unknown."""
+        with self._lock:
+            stage = self.stages.get(self._stage)
+            if stage is not None:
+                if fraction is not None:
+                    stage["progress"] = min(max(fraction, 0.0), 1.0)
+                if detail is not None:
+                    stage["detail"] = detail
+
+    def _close_stage(self, status="done"):
+        if self._stage is not None:
+            stage = self.stages[self._stage]
+            stage["seconds"] = round(time.perf_counter() - self._stage_began, 3)
+            stage["status"] = status
+            if status == "done":
+                stage["progress"] = 1.0
+            self._stage = None
+
+    def _finish(self, result=None, error=None):
+        with self._lock:
+            self._close_stage("error" if error else "done")
+            for stage in self.stages.values():
+                if stage["status"] == "pending":
+                    stage["status"] = "skipped"
+            self.result = result
+            self.error = error
+            self.status = "error" if error else "done"
+            self.finished = time.time()
+
+    @property
+    def done(self):
+        return self.status in ("done", "error")
+
+    def snapshot(self):
+        """A consistent copy of the job state for display."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "error": self.error,
+                "elapsed": round((self.finished or time.time()) - self.created, 1),
+            }
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool shared by every session, so a burst
+    of users queues jobs instead of exhausting server threads. Finished jobs
+    are kept (up to ``history``, for ``ttl`` seconds) so results survive
+    reruns and reconnects.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, history=JOB_HISTORY, ttl=JOB_TTL_SECONDS):
+        self.workers = workers
+        self.history = history
+        self.ttl = ttl
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nn-job")
+
+    def submit(self, fn, *args, stages=(), **kwargs):
+        """Queue ``fn(job, *args, **kwargs)``; its return value becomes ``job.result``."""
+        job = Job(stages)
+        with self._lock:
+            self._evict()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        try:
+            result = fn(job, *args, **kwargs)
+        except Exception as e:
+            job._finish(error=str(e))
+        else:
+            job._finish(result=result)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_position(self, job_id):
+        """1-based position among queued jobs, or 0 once the job has started."""
+        with self._lock:
+            queued = [j.id for j in self._jobs.values() if j.status == "queued"]
+        return queued.index(job_id) + 1 if job_id in queued else 0
+
+    def stats(self):
+        with self._lock:
+            statuses = [j.status for j in self._jobs.values()]
+        return {status: statuses.count(status) for status in ("queued", "running", "done", "error")}
+
+    def _evict(self):
+        now = time.time()
+        for job_id in [i for i, j in self._jobs.items() if j.done and now - j.finished > self.ttl]:
+            del self._jobs[job_id]
+        finished = [i for i, j in self._jobs.items() if j.done]
+        while len(self._jobs) >= self.history and finished:
+            del self._jobs[finished.pop(0)]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Process-wide job manager shared by every Streamlit session."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+    return _manager
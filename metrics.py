@@ -1,33 +1,140 @@
 import os
-import nltk # type: ignore
-from nltk.sentiment import SentimentIntensityAnalyzer # type: ignore
-from collections import Counter
-import matplotlib.pyplot as plt # type: ignore
-from sklearn.feature_extraction.text import TfidfVectorizer # type: ignore
-from sklearn.decomposition import LatentDirichletAllocation # type: ignore
 import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from sentiment_engine import get_engine, SCORE_COLUMNS
+from topic_engine import learn_and_describe, peek_topic_model, TOPIC_BACKEND, PERSIST_MODELS
+from profiler import profiled
+from tokenizer import tokenize, sentences, ROW_BREAK
+from vocabulary import TokenCounts
+from summary_engine import summarize, SUMMARY_SENTENCES
+from charts import sentiment_chart
+from dedup import find_duplicates, DEDUP_ENABLED
+
+# ------------ TEXT STATISTICS ---------------- #
+
+class TextStats:
+    """Word, sentence, character and token counts gathered in one streaming pass.
+
+    Words and sentences are those of ``tokenizer.tokenize``; on cleaned text
+    they match ``text.split()`` and the non-blank parts of ``text.split(".")``.
+    """
+
+    def __init__(self):
+        self.words = 0
+        self.sentences = 0
+        self.characters = 0
+        self.letters = 0
+        self.tokens = TokenCounts()
+        self._carry = ""
+        self._open_sentence = False
+
+    @classmethod
+    def from_text(cls, text, chunk_size=1 << 20):
+        stats = cls()
+        for start in range(0, len(text), chunk_size):
+            stats.update(text[start:start + chunk_size])
+        return stats.finish()
+
+    def update(self, fragment):
+        """Feed the next piece of the text; words split across pieces are carried over."""
+        self.characters += len(fragment)
+        buffer = self._carry + fragment
+        cut = len(buffer)
+        while cut > 0 and not buffer[cut - 1].isspace():
+            cut -= 1
+        self._carry = buffer[cut:]
+        self._consume(buffer[:cut])
+        return self
+
+    def finish(self):
+        """Flush the trailing word; the stats are complete afterwards."""
+        if self._carry:
+            self._consume(self._carry)
+            self._carry = ""
+        return self
+
+    def merge(self, other, weight=1):
+        """Add the counts of another finished ``TextStats`` to this one, ``weight`` times."""
+        self.words += other.words * weight
+        self.sentences += other.sentences * weight
+        self.characters += other.characters * weight
+        self.letters += other.letters * weight
+        self.tokens.update(other.tokens, weight)
+        return self
+
+    def _consume(self, chunk):
+        if not chunk:
+            return
+        # A sentence that started in an earlier chunk must not be counted twice
+        tokens = tokenize(chunk, open_sentence=self._open_sentence)
+        self.words += len(tokens)
+        self.letters += tokens.letters
+        self.sentences += tokens.sentence_count
+        self.tokens.update(tokens.strings())
+        self._open_sentence = tokens.open_sentence
+
+    @property
+    def avg_word_length(self):
+        return self.characters / max(self.words, 1)
+
+
+@profiled()
+def text_stats(text):
+    """Return ``TextStats`` for ``text``; existing stats are passed through."""
+    if isinstance(text, TextStats):
+        return text
+    return TextStats.from_text(text)
+
+
+class CorpusStats:
+    """Aggregate metrics merged incrementally over streamed CSV chunks."""
+
+    def __init__(self, text_columns=None):
+        self.text_columns = list(text_columns or [])
+        self.rows = 0
+        self.chunks = 0
+        self.text = TextStats()
+        # Corpus store holding the cleaned rows, when one was written
+        self.store_path = None
+
+    def update(self, df, text_columns=None):
+        """Fold one cleaned chunk into the running totals."""
+        columns = text_columns or self.text_columns
+        self.rows += len(df)
+        self.chunks += 1
+        for col in columns:
+            self.text.update(" ".join(df[col].tolist()))
+            self.text.update(" ")
+        return self
+
+    def finish(self):
+        self.text.finish()
+        return self
 
-# Download required NLTK data
-try:
-    nltk.data.find('sentiment/vader_lexicon')
-except LookupError:
-    nltk.download("vader_lexicon", quiet=True)
-
-sia = SentimentIntensityAnalyzer()
 
 # ------------ BASIC METRICS ---------------- #
 
 
+@profiled()
 def word_count(text):
-    return len(text.split())
+    return text_stats(text).words
 
 
+@profiled()
 def sentence_count(text):
-    return len([s for s in text.split(".") if s.strip()])
+    return text_stats(text).sentences
 
 
+@profiled()
 def sentiment_analysis(text):
-    return sia.polarity_scores(text)
+    """Document sentiment: the mean of VADER scores over its sentences"""
+    return sentence_sentiments(text)["aggregate"]
+
+
+@profiled()
+def sentence_sentiments(text):
+    """Per-sentence VADER scores, their aggregate and sentences/second"""
+    return get_engine().score_document(text)
 
 
 def sentiment_distribution(sentiment_scores):
@@ -47,38 +154,36 @@ def sentiment_to_emoji(score):
         return " Neutral"
 
 
+@profiled()
 def sentiment_distribution_chart(distribution):
-    labels = list(distribution.keys())
-    values = list(distribution.values())
+    """PNG bytes of the sentiment distribution bars, cached by their values (see charts)"""
+    return sentiment_chart(distribution)
 
-    fig, ax = plt.subplots()
-    ax.bar(labels, values)  # default colors
-    ax.set_title("Sentiment Distribution")
-    ax.set_xlabel("Sentiment Type")
-    ax.set_ylabel("Score")
-    ax.grid(axis='y', linestyle='--', alpha=0.4)
 
-    return fig
+@profiled()
+def top_tokens(text, n=10):
+    return text_stats(text).tokens.most_common(n)
 
 
-def top_tokens(text, n=10):
-    tokens = text.split()
-    return Counter(tokens).most_common(n)
+@profiled()
+def extractive_summary(text, n_sentences=SUMMARY_SENTENCES):
+    """The most central sentences (TextRank over TF-IDF similarity) in document order, with their scores"""
+    return summarize(text, n_sentences)
 
 
-def simple_summary(text):
-    #extractive summary.
-    sentences = text.split(".")
-    if len(sentences) > 2:
-        return sentences[0].strip() + ". " + sentences[-2].strip() + "."
-    else:
-        return text[:1000] + "..."
+@profiled()
+def simple_summary(text, n_sentences=SUMMARY_SENTENCES):
+    """Extractive summary text; falls back to the opening of the text when it has no sentences"""
+    summary = extractive_summary(text, n_sentences)
+    return summary["text"] if summary["sentences"] else text[:1000] + "..."
 
 
+@profiled()
 def comprehensive_summary(text, sentiment_scores, tokens):
     """Generate a comprehensive paragraph summary of the text analysis"""
-    wc = word_count(text)
-    sc = sentence_count(text)
+    stats = text_stats(text)
+    wc = stats.words
+    sc = stats.sentences
     compound = sentiment_scores.get("compound", 0)
     
     # Sentiment interpretation
@@ -90,7 +195,7 @@ def comprehensive_summary(text, sentiment_scores, tokens):
         sentiment_desc = "neutral sentiment"
     
     # Word length interpretation
-    avg_word_length = len(text) / max(wc, 1)
+    avg_word_length = stats.avg_word_length
     if avg_word_length > 6:
         complexity = "sophisticated and complex language"
     elif avg_word_length > 4.5:
@@ -109,8 +214,23 @@ def comprehensive_summary(text, sentiment_scores, tokens):
 
 # ------------ LOAD PROCESSED DATA ------------- #
 
-def load_processed_text():
-    """Loads processed txt or csv from Final_data."""
+def load_processed_text(columns=None, start=0, stop=None, store_path=None):
+    """
+    Loads processed data. The corpus store at ``store_path`` is memory-mapped
+    and only ``columns`` (default: its text columns) of rows ``start:stop``
+    are read; without a store, the legacy Final_data/processed_text.txt /
+    processed_csv.csv are read. Returns: (text for "txt" or DataFrame for "csv", kind)
+    """
+    from corpus_store import CorpusStore, store_exists
+
+    if store_path and store_exists(store_path):
+        store = CorpusStore(store_path)
+        try:
+            if store.kind == "txt":
+                return store.text(), "txt"
+            return store.frame(columns or store.text_columns, start, stop), "csv"
+        finally:
+            store.close()
 
     folder = "Final_data"
     txt_path = os.path.join(folder, "processed_text.txt")
@@ -120,69 +240,222 @@ def load_processed_text():
         with open(txt_path, "r") as f:
             return f.read(), "txt"
 
-    # Load processed csv
+    # Load processed csv: the requested rows of the text columns, never joined into one string
     csv_path = os.path.join(folder, "processed_csv.csv")
     if os.path.exists(csv_path):
-        import pandas as pd # type: ignore
-        df = pd.read_csv(csv_path)
-
-        # Combine all string/object columns into a single large text blob
-        combined = " ".join(
-            df.select_dtypes(include="object")
-              .astype(str)
-              .fillna("")
-              .values.flatten()
+        df = pd.read_csv(
+            csv_path,
+            usecols=columns,
+            skiprows=range(1, start + 1) if start else None,
+            nrows=None if stop is None else max(stop - start, 0),
+            keep_default_na=False,
         )
-        return combined, "csv"
+        return (df if columns else df.select_dtypes(include=["object", "string"])), "csv"
 
     return None, None
 
 
 # ------------ TOPIC MODELING ------------- #
 
-def extract_topics(text, n_topics=3):
-    """Extract main topics from text using LDA"""
+@profiled()
+def extract_topics(text, n_topics=3, backend=TOPIC_BACKEND, persist=PERSIST_MODELS):
+    """Topics of a text from the long-lived "text" topic model ("lda" or "nmf"), fed every sentence"""
+    return topics_from_documents(sentences(text), n_topics, model_name="text", backend=backend, persist=persist)
+
+
+@profiled()
+def topics_from_documents(documents, n_topics=3, model_name="default", backend=TOPIC_BACKEND,
+                          persist=PERSIST_MODELS):
+    """
+    Fold documents into the named topic model (a throwaway one when
+    ``model_name`` is None) and describe their main topics
+    """
     try:
-        sentences = [s.strip() for s in text.split('.') if s.strip()]
-        if len(sentences) < n_topics:
-            n_topics = max(1, len(sentences) - 1)
-        
-        # TF-IDF vectorization
-        vectorizer = TfidfVectorizer(max_features=50, stop_words='english')
-        tfidf_matrix = vectorizer.fit_transform(sentences[:100])  # Limit to 100 sentences
-        
-        # LDA topic modeling
-        if tfidf_matrix.shape[0] < n_topics:
-            n_topics = tfidf_matrix.shape[0]
-        
-        lda = LatentDirichletAllocation(n_components=n_topics, random_state=42, max_iter=20)
-        lda.fit(tfidf_matrix)
-        
-        # Extract top words per topic
-        feature_names = vectorizer.get_feature_names_out()
-        topics = {}
-        
-        for topic_idx, topic in enumerate(lda.components_):
-            top_words_idx = topic.argsort()[-5:][::-1]
-            top_words = [feature_names[i] for i in top_words_idx]
-            topics[f"Topic {topic_idx+1}"] = top_words
-        
-        return topics
+        if not documents:
+            raise ValueError("No documents to model.")
+        return learn_and_describe(documents, n_topics=n_topics, name=model_name, backend=backend, persist=persist)
     except Exception as e:
         return {"Error": [str(e)]}
 
 
+def topic_fit_report(model_name="default", backend=TOPIC_BACKEND):
+    """Backend, last update time and iteration count of a topic model; None until it has been fitted"""
+    model = peek_topic_model(model_name, backend)
+    return model.fit_report() if model is not None and model.fitted else None
+
+
+@profiled()
 def readability_score(text):
     """Calculate simple readability metrics"""
-    words = text.split()
-    sentences = [s for s in text.split('.') if s.strip()]
+    stats = text_stats(text)
     
-    if len(sentences) == 0:
+    if stats.sentences == 0:
         return 0
     
-    avg_words_per_sentence = len(words) / len(sentences)
-    avg_letters_per_word = sum(len(w) for w in words) / max(len(words), 1)
+    avg_words_per_sentence = stats.words / stats.sentences
+    avg_letters_per_word = stats.letters / max(stats.words, 1)
     
     # Flesch-Kincaid Grade Level approximation
     flesch_kincaid = 0.39 * avg_words_per_sentence + 11.8 * (avg_letters_per_word / 5) - 15.59
     return max(0, round(flesch_kincaid, 1))
+
+
+# ------------ BATCH (CSV) ANALYTICS ------------- #
+
+def combine_text_columns(df, text_columns):
+    """One document per row: the row's text columns joined with spaces."""
+    texts = df[text_columns[0]].astype(str)
+    if len(text_columns) > 1:
+        texts = texts.str.cat([df[c].astype(str) for c in text_columns[1:]], sep=" ")
+    return texts
+
+
+def row_counts(texts):
+    """Per-row (words, sentences, letters) as TextStats counts them, from one tokenization of every row."""
+    values = texts.tolist()
+    buffer = ROW_BREAK.join(values)
+    if buffer.count(ROW_BREAK) != max(len(values) - 1, 0):
+        # Some row already holds ROW_BREAK: tokenize the rows one by one
+        per_row = [tokenize(v) for v in values]
+        return (np.array([len(t) for t in per_row], dtype=np.int64),
+                np.array([t.sentence_count for t in per_row], dtype=np.int64),
+                np.array([t.letters for t in per_row], dtype=np.int64))
+
+    tokens = tokenize(buffer)
+    rows = tokens.row_index(tokens.starts)
+    words = np.bincount(rows, minlength=len(values))
+    letters = np.bincount(rows, weights=tokens.ends - tokens.starts, minlength=len(values)).astype(np.int64)
+    sentence_counts = np.bincount(tokens.row_index(tokens.sentence_starts), minlength=len(values))
+    return words, sentence_counts, letters
+
+
+@profiled()
+def sentiment_batch(texts):
+    """VADER scores for a Series of texts; each distinct text is scored once."""
+    uniques = pd.unique(texts)
+    scores = pd.DataFrame(
+        get_engine().score_batch(list(uniques)),
+        index=uniques,
+        columns=SCORE_COLUMNS,
+    )
+    return scores.reindex(texts.values).set_index(texts.index)
+
+
+def readability_scores(words, sentences, letters):
+    """Vectorized readability_score over per-row word/sentence/letter counts."""
+    words = np.asarray(words, dtype=float)
+    sentences = np.asarray(sentences, dtype=float)
+    letters = np.asarray(letters, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_words_per_sentence = words / sentences
+    avg_letters_per_word = letters / np.maximum(words, 1)
+    flesch_kincaid = 0.39 * avg_words_per_sentence + 11.8 * (avg_letters_per_word / 5) - 15.59
+    scores = np.maximum(0, np.round(flesch_kincaid, 1))
+    return np.where(sentences == 0, 0, scores)
+
+
+@profiled()
+def analyze_texts(texts, n_tokens=12):
+    """
+    Text-page metrics (counts, readability, sentiment, top tokens, summaries)
+    for many cleaned documents at once; sentiment is scored in one batch.
+    """
+    sentiments = get_engine().score_documents(texts)
+    results = []
+    for text, sentiment_scores in zip(texts, sentiments):
+        stats = text_stats(text)
+        tokens = top_tokens(stats, n=n_tokens)
+        results.append({
+            "words": stats.words,
+            "sentences": stats.sentences,
+            "characters": stats.characters,
+            "avg_word_length": round(stats.avg_word_length, 4),
+            "readability": readability_score(stats),
+            "sentiment": sentiment_scores,
+            "tokens": tokens,
+            "summary": comprehensive_summary(stats, sentiment_scores, tokens),
+            "extractive_summary": simple_summary(text),
+        })
+    return results
+
+
+def rows_text_stats(values, weights=None, block_rows=10000):
+    """
+    ``TextStats`` of rows of text joined by spaces, streamed in blocks of rows.
+    With ``weights`` each row counts that many times: rows sharing a weight
+    are gathered once and their stats merged with it.
+    """
+    if weights is None:
+        weights = np.ones(len(values), dtype=np.int64)
+    stats = TextStats()
+    for weight in pd.unique(weights):
+        selected = [values[i] for i in np.flatnonzero(weights == weight).tolist()]
+        part = TextStats()
+        for start in range(0, len(selected), block_rows):
+            part.update(" ".join(selected[start:start + block_rows]))
+            part.update(" ")
+        stats.merge(part.finish(), int(weight))
+    return stats
+
+
+@profiled()
+def analyze_dataframe(df, text_columns=None, n_tokens=12, n_topics=3, topic_sample=10000,
+                      dedup=DEDUP_ENABLED, topic_model="csv", persist_topics=PERSIST_MODELS):
+    """
+    Per-row metrics as DataFrame columns plus corpus-level top tokens and topics.
+    Counts and readability are vectorized; sentiment is scored once per distinct row.
+    With ``dedup``, near-duplicate rows are clustered first and only the first
+    row of each cluster is analyzed: its metrics are repeated for the other
+    rows (``duplicate_of`` names it) and weighted by cluster size in the
+    aggregates, while topics see each cluster once.
+    Topics come from the ``topic_model`` model (a throwaway one when None),
+    fed a seeded sample of at most ``topic_sample`` distinct rows.
+    """
+    if text_columns is None:
+        text_columns = df.select_dtypes(include=["object", "string"]).columns.tolist()
+    if not text_columns:
+        raise ValueError("No text columns to analyze.")
+
+    texts = combine_text_columns(df, text_columns)
+    clusters = find_duplicates(texts.tolist()) if dedup and len(texts) else None
+    if clusters is not None:
+        texts = texts.iloc[clusters.representatives]
+    words, sentence_counts, letters = row_counts(texts)
+
+    rows = pd.DataFrame(index=texts.index)
+    rows["word_count"] = words
+    rows["sentence_count"] = sentence_counts
+    rows["readability"] = readability_scores(words, sentence_counts, letters)
+    rows = rows.join(sentiment_batch(texts))
+    rows["sentiment"] = np.select(
+        [rows["compound"] > 0.2, rows["compound"] < -0.2],
+        ["Positive", "Negative"],
+        default="Neutral",
+    )
+    if clusters is not None:
+        representatives = rows.index
+        rows = rows.iloc[clusters.cluster].set_axis(df.index)
+        rows["duplicate_of"] = representatives[clusters.cluster]
+
+    # Corpus-level aggregates, streamed in blocks of rows
+    stats = rows_text_stats(texts.tolist(), clusters.weights if clusters is not None else None)
+
+    documents = pd.Series(pd.unique(texts))
+    documents = documents[documents.str.strip() != ""]
+    if len(documents) > topic_sample:
+        documents = documents.sample(topic_sample, random_state=42)
+    sentiment_scores = rows[SCORE_COLUMNS].mean().fillna(0).to_dict()
+
+    return {
+        "rows": rows,
+        "stats": stats,
+        "text_columns": text_columns,
+        "sentiment_scores": sentiment_scores,
+        "sentiment_counts": rows["sentiment"].value_counts().to_dict(),
+        "tokens": stats.tokens.most_common(n_tokens),
+        "topics": topics_from_documents(documents.tolist(), n_topics, model_name=topic_model,
+                                         persist=persist_topics)
+                   if n_topics else {},
+        "readability": readability_score(stats),
+        "duplicates": clusters.summary() if clusters is not None else None,
+    }
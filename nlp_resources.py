@@ -0,0 +1,91 @@
+import os
+import threading
+
+# NLTK resource path -> downloadable package name
+NLTK_RESOURCES = {
+    "corpora/stopwords": "stopwords",
+    "corpora/wordnet": "wordnet",
+    "sentiment/vader_lexicon.zip": "vader_lexicon",
+}
+
+# Never reach for the network (air-gapped deployments); build the resource store instead
+OFFLINE = os.environ.get("NARRATIVE_NEXUS_OFFLINE", "").lower() in ("1", "true", "yes")
+
+_lock = threading.Lock()
+_checked = set()
+_store = None
+_store_loaded = False
+_stop_words = None
+_lemmatizer = None
+
+
+def get_resource_store():
+    """The memory-mapped resource store if one has been built, else None."""
+    global _store, _store_loaded
+    if not _store_loaded:
+        from resource_store import ResourceStore, RESOURCE_STORE_PATH
+
+        with _lock:
+            if not _store_loaded:
+                if os.path.exists(RESOURCE_STORE_PATH):
+                    _store = ResourceStore(RESOURCE_STORE_PATH)
+                _store_loaded = True
+    return _store
+
+
+def ensure_nltk_data(resource):
+    """Download an NLTK resource if it is missing; checked once per process."""
+    if resource in _checked:
+        return
+    import nltk # type: ignore
+
+    with _lock:
+        if resource in _checked:
+            return
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            if OFFLINE:
+                raise LookupError(
+                    f"NLTK resource {resource!r} is missing and downloads are disabled; "
+                    "build one with `python resource_store.py build`."
+                )
+            nltk.download(NLTK_RESOURCES.get(resource, resource.rsplit("/", 1)[-1]), quiet=True)
+        _checked.add(resource)
+
+
+def get_stop_words():
+    """English stopword set, loaded on first use."""
+    global _stop_words
+    if _stop_words is None:
+        store = get_resource_store()
+        if store is not None:
+            words = store.stop_words()
+        else:
+            ensure_nltk_data("corpora/stopwords")
+            from nltk.corpus import stopwords # type: ignore
+            words = frozenset(stopwords.words("english"))
+
+        with _lock:
+            if _stop_words is None:
+                _stop_words = words
+    return _stop_words
+
+
+def get_lemmatizer():
+    """Process-wide noun lemmatizer, loaded on first use (the resource store's table when built)."""
+    global _lemmatizer
+    if _lemmatizer is None:
+        store = get_resource_store()
+        if store is not None:
+            from resource_store import StoreLemmatizer
+            lemmatizer = StoreLemmatizer(store)
+        else:
+            ensure_nltk_data("corpora/wordnet")
+            from nltk.stem import WordNetLemmatizer # type: ignore
+            lemmatizer = WordNetLemmatizer()
+
+        with _lock:
+            if _lemmatizer is None:
+                _lemmatizer = lemmatizer
+    return _lemmatizer
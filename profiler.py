@@ -0,0 +1,189 @@
+import os
+import time
+import json
+import functools
+import threading
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+
+# Trace peak memory per stage (tracemalloc slows allocation-heavy code noticeably)
+TRACE_MEMORY = os.environ.get("NARRATIVE_NEXUS_PROFILE_MEMORY", "").lower() in ("1", "true", "yes")
+
+_active = contextvars.ContextVar("narrative_nexus_profile", default=None)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def measure_input(value):
+    """(size, unit) of a stage input: characters, rows, bytes or items."""
+    if isinstance(value, str):
+        return len(value), "chars"
+    if hasattr(value, "shape") and hasattr(value, "columns"):
+        return len(value), "rows"
+    if isinstance(getattr(value, "size", None), int) and hasattr(value, "name"):
+        return value.size, "bytes"
+    if hasattr(value, "characters") and hasattr(value, "words"):
+        return value.characters, "chars"
+    if isinstance(value, (list, tuple)) or hasattr(value, "__len__"):
+        try:
+            return len(value), "items"
+        except TypeError:
+            pass
+    return None, None
+
+
+class Profile:
+    """
+    Stage records for one analysis run: wall time, CPU time of the calling
+    thread, peak traced memory and input size. Nested stages keep their depth
+    and parent, and each record sits at the position where its stage started.
+    """
+
+    def __init__(self, label="", trace_memory=TRACE_MEMORY):
+        self.label = label
+        self.trace_memory = trace_memory
+        self.records = []
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name, input_size=None, unit=None):
+        parent = self._stack[-1] if self._stack else None
+        record = {
+            "stage": name,
+            "depth": len(self._stack),
+            "parent": parent["stage"] if parent else None,
+            "wall_seconds": None,
+            "cpu_seconds": None,
+            "peak_bytes": None,
+            "input_size": input_size,
+            "input_unit": unit,
+            "error": None,
+        }
+        self.records.append(record)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # Fold the parent's peak so far in before the global peak is reset
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent["_peak"] = max(parent["_peak"], peak)
+            tracemalloc.reset_peak()
+            record["_base"], record["_peak"] = current, current
+
+        self._stack.append(record)
+        began_wall, began_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["wall_seconds"] = round(time.perf_counter() - began_wall, 6)
+            record["cpu_seconds"] = round(time.thread_time() - began_cpu, 6)
+            self._stack.pop()
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(record.pop("_peak"), peak)
+                record["peak_bytes"] = peak - record.pop("_base")
+                if parent is not None:
+                    parent["_peak"] = max(parent["_peak"], peak)
+
+    def summary(self):
+        """Per-stage totals: calls, wall/CPU seconds and the largest peak."""
+        totals = {}
+        for r in self.records:
+            t = totals.setdefault(r["stage"], {"stage": r["stage"], "calls": 0, "wall_seconds": 0.0,
+                                               "cpu_seconds": 0.0, "peak_bytes": None})
+            t["calls"] += 1
+            t["wall_seconds"] += r["wall_seconds"] or 0.0
+            t["cpu_seconds"] += r["cpu_seconds"] or 0.0
+            if r["peak_bytes"] is not None:
+                t["peak_bytes"] = max(t["peak_bytes"] or 0, r["peak_bytes"])
+        return sorted(totals.values(), key=lambda t: t["wall_seconds"], reverse=True)
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "trace_memory": self.trace_memory,
+            "records": [{k: v for k, v in r.items() if not k.startswith("_")} for r in self.records],
+            "summary": self.summary(),
+        }
+
+    def to_json(self, path=None, indent=2):
+        """The profile as JSON; also written to ``path`` when given."""
+        data = json.dumps(self.to_dict(), indent=indent)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+        return data
+
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_users = 1
+        elif _tracing_users:
+            _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users:
+            _tracing_users -= 1
+            if _tracing_users == 0:
+                tracemalloc.stop()
+
+
+@contextmanager
+def profile_run(label="", trace_memory=None):
+    """
+    Collect every profiled stage run in this context (thread) into a new
+    ``Profile``. Memory tracing is process-wide, so peaks of concurrent
+    runs can include each other's allocations.
+    """
+    profile = Profile(label, TRACE_MEMORY if trace_memory is None else trace_memory)
+    if profile.trace_memory:
+        _start_tracing()
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+        if profile.trace_memory:
+            _stop_tracing()
+
+
+def current_profile():
+    return _active.get()
+
+
+@contextmanager
+def stage(name, input_size=None, unit=None):
+    """Record a stage in the active profile; a no-op outside ``profile_run``."""
+    profile = _active.get()
+    if profile is None:
+        yield None
+        return
+    with profile.stage(name, input_size, unit) as record:
+        yield record
+
+
+def profiled(name=None):
+    """Decorator: record each call as a stage sized by its first argument."""
+    def decorate(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = _active.get()
+            if profile is None:
+                return fn(*args, **kwargs)
+            value = next((v for v in (*args, *kwargs.values()) if v is not None), None)
+            size, unit = measure_input(value)
+            with profile.stage(stage_name, size, unit):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,312 @@
+"""
+Analysis reports in TXT, JSON, HTML and Parquet. Reports are built from
+already-computed analysis results (``compute_text_analysis`` /
+``analyze_dataframe`` output) and written piece by piece to a binary
+file-like sink; per-row CSV results are written in batches of rows, so no
+format ever holds the whole report as one string.
+"""
+import io
+import os
+import html
+import json
+import tempfile
+from datetime import datetime
+from contextlib import contextmanager
+from profiler import stage
+
+# Rows per batch when streaming per-row results (overridable through the environment)
+REPORT_BATCH_ROWS = int(os.environ.get("NARRATIVE_NEXUS_REPORT_BATCH_ROWS", "50000"))
+FORMAT = "narrative-nexus-report/1"
+
+MIME_TYPES = {
+    "txt": "text/plain",
+    "json": "application/json",
+    "html": "text/html",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+RULE = "─" * 65
+BANNER = "═" * 63
+
+
+def _sentiment_label(compound):
+    if compound > 0.2:
+        return "POSITIVE"
+    elif compound < -0.2:
+        return "NEGATIVE"
+    return "NEUTRAL"
+
+
+def report_overview(results):
+    """The JSON-safe fields every format reports, from text or CSV analysis results."""
+    stats = results["stats"]
+    sentiment = {k: float(v) for k, v in (results.get("sentiment_scores") or {}).items()}
+    topics = results.get("topics") or {}
+    overview = {
+        "kind": "csv" if "text_columns" in results else "text",
+        "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "words": int(stats.words),
+        "sentences": int(stats.sentences),
+        "characters": int(stats.characters),
+        "avg_word_length": round(float(stats.avg_word_length), 2),
+        "readability": float(results.get("readability") or 0),
+        "sentiment": sentiment,
+        "sentiment_label": _sentiment_label(sentiment.get("compound", 0)),
+        "tokens": [[str(t), int(c)] for t, c in results.get("tokens", [])],
+        "topics": {} if "Error" in topics else {k: list(v) for k, v in topics.items()},
+        "key_sentences": list((results.get("extractive_summary") or {}).get("sentences", [])),
+        "summary": results.get("summary") or "",
+    }
+    if overview["kind"] == "csv":
+        rows = results.get("rows")
+        overview.update(
+            # Streamed CSVs keep only a row count, not the per-row results
+            rows=int(results.get("row_count", len(rows) if rows is not None else 0)),
+            text_columns=[str(c) for c in results["text_columns"]],
+            sentiment_counts={k: int(v) for k, v in (results.get("sentiment_counts") or {}).items()},
+            duplicates=results.get("duplicates"),
+        )
+    return overview
+
+
+def _row_batches(rows, batch_rows):
+    for start in range(0, len(rows), batch_rows):
+        yield rows.iloc[start:start + batch_rows]
+
+
+@contextmanager
+def _text_sink(sink):
+    """UTF-8 text view of a binary sink, detached (not closed) afterwards."""
+    if isinstance(sink, io.TextIOBase):
+        yield sink
+        return
+    out = io.TextIOWrapper(sink, encoding="utf-8", newline="")
+    try:
+        yield out
+    finally:
+        out.flush()
+        out.detach()
+
+
+# ------------ TXT ------------- #
+
+def write_txt(results, sink, batch_rows=REPORT_BATCH_ROWS):
+    o = report_overview(results)
+    title = "CSV ANALYSIS REPORT" if o["kind"] == "csv" else "TEXT ANALYSIS REPORT"
+    sentiment = o["sentiment"]
+
+    with _text_sink(sink) as out:
+        out.write(f"\n{BANNER}\n                    NARRATIVE NEXUS - {title}\n{BANNER}\n\n")
+        out.write(f"Generated: {o['generated']}\n\n")
+
+        out.write(f"{RULE}\n📊 KEY METRICS\n{RULE}\n")
+        if o["kind"] == "csv":
+            out.write(f"• Rows:                     {o['rows']:,}\n")
+            out.write(f"• Text Columns:             {', '.join(o['text_columns'])}\n")
+            if o.get("duplicates"):
+                out.write(f"• Near-Duplicate Rows:      {o['duplicates']['duplicates']:,} "
+                          f"({o['duplicates']['clusters']:,} clusters analyzed)\n")
+        out.write(f"• Total Words:              {o['words']:,}\n")
+        out.write(f"• Total Sentences:          {o['sentences']:,}\n")
+        out.write(f"• Average Word Length:      {o['avg_word_length']}\n")
+        out.write(f"• Character Count:          {o['characters']:,}\n")
+        out.write(f"• Readability Grade:        {o['readability']:.1f}\n\n")
+
+        out.write(f"{RULE}\n💭 SENTIMENT ANALYSIS\n{RULE}\n")
+        out.write(f"• Overall Sentiment:        {o['sentiment_label']}\n")
+        out.write(f"• Compound Score:           {sentiment.get('compound', 0):.4f}\n")
+        out.write(f"• Positive Sentences:       {sentiment.get('pos', 0) * 100:.1f}%\n")
+        out.write(f"• Neutral Sentences:        {sentiment.get('neu', 0) * 100:.1f}%\n")
+        out.write(f"• Negative Sentences:       {sentiment.get('neg', 0) * 100:.1f}%\n")
+        for label, count in o.get("sentiment_counts", {}).items():
+            out.write(f"• {label + ' Rows:':<26}{count:,}\n")
+
+        out.write(f"\n{RULE}\n🔑 TOP KEYWORDS\n{RULE}\n")
+        for i, (token, count) in enumerate(o["tokens"], 1):
+            out.write(f"{i:2d}. {token.upper():<20} (frequency: {count})\n")
+
+        if o["topics"]:
+            out.write(f"\n{RULE}\n🎯 MAIN TOPICS\n{RULE}\n")
+            for name, words in o["topics"].items():
+                out.write(f"• {name}: {', '.join(words)}\n")
+
+        out.write(f"\n{RULE}\n📝 SUMMARY\n{RULE}\n")
+        for i, sentence in enumerate(o["key_sentences"], 1):
+            out.write(f"{i:2d}. {sentence}.\n")
+        if o["key_sentences"]:
+            out.write("\n")
+        out.write(f"{o['summary']}\n\n{BANNER}\n                        END OF REPORT\n{BANNER}\n")
+    return sink
+
+
+# ------------ JSON ------------- #
+
+def write_json(results, sink, batch_rows=REPORT_BATCH_ROWS):
+    """``{"format", "report", "rows"}``; the rows array is written a batch at a time."""
+    rows = results.get("rows")
+    with _text_sink(sink) as out:
+        out.write('{"format": %s, "report": ' % json.dumps(FORMAT))
+        out.write(json.dumps(report_overview(results), ensure_ascii=False))
+        out.write(', "rows": [')
+        first = True
+        for batch in _row_batches(rows, batch_rows) if rows is not None else ():
+            # JSON Lines never hold raw newlines inside a record
+            records = batch.to_json(orient="records", lines=True).rstrip("\n")
+            if records:
+                out.write(("\n" if first else ",\n") + records.replace("\n", ",\n"))
+                first = False
+        out.write("]}\n")
+    return sink
+
+
+# ------------ HTML ------------- #
+
+HTML_STYLE = (
+    "body{font-family:system-ui,sans-serif;color:#334155;max-width:960px;margin:2rem auto;padding:0 1rem}"
+    "h1{color:#6366f1}h2{color:#8b5cf6;border-bottom:1px solid #e2e8f0;padding-bottom:.3rem}"
+    "table{border-collapse:collapse;width:100%;font-size:.9rem}"
+    "th,td{border:1px solid #e2e8f0;padding:.3rem .6rem;text-align:left}th{background:#f8fafc}"
+)
+
+
+def _html_list(items, ordered=False):
+    tag = "ol" if ordered else "ul"
+    return f"<{tag}>" + "".join(f"<li>{html.escape(str(i))}</li>" for i in items) + f"</{tag}>\n"
+
+
+def _html_rows(batch):
+    """Table rows of a DataFrame batch, built column-wise rather than cell by cell."""
+    cells = []
+    for column in batch.columns:
+        values = batch[column].astype(str)
+        if batch[column].dtype.kind not in "biuf":
+            values = values.map(html.escape)
+        cells.append(values)
+    line = "<tr><td>" + cells[0]
+    for values in cells[1:]:
+        line = line + "</td><td>" + values
+    return "".join((line + "</td></tr>\n").tolist())
+
+
+def write_html(results, sink, batch_rows=REPORT_BATCH_ROWS):
+    o = report_overview(results)
+    sentiment = o["sentiment"]
+    rows = results.get("rows")
+    title = "CSV Analysis Report" if o["kind"] == "csv" else "Text Analysis Report"
+
+    with _text_sink(sink) as out:
+        out.write(f"<!DOCTYPE html>\n<html><head><meta charset='utf-8'><title>Narrative Nexus - {title}</title>")
+        out.write(f"<style>{HTML_STYLE}</style></head><body>\n")
+        out.write(f"<h1>Narrative Nexus - {title}</h1><p>Generated: {html.escape(o['generated'])}</p>\n")
+
+        metrics = [
+            ("Total Words", f"{o['words']:,}"),
+            ("Total Sentences", f"{o['sentences']:,}"),
+            ("Average Word Length", o["avg_word_length"]),
+            ("Character Count", f"{o['characters']:,}"),
+            ("Readability Grade", f"{o['readability']:.1f}"),
+        ]
+        if o["kind"] == "csv":
+            metrics[:0] = [("Rows", f"{o['rows']:,}"), ("Text Columns", ", ".join(o["text_columns"]))]
+            if o.get("duplicates"):
+                metrics[2:2] = [("Near-Duplicate Rows", f"{o['duplicates']['duplicates']:,}")]
+        out.write("<h2>📊 Key Metrics</h2>" + _html_list(f"{k}: {v}" for k, v in metrics))
+
+        out.write("<h2>💭 Sentiment</h2>" + _html_list([
+            f"Overall Sentiment: {o['sentiment_label']}",
+            f"Compound Score: {sentiment.get('compound', 0):.4f}",
+            f"Positive: {sentiment.get('pos', 0) * 100:.1f}%",
+            f"Neutral: {sentiment.get('neu', 0) * 100:.1f}%",
+            f"Negative: {sentiment.get('neg', 0) * 100:.1f}%",
+            *(f"{label} Rows: {count:,}" for label, count in o.get("sentiment_counts", {}).items()),
+        ]))
+
+        out.write("<h2>🔑 Top Keywords</h2><table><tr><th>Term</th><th>Frequency</th></tr>")
+        out.write("".join(f"<tr><td>{html.escape(t)}</td><td>{c}</td></tr>" for t, c in o["tokens"]))
+        out.write("</table>\n")
+
+        if o["topics"]:
+            out.write("<h2>🎯 Main Topics</h2>" + _html_list(f"{k}: {', '.join(v)}" for k, v in o["topics"].items()))
+
+        out.write("<h2>📝 Summary</h2>")
+        if o["key_sentences"]:
+            out.write(_html_list((f"{s}." for s in o["key_sentences"]), ordered=True))
+        out.write(f"<p>{html.escape(o['summary'])}</p>\n")
+
+        if rows is not None:
+            out.write("<h2>🧾 Per-Row Metrics</h2><table><tr>")
+            out.write("".join(f"<th>{html.escape(str(c))}</th>" for c in rows.columns) + "</tr>\n")
+            for batch in _row_batches(rows, batch_rows):
+                out.write(_html_rows(batch))
+            out.write("</table>\n")
+        out.write("</body></html>\n")
+    return sink
+
+
+# ------------ PARQUET ------------- #
+
+def write_parquet(results, sink, batch_rows=REPORT_BATCH_ROWS):
+    """Per-row results as Parquet row groups; the overview rides in the schema metadata."""
+    import pyarrow as pa # type: ignore
+    import pyarrow.parquet as pq # type: ignore
+
+    rows = results.get("rows")
+    if rows is None:
+        raise ValueError("Parquet reports need per-row (CSV) results.")
+
+    schema = pa.Schema.from_pandas(rows.iloc[:0], preserve_index=False)
+    schema = schema.with_metadata({
+        **(schema.metadata or {}),
+        b"narrative_nexus.format": FORMAT.encode(),
+        b"narrative_nexus.report": json.dumps(report_overview(results)).encode("utf-8"),
+    })
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in _row_batches(rows, batch_rows):
+            writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
+    return sink
+
+
+WRITERS = {
+    "txt": write_txt,
+    "json": write_json,
+    "html": write_html,
+    "parquet": write_parquet,
+}
+
+
+def write_report(results, sink, fmt="txt", batch_rows=REPORT_BATCH_ROWS):
+    """Write the ``fmt`` report of analysis ``results`` to a binary file-like ``sink``."""
+    writer = WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(f"Unknown report format: {fmt}")
+    rows = results.get("rows")
+    with stage(f"report_{fmt}", len(rows) if rows is not None else None, "rows"):
+        return writer(results, sink, batch_rows)
+
+
+class ReportFile(io.BufferedReader):
+    """A finished report opened for reading; its temporary file is removed once closed."""
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            try:
+                os.remove(self.name)
+            except FileNotFoundError:
+                pass
+
+
+def report_file(results, fmt="txt", batch_rows=REPORT_BATCH_ROWS):
+    """
+    The report written to a temporary file and opened for reading from the
+    start, e.g. as a download button's data, so it is never built in memory.
+    """
+    with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as sink:
+        try:
+            write_report(results, sink, fmt, batch_rows)
+        except BaseException:
+            sink.close()
+            os.remove(sink.name)
+            raise
+    return ReportFile(io.FileIO(sink.name, "rb"))
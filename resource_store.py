@@ -0,0 +1,283 @@
+"""
+Offline NLP resource store: stopwords, a WordNet lemma table and the VADER
+lexicon in one compact binary file, built once from NLTK data and
+memory-mapped read-only at runtime, so worker processes share its pages and
+no NLTK download is ever needed.
+
+    python resource_store.py build [--output PATH] [--vocabulary FILE ...]
+    python resource_store.py info [PATH]
+"""
+import os
+import sys
+import json
+import mmap
+import bisect
+import argparse
+import numpy as np # type: ignore
+from tokenizer import CLEAN_TOKEN_PATTERN
+
+# Default location (overridable through the environment)
+RESOURCE_STORE_PATH = os.environ.get(
+    "NARRATIVE_NEXUS_RESOURCE_STORE", os.path.join("resources", "nlp_resources.bin")
+)
+
+MAGIC = b"NNRSTOR1"
+_ALIGN = 8
+
+
+# ------------ WRITING ------------- #
+
+def _string_table(strings):
+    """Sorted UTF-8 strings as (uint32 offsets[n + 1], blob)."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def write_store(path, stop_words, lemmas, lexicon):
+    """
+    Write a store file. ``lemmas`` maps token -> lemma and should only hold
+    tokens whose lemma differs from the token; ``lexicon`` maps token -> valence.
+    """
+    sections = {}
+    payload = []
+    position = 0
+
+    def add(name, data):
+        nonlocal position
+        padding = (-position) % _ALIGN
+        payload.append(b"\0" * padding)
+        position += padding
+        sections[name] = [position, len(data)]
+        payload.append(data)
+        position += len(data)
+
+    stop_list = sorted(set(stop_words))
+    offsets, blob = _string_table(stop_list)
+    add("stopwords.offsets", offsets.tobytes())
+    add("stopwords.blob", blob)
+
+    lemma_keys = sorted(lemmas)
+    offsets, blob = _string_table(lemma_keys)
+    add("lemmas.offsets", offsets.tobytes())
+    add("lemmas.blob", blob)
+    offsets, blob = _string_table([lemmas[k] for k in lemma_keys])
+    add("lemmas.values.offsets", offsets.tobytes())
+    add("lemmas.values.blob", blob)
+
+    vader_keys = sorted(lexicon)
+    offsets, blob = _string_table(vader_keys)
+    add("vader.offsets", offsets.tobytes())
+    add("vader.blob", blob)
+    add("vader.values", np.asarray([lexicon[k] for k in vader_keys], dtype="<f8").tobytes())
+
+    header = json.dumps({
+        "counts": {"stopwords": len(stop_list), "lemmas": len(lemma_keys), "vader": len(vader_keys)},
+        "sections": sections,
+    }).encode("utf-8")
+    prefix = MAGIC + len(header).to_bytes(4, "little") + header
+    prefix += b"\0" * ((-len(prefix)) % _ALIGN)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        for part in payload:
+            f.write(part)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ------------ READING ------------- #
+
+class _StringTable:
+    """Read-only sorted string array over the mapped file, for ``bisect``."""
+
+    def __init__(self, buffer, offsets, blob_start):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._blob_start = blob_start
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        start = self._blob_start + int(self._offsets[i])
+        return self._buffer[start:self._blob_start + int(self._offsets[i + 1])]
+
+    def index(self, key):
+        """Position of ``key`` (bytes), or -1."""
+        i = bisect.bisect_left(self, key)
+        return i if i < len(self) and self[i] == key else -1
+
+    def strings(self):
+        return [self[i].decode("utf-8") for i in range(len(self))]
+
+
+class ResourceStore:
+    """A memory-mapped store file written by ``write_store``."""
+
+    def __init__(self, path=RESOURCE_STORE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a resource store: {path}")
+        header_len = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 4], "little")
+        start = len(MAGIC) + 4
+        header = json.loads(self._map[start:start + header_len].decode("utf-8"))
+        data_start = start + header_len + (-(start + header_len)) % _ALIGN
+
+        self.counts = header["counts"]
+        self._sections = {name: (data_start + offset, length)
+                          for name, (offset, length) in header["sections"].items()}
+
+        self._stopwords = self._table("stopwords")
+        self._lemma_keys = self._table("lemmas")
+        self._lemma_values = self._table("lemmas.values")
+        self._vader_keys = self._table("vader")
+        offset, length = self._sections["vader.values"]
+        self._vader_values = np.frombuffer(self._map, dtype="<f8", count=length // 8, offset=offset)
+
+    def _table(self, name):
+        offset, length = self._sections[f"{name}.offsets"]
+        offsets = np.frombuffer(self._map, dtype="<u4", count=length // 4, offset=offset)
+        return _StringTable(self._map, offsets, self._sections[f"{name}.blob"][0])
+
+    def stop_words(self):
+        return frozenset(self._stopwords.strings())
+
+    def lemma(self, token):
+        """WordNet noun lemma of ``token``; tokens without an entry are their own lemma."""
+        i = self._lemma_keys.index(token.encode("utf-8"))
+        return self._lemma_values[i].decode("utf-8") if i >= 0 else token
+
+    def valence(self, token):
+        """VADER valence of ``token``, or None when it is not in the lexicon."""
+        i = self._vader_keys.index(token.encode("utf-8"))
+        return float(self._vader_values[i]) if i >= 0 else None
+
+    def vader_lexicon(self):
+        """The VADER lexicon as a read-only mapping over the mapped tables."""
+        return StoreLexicon(self)
+
+    def close(self):
+        self._map.close()
+
+
+class StoreLexicon:
+    """token -> valence lookups (``get``, ``in``, ``[]``) served from a ``ResourceStore`` without copying it."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, token, default=None):
+        value = self.store.valence(token)
+        return default if value is None else value
+
+    def __getitem__(self, token):
+        value = self.store.valence(token)
+        if value is None:
+            raise KeyError(token)
+        return value
+
+    def __contains__(self, token):
+        return self.store.valence(token) is not None
+
+    def __len__(self):
+        return self.store.counts["vader"]
+
+
+class StoreLemmatizer:
+    """Drop-in for ``WordNetLemmatizer`` (noun lemmas) backed by a ``ResourceStore``."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def lemmatize(self, word, pos="n"):
+        return self.store.lemma(word)
+
+
+# ------------ BUILDING FROM NLTK ------------- #
+
+def wordnet_lemma_table(vocabulary=()):
+    """
+    token -> lemma for every token that ``WordNetLemmatizer().lemmatize``
+    changes. Candidates are all noun lemmas, their regular inflections (the
+    morphological rules of WordNet run backwards) and the exception lists,
+    plus ``vocabulary``; each is lemmatized by WordNet itself.
+    """
+    from nltk.corpus import wordnet # type: ignore
+    from nltk.stem import WordNetLemmatizer # type: ignore
+
+    lemmatizer = WordNetLemmatizer()
+    rules = wordnet.MORPHOLOGICAL_SUBSTITUTIONS["n"]
+    candidates = set(vocabulary)
+    for base in wordnet.all_lemma_names(pos="n"):
+        candidates.add(base)
+        for inflected, suffix in rules:
+            if base.endswith(suffix):
+                candidates.add(base[:len(base) - len(suffix)] + inflected)
+    candidates.update(wordnet._exception_map["n"])
+
+    table = {}
+    for token in candidates:
+        # Only tokens clean_text can produce need a lemma entry
+        if CLEAN_TOKEN_PATTERN.fullmatch(token):
+            lemma = lemmatizer.lemmatize(token)
+            if lemma != token:
+                table[token] = lemma
+    return table
+
+
+def build_from_nltk(path=RESOURCE_STORE_PATH, vocabulary=()):
+    """Build the store from locally installed (or downloadable) NLTK data."""
+    from nlp_resources import ensure_nltk_data
+    from sentiment_engine import load_vader_lexicon
+    from nltk.corpus import stopwords # type: ignore
+
+    for resource in ("corpora/stopwords", "corpora/wordnet", "sentiment/vader_lexicon.zip"):
+        ensure_nltk_data(resource)
+    return write_store(
+        path,
+        stop_words=stopwords.words("english"),
+        lemmas=wordnet_lemma_table(vocabulary),
+        lexicon=load_vader_lexicon(),
+    )
+
+
+def _read_vocabulary(paths):
+    """Tokens from plain-text files, or from a lemma cache JSON (``LemmaCache.save``)."""
+    tokens = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                tokens.update(token for token, _ in json.load(f))
+            else:
+                tokens.update(f.read().lower().split())
+    return tokens
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the offline NLP resource store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build the store from NLTK data")
+    build.add_argument("--output", default=RESOURCE_STORE_PATH)
+    build.add_argument("--vocabulary", nargs="*", default=[],
+                       help="extra token files (text, or a saved lemma cache .json)")
+    info = commands.add_parser("info", help="print the entry counts of a store")
+    info.add_argument("path", nargs="?", default=RESOURCE_STORE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        path = build_from_nltk(args.output, _read_vocabulary(args.vocabulary))
+        print(f"Wrote {path} ({os.path.getsize(path):,} bytes)")
+    else:
+        store = ResourceStore(args.path)
+        print(f"{args.path}: " + ", ".join(f"{k}={v:,}" for k, v in store.counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+import re
+import math
+import time
+import string
+import threading
+import numpy as np # type: ignore
+from nlp_resources import ensure_nltk_data, get_resource_store
+
+# VADER constants (Hutto & Gilbert, 2014), as shipped with nltk.sentiment.vader
+B_INCR = 0.293
+B_DECR = -0.293
+C_INCR = 0.733
+N_SCALAR = -0.74
+
+NEGATE = {
+    "aint", "arent", "cannot", "cant", "couldnt", "darent", "didnt", "doesnt",
+    "ain't", "aren't", "can't", "couldn't", "daren't", "didn't", "doesn't",
+    "dont", "hadnt", "hasnt", "havent", "isnt", "mightnt", "mustnt", "neither",
+    "don't", "hadn't", "hasn't", "haven't", "isn't", "mightn't", "mustn't",
+    "neednt", "needn't", "never", "none", "nope", "nor", "not", "nothing",
+    "nowhere", "oughtnt", "shant", "shouldnt", "uhuh", "wasnt", "werent",
+    "oughtn't", "shan't", "shouldn't", "uh-uh", "wasn't", "weren't", "without",
+    "wont", "wouldnt", "won't", "wouldn't", "rarely", "seldom", "despite",
+}
+
+BOOSTER_DICT = {
+    **dict.fromkeys([
+        "absolutely", "amazingly", "awfully", "completely", "considerably",
+        "decidedly", "deeply", "effing", "enormously", "entirely", "especially",
+        "exceptionally", "extremely", "fabulously", "flipping", "flippin",
+        "fricking", "frickin", "frigging", "friggin", "fully", "fucking",
+        "greatly", "hella", "highly", "hugely", "incredibly", "intensely",
+        "majorly", "more", "most", "particularly", "purely", "quite", "really",
+        "remarkably", "so", "substantially", "thoroughly", "totally",
+        "tremendously", "uber", "unbelievably", "unusually", "utterly", "very",
+    ], B_INCR),
+    **dict.fromkeys([
+        "almost", "barely", "hardly", "just enough", "kind of", "kinda", "kindof",
+        "kind-of", "less", "little", "marginally", "occasionally", "partly",
+        "scarcely", "slightly", "somewhat", "sort of", "sorta", "sortof", "sort-of",
+    ], B_DECR),
+}
+
+SPECIAL_CASE_IDIOMS = {
+    "the shit": 3,
+    "the bomb": 3,
+    "bad ass": 1.5,
+    "yeah right": -2,
+    "cut the mustard": 2,
+    "kiss of death": -1.5,
+    "hand to mouth": -2,
+}
+
+PUNC_LIST = {
+    ".", "!", "?", ",", ";", ":", "-", "'", '"',
+    "!!", "!!!", "??", "???", "?!?", "!?!", "?!?!", "!?!?",
+}
+
+_PUNCTUATION = set(string.punctuation)
+_REMOVE_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+_SENTENCE = re.compile(r"[^.!?]+[.!?]*")
+
+LEXICON_RESOURCE = "sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt"
+SCORE_COLUMNS = ["neg", "neu", "pos", "compound"]
+
+
+def load_vader_lexicon(resource=LEXICON_RESOURCE):
+    """Parse NLTK's VADER lexicon into a token -> valence dict."""
+    import nltk # type: ignore
+
+    if resource == LEXICON_RESOURCE:
+        ensure_nltk_data("sentiment/vader_lexicon.zip")
+    lexicon = {}
+    for line in nltk.data.load(resource).split("\n"):
+        word, measure = line.strip().split("\t")[0:2]
+        lexicon[word] = float(measure)
+    return lexicon
+
+
+def split_sentences(text):
+    """Sentences ending in . ! or ?, terminators kept for punctuation emphasis."""
+    return [s.strip() for s in _SENTENCE.findall(text) if s.strip()]
+
+
+class SentimentEngine:
+    """
+    Batch VADER scorer. Produces the same scores as NLTK's
+    SentimentIntensityAnalyzer.polarity_scores, but resolves every lowercase
+    token once against a compiled feature table (valence, booster scalar,
+    negation flag) and strips punctuation per token instead of building the
+    punctuation x word product for every input.
+    """
+
+    def __init__(self, lexicon=None):
+        if lexicon is None:
+            store = get_resource_store()
+            lexicon = store.vader_lexicon() if store is not None else load_vader_lexicon()
+        self.lexicon = lexicon
+        self._features = {}
+        self._lock = threading.Lock()
+        self.sentences_scored = 0
+        self.seconds = 0.0
+
+    # -------- token features -------- #
+
+    def _feature(self, lower):
+        """(valence or None, booster scalar, negates) for a lowercase token."""
+        feature = self._features.get(lower)
+        if feature is None:
+            feature = (
+                self.lexicon.get(lower),
+                BOOSTER_DICT.get(lower, 0.0),
+                lower in NEGATE or "n't" in lower,
+            )
+            if len(self._features) < 500000:
+                self._features[lower] = feature
+        return feature
+
+    def _tokens(self, text):
+        """VADER's words_and_emoticons: leading/trailing punctuation stripped."""
+        words_only = {w for w in _REMOVE_PUNCTUATION.sub("", text).split() if len(w) > 1}
+        tokens = []
+        for token in text.split():
+            if len(token) <= 1:
+                continue
+            if token[0] in _PUNCTUATION:
+                word = token.lstrip(string.punctuation)
+                if word in words_only and token[:len(token) - len(word)] in PUNC_LIST:
+                    token = word
+            elif token[-1] in _PUNCTUATION:
+                word = token.rstrip(string.punctuation)
+                if word in words_only and token[len(word):] in PUNC_LIST:
+                    token = word
+            tokens.append(token)
+        return tokens
+
+    # -------- scoring -------- #
+
+    def polarity_scores(self, text):
+        """Score one text; returns VADER's neg/neu/pos/compound dict."""
+        neg, neu, pos, compound = self._score(text)
+        return {"neg": neg, "neu": neu, "pos": pos, "compound": compound}
+
+    def score_batch(self, sentences):
+        """Score a list of sentences; returns an (n, 4) array of neg, neu, pos, compound."""
+        began = time.perf_counter()
+        scores = np.array([self._score(s) for s in sentences], dtype=float).reshape(-1, 4)
+        elapsed = time.perf_counter() - began
+        with self._lock:
+            self.sentences_scored += len(sentences)
+            self.seconds += elapsed
+        return scores
+
+    def score_document(self, text):
+        """Per-sentence scores plus their mean as the document aggregate."""
+        sentences = split_sentences(text)
+        began = time.perf_counter()
+        scores = self.score_batch(sentences)
+        elapsed = time.perf_counter() - began
+
+        return {
+            "sentences": sentences,
+            "scores": scores,
+            "aggregate": self._aggregate(scores),
+            "sentences_per_second": len(sentences) / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def score_documents(self, texts):
+        """
+        Document aggregates (as in ``score_document``) for many texts, with
+        the sentences of all of them scored in a single batch.
+        """
+        sentences = [split_sentences(text) for text in texts]
+        bounds = np.cumsum([0] + [len(s) for s in sentences])
+        scores = self.score_batch([s for doc in sentences for s in doc])
+        return [self._aggregate(scores[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    @staticmethod
+    def _aggregate(scores):
+        if not len(scores):
+            return dict.fromkeys(SCORE_COLUMNS, 0.0)
+        means = scores.mean(axis=0)
+        return {
+            "neg": round(float(means[0]), 3),
+            "neu": round(float(means[1]), 3),
+            "pos": round(float(means[2]), 3),
+            "compound": round(float(means[3]), 4),
+        }
+
+    def throughput(self):
+        """Sentences per second over every batch scored so far."""
+        return self.sentences_scored / self.seconds if self.seconds > 0 else 0.0
+
+    def _score(self, text):
+        tokens = self._tokens(text)
+        if not tokens:
+            return 0.0, 0.0, 0.0, 0.0
+
+        n = len(tokens)
+        lowers = [t.lower() for t in tokens]
+        features = [self._feature(lower) for lower in lowers]
+        allcaps = sum(1 for t in tokens if t.isupper())
+        is_cap_diff = 0 < n - allcaps < n
+
+        # VADER scores every repeat of a token at its first position
+        first_index = {}
+        for idx, token in enumerate(tokens):
+            first_index.setdefault(token, idx)
+
+        sentiments = []
+        for token in tokens:
+            i = first_index[token]
+            lower = lowers[i]
+            valence, booster, _ = features[i]
+            if booster or valence is None or (lower == "kind" and i < n - 1 and lowers[i + 1] == "of"):
+                sentiments.append(0)
+                continue
+
+            if token.isupper() and is_cap_diff:
+                valence = valence + C_INCR if valence > 0 else valence - C_INCR
+
+            for start_i in range(3):
+                j = i - (start_i + 1)
+                if i > start_i and features[j][0] is None:
+                    s = self._scalar_inc_dec(tokens[j], features[j][1], valence, is_cap_diff)
+                    if start_i == 1 and s != 0:
+                        s = s * 0.95
+                    if start_i == 2 and s != 0:
+                        s = s * 0.9
+                    valence = valence + s
+                    valence = self._never_check(valence, tokens, features, start_i, i)
+                    if start_i == 2:
+                        valence = self._idioms_check(valence, tokens, i)
+
+            valence = self._least_check(valence, lowers, features, i)
+            sentiments.append(valence)
+
+        if "but" in lowers:
+            bi = lowers.index("but")
+            sentiments = [
+                s * 0.5 if idx < bi else s * 1.5 if idx > bi else s
+                for idx, s in enumerate(sentiments)
+            ]
+
+        return self._score_valence(sentiments, text)
+
+    @staticmethod
+    def _scalar_inc_dec(word, booster, valence, is_cap_diff):
+        if not booster:
+            return 0.0
+        scalar = -booster if valence < 0 else booster
+        if word.isupper() and is_cap_diff:
+            scalar = scalar + C_INCR if valence > 0 else scalar - C_INCR
+        return scalar
+
+    @staticmethod
+    def _never_check(valence, tokens, features, start_i, i):
+        if start_i == 0:
+            if features[i - 1][2]:
+                valence = valence * N_SCALAR
+        elif start_i == 1:
+            if tokens[i - 2] == "never" and tokens[i - 1] in ("so", "this"):
+                valence = valence * 1.5
+            elif features[i - 2][2]:
+                valence = valence * N_SCALAR
+        else:
+            if (tokens[i - 3] == "never" and tokens[i - 2] in ("so", "this")) \
+                    or tokens[i - 1] in ("so", "this"):
+                valence = valence * 1.25
+            elif features[i - 3][2]:
+                valence = valence * N_SCALAR
+        return valence
+
+    @staticmethod
+    def _idioms_check(valence, tokens, i):
+        onezero = f"{tokens[i - 1]} {tokens[i]}"
+        twoonezero = f"{tokens[i - 2]} {tokens[i - 1]} {tokens[i]}"
+        twoone = f"{tokens[i - 2]} {tokens[i - 1]}"
+        threetwoone = f"{tokens[i - 3]} {tokens[i - 2]} {tokens[i - 1]}"
+        threetwo = f"{tokens[i - 3]} {tokens[i - 2]}"
+
+        for seq in (onezero, twoonezero, twoone, threetwoone, threetwo):
+            if seq in SPECIAL_CASE_IDIOMS:
+                valence = SPECIAL_CASE_IDIOMS[seq]
+                break
+
+        if len(tokens) - 1 > i:
+            zeroone = f"{tokens[i]} {tokens[i + 1]}"
+            if zeroone in SPECIAL_CASE_IDIOMS:
+                valence = SPECIAL_CASE_IDIOMS[zeroone]
+        if len(tokens) - 1 > i + 1:
+            zeroonetwo = f"{tokens[i]} {tokens[i + 1]} {tokens[i + 2]}"
+            if zeroonetwo in SPECIAL_CASE_IDIOMS:
+                valence = SPECIAL_CASE_IDIOMS[zeroonetwo]
+
+        # booster/dampener bi-grams such as 'sort of' or 'kind of'
+        if threetwo in BOOSTER_DICT or twoone in BOOSTER_DICT:
+            valence = valence + B_DECR
+        return valence
+
+    @staticmethod
+    def _least_check(valence, lowers, features, i):
+        if i > 1 and features[i - 1][0] is None and lowers[i - 1] == "least":
+            if lowers[i - 2] != "at" and lowers[i - 2] != "very":
+                valence = valence * N_SCALAR
+        elif i > 0 and features[i - 1][0] is None and lowers[i - 1] == "least":
+            valence = valence * N_SCALAR
+        return valence
+
+    @staticmethod
+    def _score_valence(sentiments, text):
+        sum_s = float(sum(sentiments))
+
+        # emphasis from exclamation points (up to 4) and question marks (2 or more)
+        ep_amplifier = min(text.count("!"), 4) * 0.292
+        qm_count = text.count("?")
+        qm_amplifier = 0
+        if qm_count > 1:
+            qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+        punct_emph_amplifier = ep_amplifier + qm_amplifier
+
+        if sum_s > 0:
+            sum_s += punct_emph_amplifier
+        elif sum_s < 0:
+            sum_s -= punct_emph_amplifier
+        compound = sum_s / math.sqrt((sum_s * sum_s) + 15)
+
+        pos_sum = 0.0
+        neg_sum = 0.0
+        neu_count = 0
+        for score in sentiments:
+            if score > 0:
+                pos_sum += float(score) + 1
+            elif score < 0:
+                neg_sum += float(score) - 1
+            else:
+                neu_count += 1
+
+        if pos_sum > math.fabs(neg_sum):
+            pos_sum += punct_emph_amplifier
+        elif pos_sum < math.fabs(neg_sum):
+            neg_sum -= punct_emph_amplifier
+
+        total = pos_sum + math.fabs(neg_sum) + neu_count
+        return (
+            round(math.fabs(neg_sum / total), 3),
+            round(math.fabs(neu_count / total), 3),
+            round(math.fabs(pos_sum / total), 3),
+            round(compound, 4),
+        )
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Process-wide engine; the lexicon is parsed once."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SentimentEngine()
+    return _engine
+
+
+def compare_with_nltk(texts, engine=None, tolerance=1e-3):
+    """
+    Score ``texts`` with both this engine and NLTK's analyzer.
+    Returns: (max_abs_difference, within_tolerance, speedup)
+    """
+    from nltk.sentiment import SentimentIntensityAnalyzer # type: ignore
+
+    engine = engine or get_engine()
+    reference = SentimentIntensityAnalyzer()
+
+    began = time.perf_counter()
+    expected = np.array([[reference.polarity_scores(t)[k] for k in SCORE_COLUMNS] for t in texts])
+    nltk_seconds = time.perf_counter() - began
+
+    began = time.perf_counter()
+    actual = engine.score_batch(list(texts))
+    engine_seconds = time.perf_counter() - began
+
+    difference = float(np.abs(expected - actual).max()) if len(texts) else 0.0
+    speedup = nltk_seconds / engine_seconds if engine_seconds > 0 else float("inf")
+    return difference, difference <= tolerance, speedup
@@ -0,0 +1,356 @@
+"""
+Asyncio HTTP API over the extract -> preprocess -> analyze pipeline, using
+only the standard library.
+
+    python service.py --host 0.0.0.0 --port 8080 --workers 4
+
+    POST /analyze   JSON {"text": "...", "n_tokens": 12, "n_topics": 0}, or a raw
+                    TXT/PDF/CSV body with ?filename=report.pdf[&n_tokens=..]
+    GET  /health    queue depth, in-flight batches and counters
+
+Concurrent requests are micro-batched. After the first request arrives, the
+batcher waits up to BATCH_WAIT_MS for more, up to BATCH_SIZE in total. It
+sends them to the process pool as one task, where their texts are cleaned
+and sentiment-scored together. Only MAX_INFLIGHT batches run at once. When
+MAX_QUEUE requests are already waiting, new ones get 503 with Retry-After.
+"""
+import io
+import os
+import sys
+import json
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures.process import BrokenProcessPool
+
+# Service limits (overridable through the environment)
+MAX_QUEUE = int(os.environ.get("NARRATIVE_NEXUS_SERVICE_MAX_QUEUE", "256"))
+BATCH_SIZE = int(os.environ.get("NARRATIVE_NEXUS_SERVICE_BATCH_SIZE", "32"))
+BATCH_WAIT_MS = float(os.environ.get("NARRATIVE_NEXUS_SERVICE_BATCH_WAIT_MS", "10"))
+MAX_INFLIGHT = int(os.environ.get("NARRATIVE_NEXUS_SERVICE_MAX_INFLIGHT", "0"))  # 0: one per worker
+MAX_BODY_MB = float(os.environ.get("NARRATIVE_NEXUS_SERVICE_MAX_BODY_MB", "50"))
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ------------ POOL-SIDE ANALYSIS ------------- #
+
+def analyze_requests(jobs):
+    """
+    Worker task: one result per job. Each job has ``text`` or ``data`` plus
+    ``filename``, and ``n_tokens``/``n_topics``. TXT/PDF texts from the whole
+    batch are cleaned and sentiment-scored together; CSVs are analyzed per job.
+    """
+    import pandas as pd # type: ignore
+    from data_extractor import extract_text_from_file
+    from data_preprocessing import preprocess_text, clean_text_series
+    from metrics import analyze_texts, topics_from_documents
+    from batch_analyze import csv_record
+    from tokenizer import sentences
+
+    results = [None] * len(jobs)
+    texts, text_jobs = [], []
+    for index, job in enumerate(jobs):
+        try:
+            if "text" in job:
+                text, file_type, df = job["text"], "txt", None
+            else:
+                upload = io.BytesIO(job["data"])
+                upload.name = job["filename"]
+                upload.size = len(job["data"])
+                text, file_type, df, error = extract_text_from_file(uploaded_file=upload)
+                if error:
+                    raise ValueError(error)
+
+            if file_type == "csv":
+                processed, error = preprocess_text(file_type="csv", df=df, workers=1)
+                if error:
+                    raise ValueError(error)
+                results[index] = {"status": "ok", "file_type": "csv",
+                                  **csv_record(processed, job["n_tokens"], job["n_topics"])}
+            else:
+                texts.append(text)
+                text_jobs.append(index)
+        except Exception as e:
+            results[index] = {"status": "error", "error": str(e)}
+
+    if texts:
+        try:
+            # Batch cleaning matches clean_text cell by cell
+            cleaned = clean_text_series(pd.Series(texts)).tolist()
+            n_tokens = max(jobs[i]["n_tokens"] for i in text_jobs)
+            for index, text, record in zip(text_jobs, cleaned, analyze_texts(cleaned, n_tokens)):
+                job = jobs[index]
+                record["tokens"] = record["tokens"][:job["n_tokens"]]
+                if job["n_topics"]:
+                    record["topics"] = topics_from_documents(sentences(text), job["n_topics"], model_name="service",
+                                                             persist=False)
+                results[index] = {"status": "ok", "file_type": job.get("file_type", "txt"), **record}
+        except Exception as e:
+            for index in text_jobs:
+                results[index] = {"status": "error", "error": f"Preprocessing error: {str(e)}"}
+    return results
+
+
+# ------------ SERVICE ------------- #
+
+class AnalysisService:
+    """Bounded request queue, micro-batcher and HTTP front end."""
+
+    def __init__(self, workers=None, max_queue=MAX_QUEUE, batch_size=BATCH_SIZE,
+                 batch_wait_ms=BATCH_WAIT_MS, max_inflight=MAX_INFLIGHT, max_body_mb=MAX_BODY_MB):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self.max_inflight = max_inflight or self.workers
+        self.max_body = int(max_body_mb * 1024 * 1024)
+        self.counters = {"requests": 0, "rejected": 0, "batches": 0, "batched_requests": 0, "errors": 0,
+                         "pool_restarts": 0}
+        self.inflight = 0
+        self.queue = None
+        self.pool = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        from data_preprocessing import get_process_pool
+
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self.pool = get_process_pool(self.workers)
+        self._batcher = asyncio.create_task(self._run_batches())
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def submit(self, job):
+        """Queue one job and wait for its result; raises 503 when the queue is full."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((job, future))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise HTTPError(503, "Analysis queue is full, retry later.")
+        self.counters["requests"] += 1
+        return await future
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Waiting for a slot here is what lets the queue fill up and push back
+            await self._slots.acquire()
+            asyncio.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        self.inflight += 1
+        self.counters["batches"] += 1
+        self.counters["batched_requests"] += len(batch)
+        try:
+            jobs = [job for job, _ in batch]
+            try:
+                results = await self._analyze(jobs)
+            except BrokenProcessPool:
+                # A worker died (OOM, crash): replace the pool and retry this
+                # batch once; if it breaks the pool again, only it fails
+                self._replace_pool()
+                results = await self._analyze(jobs)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.inflight -= 1
+            self._slots.release()
+
+    async def _analyze(self, jobs):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, analyze_requests, jobs)
+
+    def _replace_pool(self):
+        from data_preprocessing import get_process_pool
+
+        pool = get_process_pool(self.workers, broken=self.pool)
+        if pool is not self.pool:
+            self.pool = pool
+            self.counters["pool_restarts"] += 1
+
+    def health(self):
+        batches = self.counters["batches"]
+        return {
+            "status": "ok",
+            "queue_depth": self.queue.qsize(),
+            "max_queue": self.max_queue,
+            "inflight_batches": self.inflight,
+            "max_inflight": self.max_inflight,
+            "workers": self.workers,
+            "mean_batch_size": round(self.counters["batched_requests"] / batches, 2) if batches else 0.0,
+            **self.counters,
+        }
+
+    # -------- HTTP -------- #
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, url, headers, body = request
+                    status, payload = 200, await self._route(method, url, headers, body)
+                except HTTPError as e:
+                    status, payload, headers = e.status, {"error": str(e)}, {"connection": "close"}
+                except Exception as e:
+                    self.counters["errors"] += 1
+                    status, payload, headers = 500, {"error": str(e)}, {"connection": "close"}
+
+                if payload.get("status") == "error":
+                    status = 422
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line.")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+            if len(headers) > 100:
+                raise HTTPError(400, "Too many headers.")
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "Chunked bodies are not supported; send Content-Length.")
+        length = headers.get("content-length", "0") or "0"
+        # Digits only: no sign, spaces inside or other numerals int() would accept
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPError(400, "Malformed Content-Length.")
+        length = int(length)
+        if length > self.max_body:
+            raise HTTPError(413, f"Body exceeds {self.max_body:,} bytes.")
+        try:
+            body = await reader.readexactly(length) if length else b""
+        except asyncio.IncompleteReadError:
+            raise HTTPError(400, "Body is shorter than Content-Length.")
+        return method.upper(), urlsplit(target), headers, body
+
+    async def _route(self, method, url, headers, body):
+        if url.path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "Use GET.")
+            return self.health()
+        if url.path == "/analyze":
+            if method != "POST":
+                raise HTTPError(405, "Use POST.")
+            return await self.submit(_parse_job(url, headers, body))
+        raise HTTPError(404, f"No route for {url.path}.")
+
+
+def _parse_job(url, headers, body):
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    if headers.get("content-type", "").split(";")[0].strip() == "application/json":
+        try:
+            fields = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON.")
+        if not isinstance(fields, dict) or not isinstance(fields.get("text"), str):
+            raise HTTPError(400, 'JSON body needs a "text" string.')
+        job = {"text": fields["text"]}
+    else:
+        filename = query.get("filename")
+        if not filename:
+            raise HTTPError(400, "Raw uploads need ?filename= with a .txt, .pdf or .csv extension.")
+        fields = {}
+        job = {"data": body, "filename": filename, "file_type": filename.rsplit(".", 1)[-1].lower()}
+
+    try:
+        job["n_tokens"] = int(fields.get("n_tokens", query.get("n_tokens", 12)))
+        job["n_topics"] = int(fields.get("n_topics", query.get("n_topics", 0)))
+    except (TypeError, ValueError):
+        raise HTTPError(400, "n_tokens and n_topics must be integers.")
+    return job
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode("utf-8")
+    head = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if status == 503:
+        head.append("Retry-After: 1")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def serve(host="127.0.0.1", port=8080, **options):
+    service = AnalysisService(**options)
+    server = await service.start(host, port)
+    print(f"Narrative Nexus service on http://{host}:{port} "
+          f"({service.workers} workers, queue {service.max_queue}, batch {service.batch_size})")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Narrative Nexus analysis HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE, help="queued requests before 503")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--batch-wait-ms", type=float, default=BATCH_WAIT_MS)
+    parser.add_argument("--max-inflight", type=int, default=MAX_INFLIGHT, help="batches in the pool at once")
+    args = parser.parse_args(argv)
+
+    from data_preprocessing import shutdown_process_pool
+    try:
+        asyncio.run(serve(
+            args.host, args.port, workers=args.workers, max_queue=args.max_queue,
+            batch_size=args.batch_size, batch_wait_ms=args.batch_wait_ms, max_inflight=args.max_inflight,
+        ))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_process_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Extractive summarization. Sentences are ranked by TextRank centrality over
+their TF-IDF cosine-similarity graph, and the best ones are returned in
+document order.
+
+The graph is never materialized: with unit-length TF-IDF rows ``X`` the edge
+weights are ``X @ X.T`` minus its diagonal, so each power-iteration step is
+two sparse products, O(nnz(X)), and memory grows linearly with the text.
+"""
+import os
+import time
+import numpy as np # type: ignore
+from tokenizer import tokenize
+from topic_engine import topic_terms
+from vocabulary import Vocabulary
+
+# Configuration (overridable through the environment)
+SUMMARY_SENTENCES = int(os.environ.get("NARRATIVE_NEXUS_SUMMARY_SENTENCES", "5"))
+DAMPING = 0.85
+TOLERANCE = 1e-6
+MAX_ITER = 100
+# A candidate this similar to a sentence already picked adds nothing new
+MAX_OVERLAP = 0.7
+# Top-ranked sentences considered for the summary, checked a block at a time
+MAX_CANDIDATES = 2048
+CANDIDATE_BLOCK = 256
+
+
+def sentence_matrix(sentences):
+    """Unit-length TF-IDF rows (sentences x interned terms)."""
+    from scipy.sparse import csr_matrix # type: ignore
+    from sklearn.feature_extraction.text import TfidfTransformer # type: ignore
+
+    vocabulary = Vocabulary()
+    ids, indptr = vocabulary.encode_documents(topic_terms(s) for s in sentences)
+    counts = csr_matrix(
+        (np.ones(len(ids)), ids, indptr), shape=(len(sentences), max(len(vocabulary), 1))
+    )
+    counts.sum_duplicates()
+    return TfidfTransformer(sublinear_tf=True).fit_transform(counts)
+
+
+def textrank(X, damping=DAMPING, tol=TOLERANCE, max_iter=MAX_ITER):
+    """
+    (scores, iterations) of PageRank over the graph ``X @ X.T`` without self
+    loops. Sentences with no similar sentence spread their rank uniformly.
+    """
+    n = X.shape[0]
+    XT = X.T.tocsr()
+    self_weight = np.asarray(X.multiply(X).sum(axis=1)).ravel()
+
+    def weights(v):
+        return X @ (XT @ v) - self_weight * v
+
+    degree = weights(np.ones(n))
+    dangling = degree <= 1e-12
+    inverse = np.divide(1.0, degree, out=np.zeros(n), where=~dangling)
+
+    scores = np.full(n, 1.0 / n)
+    for iteration in range(1, max_iter + 1):
+        spread = weights(scores * inverse) + scores[dangling].sum() / n
+        updated = (1 - damping) / n + damping * spread
+        delta = np.abs(updated - scores).sum()
+        scores = updated
+        if delta < tol:
+            break
+    return scores, iteration
+
+
+def pick_sentences(X, scores, n_sentences=SUMMARY_SENTENCES, max_overlap=MAX_OVERLAP,
+                   max_candidates=MAX_CANDIDATES):
+    """
+    Rows of ``X`` with terms, by descending score, skipping any whose cosine
+    similarity to a row already picked exceeds ``max_overlap``. Only the top
+    ``max_candidates`` are scanned, a block at a time: one product checks a
+    block against the picked rows, and a second the survivors among themselves.
+    """
+    order = np.argsort(-scores, kind="stable")
+    order = order[np.diff(X.indptr)[order] > 0][:max_candidates]
+    chosen = []
+    for start in range(0, len(order), CANDIDATE_BLOCK):
+        block = order[start:start + CANDIDATE_BLOCK]
+        if chosen:
+            block = block[(X[block] @ X[chosen].T).max(axis=1).toarray().ravel() <= max_overlap]
+        if not len(block):
+            continue
+        within = (X[block] @ X[block].T).toarray()
+        picked = []
+        for k in range(len(block)):
+            if picked and within[k, picked].max() > max_overlap:
+                continue
+            picked.append(k)
+            if len(chosen) + len(picked) == n_sentences:
+                break
+        chosen.extend(block[picked].tolist())
+        if len(chosen) == n_sentences:
+            break
+    return sorted(chosen)
+
+
+def summarize(text, n_sentences=SUMMARY_SENTENCES, max_overlap=MAX_OVERLAP):
+    """
+    The ``n_sentences`` most central sentences of ``text``, in document
+    order, skipping near-repeats of sentences already chosen.
+    """
+    began = time.perf_counter()
+    lowered = text.lower()
+    # Offsets carry over to the original unless lowercasing changed its length
+    sentences = tokenize(lowered).sentences(text if len(lowered) == len(text) else lowered)
+    chosen, scores, iterations = [], np.zeros(len(sentences)), 0
+
+    X = sentence_matrix(sentences) if sentences else None
+    if X is not None and X.nnz:
+        scores, iterations = textrank(X)
+        chosen = pick_sentences(X, scores, n_sentences, max_overlap)
+
+    picked = [" ".join(sentences[i].split()) for i in chosen]
+    return {
+        "text": " ".join(f"{s}." for s in picked),
+        "sentences": picked,
+        "indices": chosen,
+        "scores": [round(float(scores[i]), 6) for i in chosen],
+        "total_sentences": len(sentences),
+        "iterations": iterations,
+        "seconds": round(time.perf_counter() - began, 4),
+    }
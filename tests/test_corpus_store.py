@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import threading
+import pandas as pd # type: ignore
+import pytest # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_store import (
+    CorpusWriter, CorpusStore, store_exists, new_store_path, prune_stores, touch_store, CURRENT_FILE,
+)
+
+
+def write(path, generation, rows=3):
+    """A store whose every row holds the tokens ``g<generation>`` and ``shared``."""
+    writer = CorpusWriter(path, "csv", ["text"])
+    writer.write_frame(pd.DataFrame({"text": [f"g{generation} shared"] * rows}))
+    return writer.close()
+
+
+def read(path):
+    store = CorpusStore(path)
+    try:
+        vocabulary = store.vocabulary()
+        ids, indptr = store.token_ids()
+        return store.frame()["text"].tolist(), [vocabulary.terms[i] for i in ids], indptr.tolist()
+    finally:
+        store.close()
+
+
+def current(path):
+    with open(os.path.join(path, CURRENT_FILE), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_round_trip(tmp_path):
+    path = new_store_path(str(tmp_path))
+    write(path, 1)
+    assert store_exists(path)
+    texts, terms, indptr = read(path)
+    assert texts == ["g1 shared"] * 3
+    assert terms == ["g1", "shared"] * 3 and indptr == [0, 2, 4, 6]
+
+
+def test_failed_writer_leaves_current_unchanged(tmp_path):
+    path = str(tmp_path / "store")
+    write(path, 1)
+    published = current(path)
+
+    writer = CorpusWriter(path, "csv", ["text"])
+    writer.write_frame(pd.DataFrame({"text": ["g2 shared"]}))
+    writer.abort()
+
+    assert current(path) == published
+    assert sorted(os.listdir(path)) == sorted([CURRENT_FILE, published])
+    assert read(path)[0] == ["g1 shared"] * 3
+
+
+def test_readers_see_a_consistent_pair_during_writes(tmp_path):
+    path = str(tmp_path / "store")
+    write(path, 0)
+    errors = []
+    writing = threading.Event()
+
+    def writer():
+        for generation in range(1, 30):
+            write(path, generation, rows=generation % 4 + 1)
+        writing.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        while not writing.is_set():
+            texts, terms, indptr = read(path)
+            generation = texts[0].split()[0]
+            if texts != [f"{generation} shared"] * len(texts) or terms != [generation, "shared"] * len(texts):
+                errors.append((texts, terms))
+    finally:
+        thread.join()
+    assert not errors
+    # Superseded versions are removed once replaced
+    assert len(os.listdir(path)) == 2
+
+
+def test_prune_removes_only_stores_unused_for_the_ttl(tmp_path):
+    root = str(tmp_path)
+    old, touched, fresh = (new_store_path(root) for _ in range(3))
+    for generation, path in enumerate((old, touched, fresh)):
+        write(path, generation)
+    hour_ago = time.time() - 3600
+    for path in (old, touched):
+        os.utime(path, (hour_ago, hour_ago))
+    touch_store(touched)
+
+    prune_stores(root, ttl=600)
+    assert [store_exists(p) for p in (old, touched, fresh)] == [False, True, True]
+    prune_stores(str(tmp_path / "missing"), ttl=600)
+
+
+def test_opening_a_reader_keeps_the_store(tmp_path):
+    path = new_store_path(str(tmp_path))
+    write(path, 1)
+    hour_ago = time.time() - 3600
+    os.utime(path, (hour_ago, hour_ago))
+    CorpusStore(path).close()
+    prune_stores(str(tmp_path), ttl=600)
+    assert store_exists(path)
@@ -0,0 +1,55 @@
+import sys
+import os
+import random
+import numpy as np # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import find_duplicates, signatures
+
+
+def near_duplicates(n_bases=300, n_documents=2000, seed=0):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(2000)]
+    bases = [rng.choices(words, k=30) for _ in range(n_bases)]
+    documents = []
+    for _ in range(n_documents):
+        tokens = list(rng.choice(bases))
+        for _ in range(rng.randrange(3)):
+            tokens[rng.randrange(len(tokens))] = rng.choice(words)
+        documents.append(" ".join(tokens))
+    return documents
+
+
+def test_every_member_is_similar_to_its_representative():
+    documents = near_duplicates()
+    clusters = find_duplicates(documents, threshold=0.8)
+    signed = signatures(documents)
+    representatives = clusters.representatives[clusters.cluster]
+    similarity = (signed == signed[representatives]).mean(axis=1)
+    assert clusters.summary()["duplicates"] > 0
+    assert (similarity >= 0.8).all()
+
+
+def test_chains_are_not_merged():
+    # Each document drifts one more token from the first; neighbours are
+    # similar, but the ends of the chain are not
+    tokens = [f"t{i}" for i in range(40)]
+    chain = []
+    for step in range(12):
+        drifted = list(tokens)
+        for k in range(step):
+            drifted[k] = f"x{k}"
+        chain.append(" ".join(drifted))
+    clusters = find_duplicates(chain, threshold=0.8)
+    signed = signatures(chain)
+    representatives = clusters.representatives[clusters.cluster]
+    assert len(clusters) > 1
+    assert ((signed == signed[representatives]).mean(axis=1) >= 0.8).all()
+
+
+def test_exact_duplicates_share_the_first_row():
+    clusters = find_duplicates(["a b c d", "e f g h", "a b c d", "", ""])
+    assert clusters.cluster.tolist() == [0, 1, 0, 2, 2]
+    assert clusters.representatives.tolist() == [0, 1, 3]
+    assert np.array_equal(clusters.weights, [2, 1, 2])
@@ -0,0 +1,89 @@
+import sys
+import os
+import time
+import threading
+import pytest # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobs import JobManager
+
+
+def wait(job, timeout=5):
+    deadline = time.time() + timeout
+    while not job.done:
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return job
+
+
+def finish(manager, value):
+    return wait(manager.submit(lambda job: value))
+
+
+def test_result_and_stages():
+    manager = JobManager(workers=1)
+
+    def work(job):
+        job.start_stage("count")
+        job.progress(0.5, "halfway")
+        job.start_stage("report")
+        return 42
+
+    job = wait(manager.submit(work, stages=("count", "report", "unused")))
+    assert job.status == "done" and job.result == 42
+    snapshot = job.snapshot()
+    assert [s["status"] for s in snapshot["stages"].values()] == ["done", "done", "skipped"]
+
+    failed = wait(manager.submit(lambda job: 1 / 0))
+    assert failed.status == "error" and "division" in failed.error and failed.result is None
+
+
+def test_results_survive_repeated_reads():
+    manager = JobManager(workers=1)
+    job = finish(manager, {"words": 800})
+    for _ in range(3):
+        assert manager.get(job.id).result == {"words": 800}
+
+
+def test_finished_jobs_expire_after_ttl():
+    manager = JobManager(workers=1, ttl=60)
+    old = finish(manager, "old")
+    recent = finish(manager, "recent")
+    old.finished -= 61
+
+    finish(manager, "new")
+    assert manager.get(old.id) is None
+    assert manager.get(recent.id).result == "recent"
+
+
+def test_history_evicts_oldest_finished_jobs_only():
+    manager = JobManager(workers=2, history=3)
+    release = threading.Event()
+    running = manager.submit(lambda job: release.wait(5) and "slow")
+    finished = [finish(manager, i) for i in range(3)]
+
+    # The running job is never evicted, however old
+    assert manager.get(running.id) is running
+    assert manager.get(finished[0].id) is None
+    assert [manager.get(j.id).result for j in finished[1:]] == [1, 2]
+    finish(manager, 3)
+    assert manager.get(finished[1].id) is None and manager.get(running.id) is running
+
+    release.set()
+    assert wait(running).result == "slow"
+
+
+def test_queue_position():
+    manager = JobManager(workers=1)
+    release = threading.Event()
+    first = manager.submit(lambda job: release.wait(5))
+    second = manager.submit(lambda job: None)
+    third = manager.submit(lambda job: None)
+    while first.status == "queued":
+        time.sleep(0.01)
+    assert manager.queue_position(first.id) == 0
+    assert (manager.queue_position(second.id), manager.queue_position(third.id)) == (1, 2)
+    assert manager.stats()["queued"] == 2
+    release.set()
+    wait(third)
@@ -0,0 +1,98 @@
+import sys
+import os
+import pandas as pd # type: ignore
+import pytest # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_preprocessing import (
+    clean_text, clean_pages, clean_text_series, split_text_chunks,
+    parallel_clean_text, parallel_clean_frame, shutdown_process_pool,
+)
+
+CELLS = [
+    "The QUICK brown Foxes were JUMPING over the lazy dogs.",
+    "Café naïve — résumé; ÀÉÎ ÕÜ straße",
+    "",
+    "   \t\n ",
+    "Numbers 123 and 4.5, e-mail: someone@example.com!",
+    "line\nbreak\tTAB  double  spaces",
+    "日本語のテキスト and emoji 🙂 mixed",
+    "a\x00cell holding the row break",
+    42,
+]
+
+MISSING = [None, float("nan")]
+
+TEXT = "\n\n".join(c for c in CELLS if isinstance(c, str)) * 20
+
+
+@pytest.fixture(scope="module", autouse=True)
+def process_pool():
+    yield
+    shutdown_process_pool()
+
+
+@pytest.mark.parametrize("cells", [
+    CELLS,
+    [c for c in CELLS if isinstance(c, str) and "\x00" not in c],
+    ["", ""],
+    ["SHOUTING ONLY"],
+    [],
+], ids=["mixed", "strings", "empty", "uppercase", "no-rows"])
+def test_clean_text_series_matches_apply(cells):
+    series = pd.Series(cells, dtype=object, name="review", index=range(10, 10 + len(cells)))
+    expected = series.astype(str).apply(clean_text)
+    result = clean_text_series(series)
+    assert result.tolist() == expected.tolist()
+    assert result.index.equals(series.index) and result.name == "review"
+
+
+@pytest.mark.parametrize("missing", MISSING, ids=["none", "nan"])
+def test_clean_text_series_rejects_missing_cells_like_apply(missing):
+    series = pd.Series(["fine text", missing], dtype=object)
+    with pytest.raises(AttributeError):
+        series.astype(str).apply(clean_text)
+    with pytest.raises(AttributeError):
+        clean_text_series(series)
+
+
+@pytest.mark.parametrize("page_size", [1, 7, 64, 10_000])
+def test_clean_pages_matches_joined_text(page_size):
+    pages = [TEXT[i:i + page_size] for i in range(0, len(TEXT), page_size)]
+    assert clean_pages(pages) == clean_text("".join(pages))
+
+
+def test_clean_pages_of_nothing():
+    assert clean_pages([]) == ""
+    assert clean_pages(["", "  "]) == ""
+
+
+def test_uppercase_words_are_kept_whole():
+    assert clean_text("The QUICK brown FOX") == "quick brown fox"
+    assert clean_text_series(pd.Series(["HELLO WORLD"])).tolist() == ["hello world"]
+
+
+@pytest.mark.parametrize("chunk_size", [16, 100, 1000])
+def test_split_text_chunks_cuts_on_whitespace(chunk_size):
+    chunks = split_text_chunks(TEXT, chunk_size)
+    assert "".join(chunks) == TEXT
+    assert all(chunk[-1].isspace() for chunk in chunks[:-1])
+    assert split_text_chunks("", chunk_size) == []
+
+
+def test_split_text_chunks_without_whitespace():
+    assert split_text_chunks("x" * 50, 16) == ["x" * 50]
+
+
+def test_parallel_clean_text_matches_serial():
+    assert parallel_clean_text(TEXT, workers=2, chunk_size=200) == clean_text(TEXT)
+    assert parallel_clean_text(TEXT, workers=1) == clean_text(TEXT)
+
+
+def test_parallel_clean_frame_matches_serial():
+    df = pd.DataFrame({"a": CELLS * 3, "b": list(reversed(CELLS)) * 3, "n": range(len(CELLS) * 3)})
+    expected = {col: df[col].astype(str).apply(clean_text).tolist() for col in ("a", "b")}
+    parallel_clean_frame(df, ["a", "b"], workers=2, chunk_rows=4)
+    assert {col: df[col].tolist() for col in ("a", "b")} == expected
+    assert df["n"].tolist() == list(range(len(CELLS) * 3))
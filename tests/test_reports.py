@@ -0,0 +1,99 @@
+import sys
+import os
+import io
+import json
+import pandas as pd # type: ignore
+import pytest # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import TextStats
+from reports import report_file, write_txt, write_json, write_html, write_parquet, FORMAT
+
+
+def text_results():
+    return {
+        "stats": TextStats.from_text("good product. fast shipping. bad box."),
+        "sentiment_scores": {"compound": 0.4, "pos": 0.5, "neg": 0.1, "neu": 0.4},
+        "tokens": [("good", 1), ("product", 1)],
+        "topics": {"Topic 1": ["good", "product"]},
+        "readability": 60.0,
+    }
+
+
+def csv_results():
+    results = text_results()
+    results.update(
+        text_columns=["review"],
+        rows=pd.DataFrame({"review": ["good <product>", "fast shipping", "bad box"], "compound": [0.4, 0.0, -0.5]}),
+        sentiment_counts={"positive": 1, "neutral": 1, "negative": 1},
+    )
+    return results
+
+
+def written(writer, results, batch_rows=2):
+    sink = io.BytesIO()
+    writer(results, sink, batch_rows)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize("results", [text_results, csv_results])
+def test_txt_metrics_are_aligned(results):
+    lines = written(write_txt, results()).decode("utf-8").splitlines()
+    lines = lines[:lines.index("🔑 TOP KEYWORDS")]
+    metrics = [line for line in lines if line.startswith("• ")]
+    columns = {len(line) - len(line.split(":", 1)[1].lstrip()) for line in metrics}
+    assert len(columns) == 1
+    assert "• Total Words:              6" in lines
+
+
+def test_json_streams_rows_in_batches():
+    report = json.loads(written(write_json, csv_results()))
+    assert report["format"] == FORMAT
+    assert report["report"]["rows"] == 3 and report["report"]["words"] == 6
+    assert [r["review"] for r in report["rows"]] == ["good <product>", "fast shipping", "bad box"]
+
+    assert json.loads(written(write_json, text_results()))["rows"] == []
+
+
+def test_html_escapes_row_cells():
+    page = written(write_html, csv_results()).decode("utf-8")
+    assert page.count("<tr><td>") == 3 + 2
+    assert "good &lt;product&gt;" in page and "<product>" not in page
+
+
+def test_parquet_keeps_rows_and_overview():
+    import pyarrow.parquet as pq # type: ignore
+
+    table = pq.read_table(io.BytesIO(written(write_parquet, csv_results())))
+    assert table.num_rows == 3
+    assert json.loads(table.schema.metadata[b"narrative_nexus.report"])["rows"] == 3
+
+    with pytest.raises(ValueError):
+        written(write_parquet, text_results())
+
+
+@pytest.mark.parametrize("fmt", ["txt", "json", "html", "parquet"])
+def test_report_file_is_read_from_the_start_and_removed_on_close(fmt):
+    results = csv_results()
+    report = report_file(results, fmt)
+    assert isinstance(report, io.BufferedReader) and report.tell() == 0
+    data = report.read()
+    if fmt == "txt":
+        assert b"CSV ANALYSIS REPORT" in data and data.endswith(b"\n")
+    elif fmt == "json":
+        assert len(json.loads(data)["rows"]) == 3
+    elif fmt == "html":
+        assert data.startswith(b"<!DOCTYPE html>") and data.endswith(b"</html>\n")
+    else:
+        import pyarrow.parquet as pq # type: ignore
+        assert pq.read_table(io.BytesIO(data)).num_rows == 3
+    report.close()
+    assert not os.path.exists(report.name)
+
+
+def test_report_file_rejects_unknown_format(tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    with pytest.raises(ValueError):
+        report_file(text_results(), "pdf")
+    assert not os.listdir(tmp_path)
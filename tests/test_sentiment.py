@@ -0,0 +1,52 @@
+import sys
+import os
+import pytest # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentiment_engine import SentimentEngine, split_sentences
+
+LEXICON = {"good": 1.9, "bad": -2.5, "love": 3.2, "great": 3.1}
+
+
+@pytest.fixture
+def engine():
+    return SentimentEngine(lexicon=dict(LEXICON))
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("The food is good.", {"neg": 0.0, "neu": 0.508, "pos": 0.492, "compound": 0.4404}),
+    # negation scales the valence by -0.74
+    ("The food is not good.", {"neg": 0.376, "neu": 0.624, "pos": 0.0, "compound": -0.3412}),
+    # words before "but" count half, words after it one and a half times
+    ("The food is good but the service is bad.", {"neg": 0.347, "neu": 0.511, "pos": 0.142, "compound": -0.5859}),
+    # an ALL-CAPS word among lowercase ones is emphasised
+    ("The food is GOOD.", {"neg": 0.0, "neu": 0.452, "pos": 0.548, "compound": 0.5622}),
+    ("THE FOOD IS GOOD.", {"neg": 0.0, "neu": 0.508, "pos": 0.492, "compound": 0.4404}),
+    ("The food is very good!!", {"neg": 0.0, "neu": 0.514, "pos": 0.486, "compound": 0.5827}),
+    ("I love it, it is great", {"neg": 0.0, "neu": 0.265, "pos": 0.735, "compound": 0.8519}),
+    ("The box arrived.", {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}),
+    ("", {"neg": 0.0, "neu": 0.0, "pos": 0.0, "compound": 0.0}),
+])
+def test_polarity_scores(engine, text, expected):
+    assert engine.polarity_scores(text) == expected
+
+
+def test_batch_matches_single_scores(engine):
+    texts = ["The food is good.", "The food is not good.", "The box arrived."]
+    scores = engine.score_batch(texts)
+    assert scores.shape == (3, 4)
+    assert [dict(zip(["neg", "neu", "pos", "compound"], row)) for row in scores.tolist()] == \
+        [engine.polarity_scores(t) for t in texts]
+    assert engine.sentences_scored == 3
+
+
+def test_documents_average_their_sentences(engine):
+    text = "The food is good. The food is not good! The box arrived?"
+    assert split_sentences(text) == ["The food is good.", "The food is not good!", "The box arrived?"]
+    document = engine.score_document(text)
+    assert document["aggregate"]["compound"] == round(document["scores"][:, 3].mean(), 4)
+    assert engine.score_documents([text, ""]) == [
+        document["aggregate"],
+        {"neg": 0.0, "neu": 0.0, "pos": 0.0, "compound": 0.0},
+    ]
@@ -0,0 +1,110 @@
+import sys
+import os
+import json
+import asyncio
+import pytest # type: ignore
+from urllib.parse import urlsplit
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from service import AnalysisService, HTTPError, _parse_job
+
+
+def read_request(raw, **options):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await AnalysisService(workers=1, **options)._read_request(reader)
+    return asyncio.run(run())
+
+
+def post(length, body=b""):
+    return b"POST /analyze HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n" + body
+
+
+def test_reads_a_request():
+    method, url, headers, body = read_request(post(b"5", b"hello"))
+    assert (method, url.path, headers["content-length"], body) == ("POST", "/analyze", "5", b"hello")
+    assert read_request(b"GET /health HTTP/1.1\r\n\r\n")[3] == b""
+    assert read_request(b"") is None
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"+5", b"5.0", b"1 0", "٥".encode("utf-8")])
+def test_rejects_malformed_content_length(length):
+    with pytest.raises(HTTPError) as e:
+        read_request(post(length, b"hello"))
+    assert e.value.status == 400
+
+
+@pytest.mark.parametrize("raw, status", [
+    (post(b"10", b"short"), 400),
+    (post(b"2048", b"x" * 2048), 413),
+    (b"POST /analyze HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n", 411),
+    (b"NONSENSE\r\n\r\n", 400),
+])
+def test_rejects_bad_requests(raw, status):
+    with pytest.raises(HTTPError) as e:
+        read_request(raw, max_body_mb=1 / 1024)
+    assert e.value.status == status
+
+
+@pytest.mark.parametrize("query, headers, body", [
+    ("", {"content-type": "application/json"}, b"{not json"),
+    ("", {"content-type": "application/json"}, b'["text"]'),
+    ("", {"content-type": "application/json"}, b'{"text": 5}'),
+    ("", {"content-type": "application/json"}, b'{"text": "ok", "n_tokens": "many"}'),
+    ("", {}, b"raw upload"),
+])
+def test_parse_job_rejects_bad_input(query, headers, body):
+    with pytest.raises(HTTPError) as e:
+        _parse_job(urlsplit(f"/analyze?{query}"), headers, body)
+    assert e.value.status == 400
+
+
+def test_parse_job():
+    job = _parse_job(urlsplit("/analyze"), {"content-type": "application/json; charset=utf-8"},
+                     json.dumps({"text": "hi", "n_topics": 2}).encode())
+    assert job == {"text": "hi", "n_tokens": 12, "n_topics": 2}
+    job = _parse_job(urlsplit("/analyze?filename=Report.PDF&n_tokens=5"), {}, b"%PDF")
+    assert (job["file_type"], job["n_tokens"], job["data"]) == ("pdf", 5, b"%PDF")
+
+
+def dispatch(service, failures):
+    """Dispatch one batch of two jobs whose analysis breaks the pool ``failures`` times."""
+    calls = []
+
+    async def analyze(jobs):
+        calls.append(jobs)
+        if len(calls) <= failures:
+            raise BrokenProcessPool("worker died")
+        return [{"status": "ok", "job": job} for job in jobs]
+
+    def replace_pool():
+        service.counters["pool_restarts"] += 1
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        service._slots = asyncio.Semaphore(1)
+        await service._slots.acquire()
+        service._analyze, service._replace_pool = analyze, replace_pool
+        batch = [(job, loop.create_future()) for job in ("a", "b")]
+        await service._dispatch(batch)
+        return [f.exception() or f.result() for _, f in batch]
+
+    return asyncio.run(run()), len(calls)
+
+
+def test_broken_pool_is_replaced_and_the_batch_retried():
+    service = AnalysisService(workers=1)
+    results, calls = dispatch(service, failures=1)
+    assert results == [{"status": "ok", "job": "a"}, {"status": "ok", "job": "b"}]
+    assert calls == 2 and service.counters["pool_restarts"] == 1
+
+
+def test_batch_fails_alone_when_the_retry_breaks_too():
+    service = AnalysisService(workers=1)
+    results, calls = dispatch(service, failures=2)
+    assert all(isinstance(r, BrokenProcessPool) for r in results)
+    assert calls == 2 and service.inflight == 0
@@ -0,0 +1,43 @@
+import sys
+import os
+import random
+import pandas as pd # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tokenizer import tokenize, token_strings, sentences, TOKEN_PATTERN, BLOCK_CHARS
+from metrics import top_tokens, word_count, sentence_count, row_counts
+
+
+def test_uppercase_letters_are_word_characters():
+    text = "Hello World. The QUICK brown fox!"
+    assert token_strings(text) == ["Hello", "World.", "The", "QUICK", "brown", "fox"]
+    assert word_count(text) == 6
+    assert sentence_count(text) == 2
+    assert sentences(text) == ["Hello World", "The QUICK brown fox!"]
+    assert ("QUICK", 1) in top_tokens(text, n=10)
+
+
+def test_uppercase_rows_are_counted():
+    words, sentence_counts, letters = row_counts(pd.Series(["I AM HAPPY", "ok. FINE"]))
+    assert words.tolist() == [3, 2]
+    assert sentence_counts.tolist() == [1, 2]
+    assert letters.tolist() == [8, 7]
+
+
+def test_offsets_match_the_token_pattern():
+    rng = random.Random(0)
+    alphabet = "aZ9. \t\n,!é—Q"
+    for _ in range(50):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randrange(200)))
+        tokens = tokenize(text, block_chars=7)
+        matches = list(TOKEN_PATTERN.finditer(text))
+        assert tokens.starts.tolist() == [m.start() for m in matches]
+        assert tokens.ends.tolist() == [m.end() for m in matches]
+        assert tokens.strings() == [m.group() for m in matches]
+
+
+def test_tokens_cut_by_a_block_boundary_are_joined():
+    text = "A" * (BLOCK_CHARS - 2) + " Word" + "s" * 10
+    assert token_strings(text) == ["A" * (BLOCK_CHARS - 2), "Word" + "s" * 10]
+    assert len(tokenize(text)) == 2
@@ -0,0 +1,38 @@
+import sys
+import os
+import random
+from collections import Counter
+import numpy as np # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vocabulary import Vocabulary, TokenCounts
+
+
+def test_encode_interns_in_first_seen_order():
+    vocabulary = Vocabulary()
+    assert vocabulary.encode(["b", "a", "b"]).tolist() == [0, 1, 0]
+    assert vocabulary.encode(("a", "c", "b", "c")).tolist() == [1, 2, 0, 2]
+    assert vocabulary.terms == ["b", "a", "c"] and vocabulary.encode([]).dtype == np.int32
+
+
+def test_update_matches_counter():
+    rng = random.Random(0)
+    chunks = [[rng.choice("abcdefgh") * rng.randint(1, 3) for _ in range(200)] for _ in range(5)]
+    counts, expected = TokenCounts(), Counter()
+    for chunk in chunks:
+        counts.update(chunk)
+        expected.update(chunk)
+    counts.update(iter(chunks[0]), weight=2)
+    expected.update({t: 2 * c for t, c in Counter(chunks[0]).items()})
+
+    assert counts.most_common() == expected.most_common()
+    assert counts.total() == expected.total() and len(counts) == len(expected)
+
+
+def test_update_with_mappings_and_counts():
+    counts = TokenCounts().update(["x", "y", "x"])
+    other = TokenCounts().update(["y", "z"])
+    counts.update(other, weight=3).update({"x": 1, "w": 4}, weight=-1)
+    assert [counts[t] for t in "xyzw"] == [1, 4, 3, -4]
+    assert counts["missing"] == 0
@@ -0,0 +1,196 @@
+"""
+The one tokenizer every module shares. A token is a run of ``[A-Za-z0-9.]``
+(``clean_text`` lowercases first, so its tokens match ``CLEAN_TOKEN_PATTERN``);
+a sentence starts at the first letter or digit after a period (or a row
+break) and ends at the next one. ``tokenize`` finds both in a single scan
+and returns them as integer offset arrays into the text instead of lists of
+string copies.
+
+The scan classifies code points through a precompiled lookup table, a block
+of the text at a time, which is equivalent to ``TOKEN_PATTERN.finditer`` but
+runs at NumPy speed.
+"""
+import re
+import numpy as np # type: ignore
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9.]+")
+CLEAN_TOKEN_PATTERN = re.compile(r"[a-z0-9.]+")
+# Topic-model terms: letters/digits only, at least two of them
+TERM_PATTERN = re.compile(r"[a-z0-9]{2,}")
+# Joins rows into one buffer; not a token and always ends the sentence
+ROW_BREAK = "\x00"
+
+BLOCK_CHARS = 1 << 18
+
+_WORD, _DOT, _BREAK, _SPACE = 1, 2, 4, 8
+# Code points past ASCII are clamped to 255 and classed as separators
+_CLASSES = np.zeros(256, dtype=np.uint8)
+for _c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789":
+    _CLASSES[ord(_c)] = _WORD
+_CLASSES[ord(".")] = _DOT
+_CLASSES[ord(ROW_BREAK)] = _BREAK
+for _c in " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f":
+    _CLASSES[ord(_c)] = _SPACE  # what str.split() splits on
+
+
+def _classify(chunk):
+    """(code points clamped to 0..255, their classes) of a piece of text."""
+    if chunk.isascii():
+        codes = np.frombuffer(chunk.encode("ascii"), dtype=np.uint8)
+    else:
+        codes = np.minimum(np.frombuffer(chunk.encode("utf-32-le", "surrogatepass"), dtype="<u4"), 255)
+    return codes, _CLASSES.take(codes)
+
+
+class Tokens:
+    """
+    Token and sentence offsets of one text: ``starts``/``ends`` and
+    ``sentence_starts``/``sentence_ends`` are parallel integer arrays of
+    character offsets (end exclusive); ``breaks`` holds the ROW_BREAK offsets.
+    """
+
+    def __init__(self, text, starts, ends, sentence_starts, sentence_ends, breaks, open_sentence, clean=False):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.sentence_starts = sentence_starts
+        self.sentence_ends = sentence_ends
+        self.breaks = breaks
+        self.open_sentence = open_sentence
+        self.clean = clean
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def sentence_count(self):
+        return len(self.sentence_starts)
+
+    @property
+    def letters(self):
+        return int((self.ends - self.starts).sum(dtype=np.int64))
+
+    def strings(self):
+        """The tokens as strings, in order."""
+        # Only whitespace between the tokens (any cleaned text): split is exact
+        if not self.clean:
+            return token_strings(self.text)
+        return (self.text.replace(ROW_BREAK, " ") if len(self.breaks) else self.text).split()
+
+    def sentences(self, text=None):
+        """The sentences as strings, without their closing period, sliced from ``text`` (default: the tokenized text)."""
+        text = self.text if text is None else text
+        return [text[a:b].rstrip() for a, b in zip(self.sentence_starts.tolist(), self.sentence_ends.tolist())]
+
+    def row_index(self, offsets):
+        """Row (0-based, rows separated by ROW_BREAK) of each offset."""
+        return np.searchsorted(self.breaks, offsets)
+
+
+def _runs(mask):
+    """(starts, ends) of the runs of True in a boolean array."""
+    bounds = np.flatnonzero(mask[1:] != mask[:-1]) + 1
+    if len(mask) and mask[0]:
+        bounds = np.concatenate(([0], bounds))
+    if len(mask) and mask[-1]:
+        bounds = np.concatenate((bounds, [len(mask)]))
+    return bounds[0::2], bounds[1::2]
+
+
+def tokenize(text, open_sentence=False, block_chars=BLOCK_CHARS):
+    """
+    Scan ``text`` once for tokens and sentences. ``open_sentence`` says the
+    text continues a sentence from a previous piece, so a sentence that
+    started there is not counted again. Returns ``Tokens``.
+    """
+    n = len(text)
+    dtype = np.int32 if n < 2 ** 31 else np.int64
+    starts, ends, sentence_starts, next_enders, enders = [], [], [], [], []
+    breaks, n_enders = [], 0
+    has_breaks = ROW_BREAK in text
+    is_open = open_sentence
+    clean = True
+
+    for offset in range(0, n, block_chars):
+        _, classes = _classify(text[offset:offset + block_chars])
+        clean = clean and bool(classes.all())
+        block_starts, block_ends = _runs((classes & (_WORD | _DOT)) != 0)
+        block_starts += offset
+        block_ends += offset
+        # A token cut by the block boundary continues in this block
+        if len(block_starts) and ends and len(ends[-1]) and ends[-1][-1] == block_starts[0]:
+            ends[-1] = ends[-1][:-1]
+            block_starts = block_starts[1:]
+        starts.append(block_starts)
+        ends.append(block_ends)
+
+        # A run of letters/digits opens a sentence when a period or row
+        # break (or the start of the text) comes after the previous run
+        is_word = classes == _WORD
+        word_starts = np.flatnonzero(is_word[1:] > is_word[:-1]) + 1
+        if len(is_word) and is_word[0]:
+            word_starts = np.concatenate(([0], word_starts))
+        block_enders = np.flatnonzero((classes & (_DOT | _BREAK)) != 0)
+        if len(word_starts):
+            # Enders and word runs never overlap, so the run an ender precedes
+            # is found by searching the (few) enders among the run starts
+            opens = np.zeros(len(word_starts), dtype=bool)
+            following = np.searchsorted(word_starts, block_enders)
+            opens[following[following < len(word_starts)]] = True
+            opens[0] |= not is_open
+            opened = word_starts[opens]
+            sentence_starts.append(opened + offset)
+            # Each sentence runs up to the next ender, counted across blocks
+            next_enders.append(np.searchsorted(block_enders, opened) + n_enders)
+            last_word = len(is_word) - 1 - int(np.argmax(is_word[::-1]))
+            is_open = not len(block_enders) or block_enders[-1] < last_word
+        elif len(block_enders):
+            is_open = False
+        enders.append(block_enders + offset)
+        if has_breaks:
+            breaks.append(block_enders[classes[block_enders] == _BREAK] + offset)
+        n_enders += len(block_enders)
+
+    def join(parts):
+        return np.concatenate(parts).astype(dtype, copy=False) if parts else np.zeros(0, dtype=dtype)
+
+    enders = join(enders)
+    next_enders = np.concatenate(next_enders) if next_enders else np.zeros(0, dtype=np.int64)
+    closed = next_enders < n_enders
+    sentence_ends = np.full(len(next_enders), n, dtype=dtype)
+    sentence_ends[closed] = enders[next_enders[closed]]
+    breaks = join(breaks)
+    return Tokens(text, join(starts), join(ends), join(sentence_starts), sentence_ends, breaks, is_open, clean)
+
+
+def token_strings(text, keep_breaks=False):
+    """
+    The tokens of ``text`` as strings, without computing offsets. Blanking
+    every non-token character and splitting is far cheaper than slicing the
+    tokens out one at a time. With ``keep_breaks`` every ROW_BREAK is kept as
+    a token of its own, so a joined buffer can be split back into rows.
+    """
+    wanted = _WORD | _DOT | (_BREAK if keep_breaks else 0)
+    parts = []
+    for offset in range(0, len(text), BLOCK_CHARS):
+        chunk = text[offset:offset + BLOCK_CHARS]
+        codes, classes = _classify(chunk)
+        if classes.all():
+            parts.append(chunk if keep_breaks else chunk.replace(ROW_BREAK, " "))
+        else:
+            kept = np.where(classes & wanted, codes, 32).astype(np.uint8, copy=False)
+            parts.append(kept.tobytes().decode("ascii"))
+    joined = "".join(parts)
+    if keep_breaks:
+        joined = joined.replace(ROW_BREAK, f" {ROW_BREAK} ")
+    return joined.split()
+
+
+def sentences(text):
+    """Sentence strings of ``text``."""
+    return tokenize(text).sentences()
+
+
+def terms(text):
+    """Topic-model terms of a lowercase text."""
+    return TERM_PATTERN.findall(text)
@@ -0,0 +1,422 @@
+import os
+import time
+import pickle
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import numpy as np # type: ignore
+from tokenizer import terms
+from vocabulary import TokenCounts
+
+# Configuration (overridable through the environment)
+MODEL_DIR = os.environ.get("NARRATIVE_NEXUS_MODEL_DIR", os.path.join(".cache", "models"))
+MODEL_TOPICS = int(os.environ.get("NARRATIVE_NEXUS_MODEL_TOPICS", "10"))
+TOPIC_BACKEND = os.environ.get("NARRATIVE_NEXUS_TOPIC_BACKEND", "lda")
+PERSIST_MODELS = os.environ.get("NARRATIVE_NEXUS_PERSIST_TOPICS", "0") == "1"
+# Named models kept in memory (least recently used dropped first)
+MODEL_CACHE_SIZE = int(os.environ.get("NARRATIVE_NEXUS_MODEL_CACHE_SIZE", "8"))
+HASH_FEATURES = 2 ** 16
+BATCH_SIZE = 512
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def _batches(documents, batch_size):
+    """Consecutive slices of a list or the rows of a matrix."""
+    n = documents.shape[0] if hasattr(documents, "shape") else len(documents)
+    for start in range(0, n, batch_size):
+        yield documents[start:start + batch_size]
+
+
+def topic_terms(document):
+    """The terms a topic model counts: the tokenizer's terms minus English stop words."""
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS # type: ignore
+
+    return [t for t in terms(document.lower()) if t not in ENGLISH_STOP_WORDS]
+
+
+class HashedTerms:
+    """
+    Fixed hashed term space. Documents are interned into term-id arrays once;
+    each id maps to its hashed feature (as HashingVectorizer would hash the
+    term) and the per-id counts name the buckets.
+    """
+
+    def __init__(self, n_features=HASH_FEATURES):
+        self.n_features = n_features
+        self.vocabulary = TokenCounts()
+        self._buckets = np.zeros(0, dtype=np.int32)
+        self._names = None
+
+    def encode(self, documents):
+        """(ids, indptr): the term ids of every document in one flat array."""
+        return self.vocabulary.vocabulary.encode_documents(topic_terms(doc) for doc in documents)
+
+    def learn(self, encoded):
+        self.vocabulary.add_ids(encoded[0])
+        self._names = None
+
+    def buckets(self):
+        """Hashed feature index of every term id."""
+        from sklearn.utils import murmurhash3_32 # type: ignore
+
+        terms = self.vocabulary.vocabulary.terms
+        if len(self._buckets) < len(terms):
+            new = [abs(murmurhash3_32(t, seed=0)) % self.n_features for t in terms[len(self._buckets):]]
+            self._buckets = np.concatenate((self._buckets, np.array(new, dtype=np.int32)))
+        return self._buckets
+
+    def matrix(self, encoded):
+        """Hashed term counts (documents x n_features) of encoded documents."""
+        from scipy.sparse import csr_matrix # type: ignore
+
+        ids, indptr = encoded
+        counts = csr_matrix(
+            (np.ones(len(ids)), self.buckets()[ids], indptr),
+            shape=(len(indptr) - 1, self.n_features),
+        )
+        counts.sum_duplicates()
+        return counts
+
+    def transform(self, documents):
+        return self.matrix(self.encode(documents))
+
+    def _bucket_names(self, counts):
+        ids = counts.top_ids()
+        buckets = self.buckets()[ids]
+        # First occurrence in frequency order = the bucket's most frequent term
+        _, first = np.unique(buckets, return_index=True)
+        terms = self.vocabulary.vocabulary.decode(ids[first])
+        return dict(zip(buckets[first].tolist(), terms))
+
+    def names(self, encoded=None):
+        """
+        Hashed feature index -> the most frequent token in that bucket, over
+        every learned document or only over the ``encoded`` ones.
+        """
+        if encoded is not None:
+            return self._bucket_names(TokenCounts(self.vocabulary.vocabulary).add_ids(encoded[0]))
+        if self._names is None:
+            self._names = self._bucket_names(self.vocabulary)
+        return self._names
+
+
+# ------------ BACKENDS ------------- #
+
+class TopicModel(ABC):
+    """
+    Topic backend interface. Subclasses implement ``fit`` (called once per
+    new corpus, learning on top of what the model already knows) and
+    ``transform_counts``, and expose ``components_`` (n_topics, n_features);
+    naming, ranking and persistence are shared. Every update records its
+    time and iteration count.
+    """
+
+    name = None
+
+    def __init__(self, n_topics=MODEL_TOPICS, random_state=42):
+        self.n_topics = n_topics
+        self.random_state = random_state
+        self.terms = HashedTerms()
+        self.documents_seen = 0
+        self.seen_corpora = set()
+        self.fit_seconds = 0.0
+        self.n_iter = 0
+        self.fitted = False
+
+    @abstractmethod
+    def fit(self, documents):
+        """Learn from a list of documents."""
+
+    @abstractmethod
+    def transform_counts(self, counts):
+        """Document-topic weights (n_documents, n_topics) of hashed term counts."""
+
+    @property
+    @abstractmethod
+    def components_(self):
+        """Topic-term weights (n_topics, n_features)."""
+
+    def transform(self, documents):
+        """Document-topic weights of ``documents`` against the fitted topics, without learning from them."""
+        if not self.fitted:
+            raise ValueError("Topic model has not been fitted yet.")
+        return self.transform_counts(self.terms.transform(list(documents)))
+
+    def update_once(self, documents):
+        """``fit`` unless this exact corpus has already been learned; returns whether it was."""
+        documents = [d for d in documents if d and d.strip()]
+        digest = _digest("\x00".join(documents))
+        if not documents or digest in self.seen_corpora:
+            return False
+
+        began = time.perf_counter()
+        self.fit(documents)
+        self.fit_seconds = time.perf_counter() - began
+        self.documents_seen += len(documents)
+        self.seen_corpora.add(digest)
+        self.fitted = True
+        return True
+
+    def fit_report(self):
+        return {
+            "backend": self.name,
+            "fit_seconds": round(self.fit_seconds, 4),
+            "n_iter": self.n_iter,
+            "documents_seen": self.documents_seen,
+            "corpora_seen": len(self.seen_corpora),
+        }
+
+    def topic_words(self, topic, n_words=5, names=None):
+        names = self.terms.names() if names is None else names
+        words = []
+        for index in np.argsort(self.components_[topic])[::-1]:
+            name = names.get(int(index))
+            if name is not None:
+                words.append(name)
+                if len(words) == n_words:
+                    break
+        return words
+
+    def topics(self, n_words=5, topic_ids=None, names=None):
+        """Words of the ``topic_ids`` topics (default: all), labelled "Topic 1".."Topic n" in that order."""
+        topic_ids = range(self.n_topics) if topic_ids is None else topic_ids
+        return {f"Topic {rank}": self.topic_words(k, n_words, names) for rank, k in enumerate(topic_ids, 1)}
+
+    def dominant_topics(self, documents, n_topics=3, n_words=5):
+        """
+        The ``n_topics`` topics carrying most weight across ``documents``,
+        mapped onto the fitted topics without refitting. Topics are described
+        only with terms that occur in ``documents``.
+        """
+        encoded = self.terms.encode(list(documents))
+        weights = self.transform_counts(self.terms.matrix(encoded)).sum(axis=0)
+        order = [int(k) for k in np.argsort(weights)[::-1][:n_topics]]
+        return self.topics(n_words, order, self.terms.names(encoded))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+class LDATopicModel(TopicModel):
+    """
+    Online LDA over hashed term counts. The feature space is fixed, so every
+    new corpus is learned through ``partial_fit`` on top of the current
+    topics, and unseen documents are mapped onto them without refitting.
+    """
+
+    name = "lda"
+
+    def __init__(self, n_topics=MODEL_TOPICS, random_state=42, passes=3, batch_size=BATCH_SIZE):
+        from sklearn.decomposition import LatentDirichletAllocation # type: ignore
+
+        super().__init__(n_topics, random_state)
+        self.passes = passes
+        self.batch_size = batch_size
+        self.lda = LatentDirichletAllocation(
+            n_components=n_topics, learning_method="online", random_state=random_state
+        )
+
+    def fit(self, documents):
+        encoded = self.terms.encode(documents)
+        self.terms.learn(encoded)
+        # Interned and counted once; every pass reuses the same matrix
+        counts = self.terms.matrix(encoded)
+        iterations = 0
+        for _ in range(self.passes):
+            for batch in _batches(counts, self.batch_size):
+                if batch.nnz:
+                    self.lda.partial_fit(batch)
+                    iterations += 1
+        if not hasattr(self.lda, "components_"):
+            raise ValueError("Documents contain no modelable terms.")
+        self.n_iter = iterations
+        return self
+
+    def transform_counts(self, counts):
+        parts = [self.lda.transform(batch) for batch in _batches(counts, self.batch_size)]
+        return np.vstack(parts) if parts else np.zeros((0, self.n_topics))
+
+    @property
+    def components_(self):
+        return self.lda.components_
+
+
+class NMFTopicModel(TopicModel):
+    """
+    NMF over sparse hashed TF-IDF. When a refit sees a corpus that differs
+    from the previous one by at most ``warm_start_threshold`` of its
+    documents, it starts from the previous factorization (H as is, W rows
+    reused for unchanged documents) instead of a fresh NNDSVDa init.
+    """
+
+    name = "nmf"
+
+    def __init__(self, n_topics=MODEL_TOPICS, random_state=42, solver="cd",
+                 max_iter=200, warm_start_threshold=0.2):
+        if solver not in ("cd", "mu"):
+            raise ValueError(f"Unknown NMF solver: {solver}")
+        from sklearn.feature_extraction.text import TfidfTransformer # type: ignore
+
+        super().__init__(n_topics, random_state)
+        self.solver = solver
+        self.max_topics = n_topics
+        self.max_iter = max_iter
+        self.warm_start_threshold = warm_start_threshold
+        self.tfidf = TfidfTransformer()
+        self.nmf = None
+        self.warm_started = False
+        self._rows = {}
+        self._W = None
+
+    def _features(self, counts, fit=False):
+        return self.tfidf.fit_transform(counts) if fit else self.tfidf.transform(counts)
+
+    def fit(self, documents):
+        from sklearn.decomposition import NMF # type: ignore
+
+        encoded = self.terms.encode(documents)
+        self.terms.learn(encoded)
+        X = self._features(self.terms.matrix(encoded), fit=True)
+        n_topics = min(self.max_topics, X.shape[0])
+        digests = [_digest(d) for d in documents]
+
+        known = [self._rows.get(d) for d in digests]
+        changed = sum(1 for row in known if row is None) / len(documents)
+        self.warm_started = (
+            self.nmf is not None
+            and self.nmf.n_components == n_topics
+            and changed <= self.warm_start_threshold
+        )
+
+        if self.warm_started:
+            H = self.nmf.components_.astype(np.float64)
+            W = np.empty((len(documents), n_topics))
+            new_rows = [i for i, row in enumerate(known) if row is None]
+            for i, row in enumerate(known):
+                if row is not None:
+                    W[i] = self._W[row]
+            if new_rows:
+                W[new_rows] = self.nmf.transform(X[new_rows])
+            if self.solver == "mu":
+                # Multiplicative updates can never move an exact zero
+                W = np.maximum(W, 1e-6)
+            nmf = NMF(n_components=n_topics, init="custom", solver=self.solver,
+                      max_iter=self.max_iter, random_state=self.random_state)
+            W = nmf.fit_transform(X, W=W, H=H)
+        else:
+            nmf = NMF(n_components=n_topics, init="nndsvda", solver=self.solver,
+                      max_iter=self.max_iter, random_state=self.random_state)
+            W = nmf.fit_transform(X)
+
+        self.nmf = nmf
+        self.n_topics = n_topics
+        self.n_iter = int(nmf.n_iter_)
+        self._W = W.astype(np.float32)
+        self._rows = {d: i for i, d in enumerate(digests)}
+        return self
+
+    def transform_counts(self, counts):
+        return self.nmf.transform(self._features(counts))
+
+    def fit_report(self):
+        report = super().fit_report()
+        report.update(solver=self.solver, warm_started=self.warm_started)
+        return report
+
+    @property
+    def components_(self):
+        return self.nmf.components_
+
+
+BACKENDS = {
+    "lda": LDATopicModel,
+    "nmf": NMFTopicModel,
+}
+
+
+# ------------ MODEL REGISTRY ------------- #
+
+_models = OrderedDict()
+_models_lock = threading.Lock()
+_update_locks = {}
+
+
+def model_path(name, backend=TOPIC_BACKEND):
+    return os.path.join(MODEL_DIR, f"topics_{name}_{backend}.pkl")
+
+
+def get_topic_model(name="default", backend=TOPIC_BACKEND, n_topics=MODEL_TOPICS,
+                    persist=PERSIST_MODELS, **options):
+    """
+    Long-lived model per name/backend, kept in memory (up to
+    MODEL_CACHE_SIZE names) and, with ``persist``, loaded from disk on
+    first use.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown topic backend: {backend}")
+
+    with _models_lock:
+        model = _models.get((name, backend))
+        if model is not None:
+            _models.move_to_end((name, backend))
+            return model
+        path = model_path(name, backend)
+        if persist and os.path.exists(path):
+            try:
+                model = TopicModel.load(path)
+            except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+                model = None
+        if model is None or not isinstance(model, BACKENDS[backend]):
+            model = BACKENDS[backend](n_topics=n_topics, **options)
+        _models[(name, backend)] = model
+        _update_locks.setdefault((name, backend), threading.Lock())
+        while len(_models) > MODEL_CACHE_SIZE:
+            evicted, _ = _models.popitem(last=False)
+            _update_locks.pop(evicted, None)
+        return model
+
+
+def peek_topic_model(name="default", backend=TOPIC_BACKEND):
+    """The named model if this process holds one, without creating or loading it."""
+    with _models_lock:
+        return _models.get((name, backend))
+
+
+def learn_and_describe(documents, n_topics=3, name="default", backend=TOPIC_BACKEND, n_words=5,
+                       persist=PERSIST_MODELS):
+    """
+    Fold ``documents`` into the named model (once per distinct corpus),
+    save it with ``persist``, and return the topics that dominate these
+    documents, described with their own terms. With ``name=None`` a
+    throwaway model is fitted on ``documents`` alone.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown topic backend: {backend}")
+    documents = [d for d in documents if d and d.strip()]
+    if not documents:
+        raise ValueError("No documents to model.")
+    if name is None:
+        model = BACKENDS[backend]()
+        model.update_once(documents)
+        return model.dominant_topics(documents, n_topics=n_topics, n_words=n_words)
+
+    model = get_topic_model(name, backend, persist=persist)
+    with _models_lock:
+        lock = _update_locks.setdefault((name, backend), threading.Lock())
+    with lock:
+        if model.update_once(documents) and persist:
+            model.save(model_path(name, backend))
+        return model.dominant_topics(documents, n_topics=n_topics, n_words=n_words)
@@ -0,0 +1,135 @@
+"""
+Token interning. A ``Vocabulary`` gives every distinct token a dense integer
+id in first-seen order, so documents are stored as ``int32`` id arrays and
+frequencies as arrays indexed by id (``np.bincount``) instead of dicts of
+token strings.
+"""
+from collections.abc import Mapping
+import numpy as np # type: ignore
+
+
+class Vocabulary:
+    """Token <-> id mapping; ids are assigned in the order tokens are first seen."""
+
+    def __init__(self):
+        self.index = {}
+        self.terms = []
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, token):
+        return token in self.index
+
+    def encode(self, tokens):
+        """``int32`` ids of a sequence of token strings, interning unseen ones."""
+        try:
+            # One lookup pass when every token is known, the common case once warm
+            return np.fromiter(map(self.index.__getitem__, tokens), dtype=np.int32, count=len(tokens))
+        except KeyError:
+            self.intern(dict.fromkeys(tokens))
+            return np.fromiter(map(self.index.__getitem__, tokens), dtype=np.int32, count=len(tokens))
+
+    def intern(self, tokens):
+        """Add the unseen ones of some distinct tokens, in order; returns their ids."""
+        index = self.index
+        new = [t for t in tokens if t not in index]
+        if new:
+            index.update(zip(new, range(len(self.terms), len(self.terms) + len(new))))
+            self.terms.extend(new)
+        return np.fromiter(map(index.__getitem__, tokens), dtype=np.int32, count=len(tokens))
+
+    def encode_documents(self, documents, batch_size=4096):
+        """
+        Encode an iterable of token lists as one flat id array plus ``indptr``
+        offsets (document ``i`` is ``ids[indptr[i]:indptr[i + 1]]``). Only a
+        batch of documents is held as strings at a time.
+        """
+        parts, lengths, batch = [], [], []
+        for document in documents:
+            batch.extend(document)
+            lengths.append(len(document))
+            if len(lengths) % batch_size == 0:
+                parts.append(self.encode(batch))
+                batch = []
+        parts.append(self.encode(batch))
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        return np.concatenate(parts), indptr
+
+    def decode(self, ids):
+        terms = self.terms
+        return [terms[i] for i in np.asarray(ids).tolist()]
+
+
+class TokenCounts:
+    """
+    ``Counter``-like token frequencies kept as an ``int64`` array indexed by
+    vocabulary id. ``most_common`` orders ties by first appearance, as
+    ``Counter`` does.
+    """
+
+    def __init__(self, vocabulary=None):
+        self.vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _grow(self):
+        missing = len(self.vocabulary) - len(self.counts)
+        if missing > 0:
+            self.counts = np.concatenate((self.counts, np.zeros(missing, dtype=np.int64)))
+        return self.counts
+
+    def add_ids(self, ids, weight=1):
+        """Count an array of token ids of this vocabulary, each occurrence as ``weight``."""
+        if len(ids):
+            counts = np.bincount(ids, minlength=len(self.vocabulary))
+            if weight != 1:
+                counts *= weight
+            counts[:len(self.counts)] += self.counts
+            self.counts = counts
+        return self
+
+    def update(self, tokens, weight=1):
+        """
+        Count token strings, or add another ``TokenCounts`` / token -> count
+        mapping; every count is multiplied by ``weight``.
+        """
+        if isinstance(tokens, TokenCounts):
+            ids = self.vocabulary.intern(tokens.vocabulary.terms[:len(tokens.counts)])
+            self._grow()[ids] += tokens.counts * weight
+            return self
+        if not isinstance(tokens, Mapping):
+            if not isinstance(tokens, (list, tuple)):
+                tokens = list(tokens)
+            return self.add_ids(self.vocabulary.encode(tokens), weight)
+        ids = self.vocabulary.intern(list(tokens))
+        self._grow()[ids] += np.fromiter(tokens.values(), dtype=np.int64, count=len(tokens)) * weight
+        return self
+
+    def __getitem__(self, token):
+        i = self.vocabulary.index.get(token)
+        return int(self.counts[i]) if i is not None and i < len(self.counts) else 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.counts))
+
+    def total(self):
+        return int(self.counts.sum())
+
+    def top_ids(self, n=None):
+        """Ids of the ``n`` most frequent tokens (all counted tokens if None), most frequent first."""
+        counts = self.counts
+        if n is None or n >= len(counts):
+            candidates = np.flatnonzero(counts)
+        elif n <= 0:
+            return np.zeros(0, dtype=np.int64)
+        else:
+            # The n-th largest count bounds the candidates; ties with it stay in
+            top = np.argpartition(counts, len(counts) - n)[len(counts) - n:]
+            candidates = np.flatnonzero(counts >= max(int(counts[top].min()), 1))
+        order = np.argsort(-counts[candidates], kind="stable")
+        return candidates[order][:n]
+
+    def most_common(self, n=None):
+        ids = self.top_ids(n)
+        return list(zip(self.vocabulary.decode(ids), self.counts[ids].tolist()))